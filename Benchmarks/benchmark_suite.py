@@ -0,0 +1,349 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from typing import TypedDict
+
+# Offline benchmark suite for the chain patterns in this repo.
+#
+# Each pattern rebuilds the chain of one script (same prompts, same
+# composition) on top of the fake chat model and fake embeddings from
+# fake_models.py at the repo root, so it runs without API keys; with the same
+# seed the fakes draw the same latencies and failures. For each pattern it measures:
+#
+#   overhead  framework time per call with a zero-latency model, run one at a time
+#   stages    time per runnable (prompt, model, parser, ...) in that same setup
+#   load      throughput, p50/p95/p99 latency and errors with the configured fake
+#
+#   python Benchmarks/benchmark_suite.py --latency 0.2 --latency-distribution lognormal \
+#       --latency-jitter 0.5 --tokens-per-second 80 --failure-rate 0.01 --output results.json
+#
+# Results are written as JSON so runs can be compared over time.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "Chains"))
+sys.path.insert(0, os.path.join(ROOT, "langchainModels", "EmbeddedModels"))
+
+import langchain_core  # noqa: E402
+from langchain_core.callbacks import BaseCallbackHandler  # noqa: E402
+from langchain_core.prompts import ChatPromptTemplate  # noqa: E402
+from langchain_core.output_parsers import PydanticOutputParser, StrOutputParser  # noqa: E402
+from langchain_core.runnables import RunnableLambda, RunnableParallel  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
+
+from fake_models import CountingFakeChatModel, NgramFakeEmbeddings  # noqa: E402
+from routing import route_once  # noqa: E402
+from streaming_parser import StreamingStructuredOutputParser  # noqa: E402
+from similarity import SimilarityIndex  # noqa: E402
+
+
+class MovieInfo(TypedDict):
+    title: str
+    year: int
+    genre: str
+
+
+class Mood(BaseModel):
+    feeling: str
+    reason: str
+
+
+def reply_text(words):
+    sentence = "The quick brown fox jumps over the lazy dog near the river bank today".split()
+    return " ".join(sentence[i % len(sentence)] for i in range(words))
+
+
+def make_respond(reply_words):
+    text = reply_text(reply_words)
+
+    def respond(prompt):
+        # Answers shaped like the real replies each prompt asks for
+        if prompt.startswith("Analyze the sentiment"):
+            return "positive" if "love" in prompt else "negative" if "terrible" in prompt else "neutral"
+        if prompt.startswith("Tell me about the movie"):
+            return json.dumps({"title": prompt.rsplit(" ", 1)[-1], "year": 2010, "genre": "Science fiction"})
+        if prompt.startswith("What is your mood"):
+            return json.dumps({"feeling": "happy", "reason": text})
+        return text
+    return respond
+
+
+# ============================================================================
+# Chain patterns, one per script
+# ============================================================================
+
+def simple_chain(model, embeddings):
+    # Chains/simple_chain.py
+    prompt = ChatPromptTemplate.from_messages([("user", "Write a poem about {topic}.")])
+    chain = prompt | model | StrOutputParser()
+    return chain, lambda i: {"topic": f"topic {i}"}
+
+
+def sequential_chain(model, embeddings):
+    # Chains/sequential_chain.py
+    prompt1 = ChatPromptTemplate.from_messages([("user", "Generate a detailed report on {topic}.")])
+    prompt2 = ChatPromptTemplate.from_messages([
+        ("user", "Generate a 5 pointer summary from the following text \n {text}")
+    ])
+    parser = StrOutputParser()
+    chain = prompt1 | model | parser | prompt2 | model | parser
+    return chain, lambda i: {"topic": f"topic {i}"}
+
+
+def parallel_chain(model, embeddings):
+    # Chains/parallel_chain.py, example 1
+    parser = StrOutputParser()
+    chain = RunnableParallel({
+        "summary": ChatPromptTemplate.from_messages([("user", "Provide a brief summary of: {topic}")]) | model | parser,
+        "pros": ChatPromptTemplate.from_messages([("user", "List 3 pros of: {topic}")]) | model | parser,
+        "cons": ChatPromptTemplate.from_messages([("user", "List 3 cons of: {topic}")]) | model | parser,
+    })
+    return chain, lambda i: {"topic": f"topic {i}"}
+
+
+def conditional_chain(model, embeddings):
+    # Chains/conditional_chains.py, example 2 (sentiment routing)
+    parser = StrOutputParser()
+    sentiment_prompt = ChatPromptTemplate.from_messages([
+        ("user", "Analyze the sentiment of this text and respond with ONLY one word: "
+                 "'positive', 'negative', or 'neutral'. Text: {text}")
+    ])
+
+    def normalize(sentiment):
+        sentiment = sentiment.strip().lower()
+        return "positive" if "positive" in sentiment else "negative" if "negative" in sentiment else "neutral"
+
+    def respond_chain(tone):
+        return ChatPromptTemplate.from_messages([
+            ("user", "The user said: '{text}'. Respond " + tone + ".")
+        ]) | model | parser
+
+    chain = route_once(
+        sentiment_prompt | model | parser | RunnableLambda(normalize),
+        {"positive": respond_chain("enthusiastically"), "negative": respond_chain("empathetically and helpfully")},
+        respond_chain("neutrally and informatively"),
+    )
+    texts = ["I love this product! It's amazing!", "This is terrible, I'm very disappointed.", "It arrived today."]
+    return chain, lambda i: {"text": texts[i % len(texts)]}
+
+
+def structured_output(model, embeddings):
+    # StructuredOutput/structured_output_demo.py
+    prompt = ChatPromptTemplate.from_messages([("user", "Tell me about the movie {movie}")])
+    chain = prompt | model.with_structured_output(MovieInfo)
+    return chain, lambda i: {"movie": f"Movie{i}"}
+
+
+def structured_output_parser(model, embeddings):
+    # Chains/chain_with_structured_output.py
+    prompt = ChatPromptTemplate.from_messages([
+        ("user", "What is your mood today?\n{format_instructions}")
+    ]).partial(format_instructions=PydanticOutputParser(pydantic_object=Mood).get_format_instructions())
+    chain = prompt | model | StreamingStructuredOutputParser(schema_type=Mood)
+    return chain, lambda i: {}
+
+
+def embedding_similarity(model, embeddings):
+    # langchainModels/EmbeddedModels/embedding_openai.py: embed documents, score them
+    def embed(documents):
+        return embeddings.embed_documents(documents)
+
+    async def aembed(documents):
+        return await embeddings.aembed_documents(documents)
+
+    def nearest(vectors):
+        neighbours, scores = SimilarityIndex(vectors).top_k(None, k=1, exclude_self=True)
+        return neighbours[:, 0].tolist()
+
+    chain = RunnableLambda(embed, afunc=aembed, name="embed_documents") | RunnableLambda(nearest, name="similarity")
+    documents = [f"Document {j} about {'machine learning' if j % 2 else 'cooking pasta'}" for j in range(10)]
+    return chain, lambda i: documents[i % 10:] + documents[:i % 10]
+
+
+PATTERNS = {
+    "simple_chain": simple_chain,
+    "sequential_chain": sequential_chain,
+    "parallel_chain": parallel_chain,
+    "conditional_chain": conditional_chain,
+    "structured_output": structured_output,
+    "structured_output_parser": structured_output_parser,
+    "embedding_similarity": embedding_similarity,
+}
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+class StageTimer(BaseCallbackHandler):
+    """Records the duration of every runnable run, keyed by its name"""
+
+    def __init__(self):
+        self.started = {}
+        self.durations = {}
+
+    def _start(self, run_id, name):
+        self.started[run_id] = (name, time.perf_counter())
+
+    def _end(self, run_id):
+        name, start = self.started.pop(run_id, (None, None))
+        if name is not None:
+            self.durations.setdefault(name, []).append(time.perf_counter() - start)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, **kwargs):
+        self._start(run_id, kwargs.get("name") or (serialized or {}).get("name", "chain"))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, kwargs.get("name") or (serialized or {}).get("name", "chat_model"))
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summary_ms(values):
+    values = sorted(values)
+    return {
+        "mean": sum(values) / len(values) * 1000 if values else None,
+        "p50": percentile(values, 0.50) * 1000 if values else None,
+        "p95": percentile(values, 0.95) * 1000 if values else None,
+        "p99": percentile(values, 0.99) * 1000 if values else None,
+    }
+
+
+async def run_load(chain, make_input, requests, concurrency, config=None, count_errors=True):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await chain.ainvoke(make_input(i), config)
+            except Exception:
+                if not count_errors:
+                    raise
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(requests)])
+    return time.perf_counter() - start, latencies, errors
+
+
+def benchmark(name, args):
+    build = PATTERNS[name]
+    respond = make_respond(args.reply_words)
+
+    # Framework overhead: zero-latency fakes, one call at a time
+    chain, make_input = build(CountingFakeChatModel(respond=respond), NgramFakeEmbeddings())
+    asyncio.run(run_load(chain, make_input, 20, 1, count_errors=False))  # warm up
+    elapsed, latencies, _ = asyncio.run(run_load(chain, make_input, args.overhead_requests, 1, count_errors=False))
+    overhead_us = sum(latencies) / len(latencies) * 1e6
+
+    timer = StageTimer()
+    asyncio.run(run_load(chain, make_input, args.overhead_requests, 1, {"callbacks": [timer]}, count_errors=False))
+    stages = {
+        stage: {"calls": len(values), "mean_us": sum(values) / len(values) * 1e6}
+        for stage, values in timer.durations.items()
+    }
+
+    # Load: configured latency, throughput and failures
+    model = CountingFakeChatModel(
+        respond=respond,
+        latency=args.latency,
+        latency_distribution=args.latency_distribution,
+        latency_jitter=args.latency_jitter,
+        latency_per_output_token=1 / args.tokens_per_second if args.tokens_per_second else 0.0,
+        error_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    embeddings = NgramFakeEmbeddings(
+        latency=args.embedding_latency,
+        latency_distribution=args.latency_distribution,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    chain, make_input = build(model, embeddings)
+    elapsed, latencies, errors = asyncio.run(run_load(chain, make_input, args.requests, args.concurrency))
+    return {
+        "requests": args.requests,
+        "errors": errors,
+        "model_calls": model.calls,
+        "embedding_requests": embeddings.requests,
+        "throughput_rps": (args.requests - errors) / elapsed,
+        "latency_ms": summary_ms(latencies),
+        "overhead_us_per_call": overhead_us,
+        "stages": stages,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Offline benchmark suite for the chain patterns in this repo: framework overhead, "
+                    "time per stage and load behaviour of each pattern on fake models.")
+    parser.add_argument("--patterns", nargs="*", default=list(PATTERNS), choices=list(PATTERNS))
+    parser.add_argument("--requests", type=int, default=200, help="calls per pattern in the load run")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--overhead-requests", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.1, help="mean seconds before the first token")
+    parser.add_argument("--latency-distribution", default="lognormal",
+                        choices=["fixed", "uniform", "exponential", "lognormal"])
+    parser.add_argument("--latency-jitter", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=500.0, help="0 for instant replies")
+    parser.add_argument("--reply-words", type=int, default=50)
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.01,
+                        help="fraction of model and embedding calls that fail")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.patterns:
+        result = results[name] = benchmark(name, args)
+        # Percentiles are None when every request failed
+        latency = {key: "-" if value is None else f"{value:.1f}" for key, value in result["latency_ms"].items()}
+        print(f"{name:<26} {result['throughput_rps']:8.1f} req/s   p50 {latency['p50']:>7} ms   "
+              f"p95 {latency['p95']:>7} ms   p99 {latency['p99']:>7} ms   "
+              f"errors {result['errors']:>3}   overhead {result['overhead_us_per_call']:7.0f} us/call")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": vars(args),
+        "environment": {
+            "python": platform.python_version(),
+            "langchain_core": langchain_core.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
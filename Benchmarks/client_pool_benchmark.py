@@ -0,0 +1,111 @@
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+# Connections and latency at CONCURRENCY concurrent sessions against the local
+# mock server (mock_openai_server.py: 50 ms per request, plus 30 ms on the
+# first request of each new connection for the handshake a remote API costs).
+# Every session makes TURNS calls one after another:
+#
+#   per-session clients   each session builds its own ChatOpenAI /
+#                         OpenAIEmbeddings, as SimpleChatbot and the demos did
+#   registry              each session asks bootstrap.py for its model and
+#                         gets the shared one, backed by one ConnectionPool
+#
+# Each configuration runs in its own process, so no client or pool carries
+# over from the previous one. Connections are counted by the server.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 8765
+BASE_URL = f"http://127.0.0.1:{PORT}/v1"
+CONCURRENCY = 200
+TURNS = 5
+
+
+def server_stats(reset=False):
+    request = urllib.request.Request(f"{BASE_URL}/stats{'/reset' if reset else ''}",
+                                     method="POST" if reset else "GET")
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+async def session(make_client, call, latencies):
+    client = make_client()
+    for turn in range(TURNS):
+        start = time.perf_counter()
+        await call(client, turn)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(kind, configuration):
+    sys.path.insert(0, ROOT)
+    import bootstrap
+
+    settings = {"base_url": BASE_URL, "api_key": "sk-mock", "max_retries": 0}
+    if kind == "chat":
+        async def call(model, turn):
+            await model.ainvoke(f"Suggest a name starting with {chr(65 + turn)}")
+        if configuration == "registry":
+            def make_client():
+                return bootstrap.chat_model(model="gpt-4o-mini", **settings)
+        else:
+            from langchain_openai import ChatOpenAI
+
+            def make_client():
+                return ChatOpenAI(model="gpt-4o-mini", **settings)
+    else:
+        async def call(embeddings, turn):
+            await embeddings.aembed_query(f"Sentence number {turn}")
+        settings.update(check_embedding_ctx_length=False)
+        if configuration == "registry":
+            def make_client():
+                return bootstrap.embedding_model(model="text-embedding-3-small", **settings)
+        else:
+            from langchain_openai import OpenAIEmbeddings
+
+            def make_client():
+                return OpenAIEmbeddings(model="text-embedding-3-small", **settings)
+
+    # Imports and the first client build are not part of the measurement
+    make_client()
+    server_stats(reset=True)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(session(make_client, call, latencies) for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - start
+    server = server_stats()
+    latencies.sort()
+    line = (f"{kind:<6} {configuration:<22} {server['connections']:6d} connections   "
+            f"p50 {statistics.median(latencies) * 1e3:6.1f} ms   "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:6.1f} ms   "
+            f"{len(latencies) / elapsed:7.1f} calls/s")
+    if configuration == "registry":
+        pool = bootstrap.pool_stats()[f"http://127.0.0.1:{PORT}"]
+        line += (f"   pool: {pool['connections_opened']} opened, peak utilization "
+                 f"{pool['peak_utilization']:.0%}, reuse {pool['reuse_ratio']:.0%}")
+    print(line, flush=True)
+
+
+if len(sys.argv) > 1:
+    asyncio.run(run(sys.argv[1], sys.argv[2]))
+else:
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "Benchmarks", "mock_openai_server.py"),
+                               "--port", str(PORT)], stdout=subprocess.PIPE, text=True)
+    try:
+        # Without this line the server did not start (most likely the port is
+        # taken), and whatever holds the port would be measured instead
+        line = server.stdout.readline()
+        if not line.startswith(f"mock OpenAI server listening on {BASE_URL}"):
+            sys.exit(f"mock server did not start on port {PORT}: {line.strip() or f'exit code {server.wait()}'}")
+        print(f"{CONCURRENCY} concurrent sessions x {TURNS} calls")
+        for kind in ("chat", "embed"):
+            for configuration in ("per-session clients", "registry"):
+                subprocess.run([sys.executable, __file__, kind, configuration], check=True,
+                               env=dict(os.environ, OPENAI_API_KEY="sk-mock"))
+    finally:
+        server.terminate()
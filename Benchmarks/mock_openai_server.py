@@ -0,0 +1,155 @@
+import argparse
+import asyncio
+import json
+import time
+import zlib
+
+# Minimal OpenAI-compatible HTTP server for benchmarks, no API key needed.
+#
+#   python Benchmarks/mock_openai_server.py --port 8765 --latency 0.05 --handshake-latency 0.03
+#
+# and point a client at base_url="http://127.0.0.1:8765/v1". It answers
+# POST /v1/chat/completions, /v1/completions and /v1/embeddings with canned
+# replies after `latency` seconds, speaking HTTP/1.1 with keep-alive. There
+# is no TLS: the first request on each new connection waits an extra
+# `handshake_latency`, standing in for the TCP + TLS round trips a client pays
+# per connection to a remote API. GET /stats returns the connection and
+# request counts; POST /stats/reset zeroes them.
+
+
+class MockServer:
+    def __init__(self, latency=0.05, handshake_latency=0.03, dimensions=8):
+        self.latency = latency
+        self.handshake_latency = handshake_latency
+        self.dimensions = dimensions
+        self.reset()
+
+    def reset(self):
+        self.connections = 0
+        self.open_connections = 0
+        self.peak_open_connections = 0
+        self.requests = 0
+
+    def stats(self):
+        return {
+            "connections": self.connections,
+            "open_connections": self.open_connections,
+            "peak_open_connections": self.peak_open_connections,
+            "requests": self.requests,
+        }
+
+    def _chat(self, body):
+        prompt = json.dumps(body.get("messages", []))
+        return {
+            "id": f"chatcmpl-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": f"Mock reply to {len(prompt)} characters."}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 6, "total_tokens": len(prompt) // 4 + 6},
+        }
+
+    def _completion(self, body):
+        return {
+            "id": f"cmpl-{self.requests}",
+            "object": "text_completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "text": "Mock completion.", "finish_reason": "stop", "logprobs": None}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 3, "total_tokens": 4},
+        }
+
+    def _embeddings(self, body):
+        inputs = body.get("input", [])
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        dimensions = body.get("dimensions") or self.dimensions
+        data = []
+        for i, text in enumerate(inputs):
+            seed = zlib.crc32(json.dumps(text).encode("utf-8"))
+            data.append({"object": "embedding", "index": i,
+                         "embedding": [((seed >> (j % 24)) % 97) / 97 - 0.5 for j in range(dimensions)]})
+        return {"object": "list", "data": data, "model": body.get("model", "mock"),
+                "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)}}
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        self.open_connections += 1
+        self.peak_open_connections = max(self.peak_open_connections, self.open_connections)
+        first = True
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                raw = await reader.readexactly(int(headers.get("content-length", 0)))
+                body = json.loads(raw) if raw else {}
+
+                status, payload = 200, None
+                if path.endswith("/stats") and method == "GET":
+                    payload = self.stats()
+                elif path.endswith("/stats/reset"):
+                    self.reset()
+                    payload = {}
+                else:
+                    self.requests += 1
+                    await asyncio.sleep(self.latency + (self.handshake_latency if first else 0.0))
+                    if path.endswith("/chat/completions"):
+                        payload = self._chat(body)
+                    elif path.endswith("/completions"):
+                        payload = self._completion(body)
+                    elif path.endswith("/embeddings"):
+                        payload = self._embeddings(body)
+                    else:
+                        status, payload = 404, {"error": {"message": f"unknown path {path}"}}
+                first = False
+
+                data = json.dumps(payload).encode("utf-8")
+                close = headers.get("connection", "").lower() == "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Not Found'}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.open_connections -= 1
+            writer.close()
+
+
+async def serve(host, port, **kwargs):
+    server = MockServer(**kwargs)
+    listener = await asyncio.start_server(server.handle, host, port, backlog=1024)
+    print(f"mock OpenAI server listening on http://{host}:{listener.sockets[0].getsockname()[1]}/v1", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minimal OpenAI-compatible server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per request")
+    parser.add_argument("--handshake-latency", type=float, default=0.03,
+                        help="extra seconds for the first request on a new connection")
+    parser.add_argument("--dimensions", type=int, default=8, help="default embedding size")
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, latency=args.latency,
+                      handshake_latency=args.handshake_latency, dimensions=args.dimensions))
+
+
+if __name__ == "__main__":
+    main()
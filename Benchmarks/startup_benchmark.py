@@ -0,0 +1,100 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Cold start of the scripts: each case runs in a fresh interpreter with
+# `python -X importtime`, and does what a script does before its first model
+# call - imports, reading .env, building the model and the chain.
+#
+#   eager      the preamble the scripts used to have (simple_chain.py's, plus
+#              the embeddings client of conditional_chains.py)
+#   bootstrap  the same with bootstrap.py's deferred clients
+#
+# For each case it reports the median wall time of the whole process, the
+# import time summed from -X importtime, and what the deferred modules cost.
+# A script that goes on to call the model pays for langchain_openai on that
+# first call instead; processes that never call it don't pay at all.
+#
+#   python Benchmarks/startup_benchmark.py --runs 5
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED = ("langchain_openai", "openai", "dotenv")
+
+CHAIN = """
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+prompt = ChatPromptTemplate.from_messages([("user", "Write a poem about {topic}.")])
+chain = prompt | model | StrOutputParser()
+"""
+
+CASES = {
+    "eager": """
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from dotenv import load_dotenv
+load_dotenv()
+model = ChatOpenAI(model="gpt-4o-mini")
+embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+""" + CHAIN,
+    "bootstrap": f"""
+import sys
+sys.path.insert(0, {ROOT!r})
+from bootstrap import chat_model, embedding_model
+model = chat_model(model="gpt-4o-mini")
+embeddings = embedding_model(model="text-embedding-3-small")
+""" + CHAIN,
+}
+
+
+def parse_importtime(stderr):
+    """(total seconds of top-level imports, {module: cumulative seconds})"""
+    total = 0
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules[name.strip()] = int(cumulative) / 1e6
+        if not name.startswith("  "):  # nested imports are indented
+            total += int(cumulative)
+    return total / 1e6, modules
+
+
+def run_case(code, runs):
+    # A dummy key, so the eager clients can be built without a real one
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "sk-startup-benchmark"))
+    walls, imports, deferred = [], [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=env,
+                                capture_output=True, text=True, cwd=ROOT)
+        walls.append(time.perf_counter() - start)
+        if result.returncode:
+            raise RuntimeError(result.stderr.splitlines()[-1])
+        total, modules = parse_importtime(result.stderr)
+        imports.append(total)
+        deferred.append(modules)
+    costs = {module: statistics.median(m.get(module, 0.0) for m in deferred) for module in DEFERRED}
+    return statistics.median(walls), statistics.median(imports), costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    for name, code in CASES.items():
+        results[name] = run_case(code, args.runs)
+        wall, imports, costs = results[name]
+        print(f"{name:<10} {wall * 1e3:8.0f} ms wall   {imports * 1e3:8.0f} ms imports   "
+              + ", ".join(f"{module} {seconds * 1e3:.0f} ms" if seconds else f"{module} not imported"
+                          for module, seconds in costs.items()))
+    eager, lazy = results["eager"][0], results["bootstrap"][0]
+    print(f"cold start cut: {(eager - lazy) * 1e3:.0f} ms ({(1 - lazy / eager) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import asyncio
+import os
+import random
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for token_count.py
+
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import RunnableLambda
+
+from token_count import approximate_tokens, message_tokens
+
+# Running a RunnableParallel fan-out over many inputs at once. Every model call
+# in the chain goes through one ModelGate, so a single concurrency limit and
+# the requests-per-minute / tokens-per-minute budgets are shared by all
+# branches and all inputs. stream_batch feeds the inputs through the chain
+# and yields each result as soon as that input finishes.
+#
+#   gate = ModelGate(max_concurrency=32, requests_per_minute=500, tokens_per_minute=200_000)
+#   gated_model = gate.wrap(model)
+#   parallel_chain = RunnableParallel({"summary": summary_prompt | gated_model | parser, ...})
+#   async for index, result in stream_batch(parallel_chain, inputs):
+#       ...
+
+
+def estimate_tokens(model_input):
+    # Rough prompt size used to reserve TPM budget before the call; the real
+    # usage is settled afterwards when reported
+    if isinstance(model_input, PromptValue):
+        model_input = model_input.to_messages()
+    if isinstance(model_input, str):
+        return approximate_tokens(model_input)
+    return sum(message_tokens(message) if hasattr(message, "content") else approximate_tokens(str(message))
+               for message in model_input)
+
+
+def is_rate_limited(error):
+    return getattr(error, "status_code", None) == 429
+
+
+class TokenBucket:
+    """Refills at rate_per_minute and holds at most capacity (default: one minute) of budget.
+
+    acquire() waits until the amount is available; charge() takes budget
+    without waiting and may leave the bucket in debt.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.capacity = capacity or rate_per_minute
+        self.rate = rate_per_minute / 60
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        # The lock keeps waiters in arrival order
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+    def charge(self, amount):
+        self._refill()
+        self.tokens -= amount
+
+
+class ModelGate:
+    """Shared limits for every model call wrapped with gate.wrap(model).
+
+    max_concurrency:   model calls in flight at once across all branches and inputs
+    requests_per_minute, tokens_per_minute: token-bucket budgets (None = unlimited)
+    max_retries:       retries of a call rejected with HTTP 429, with
+                       exponential backoff starting at backoff seconds
+    """
+
+    def __init__(self, max_concurrency=16, requests_per_minute=None, tokens_per_minute=None,
+                 max_retries=5, backoff=1.0):
+        self.max_concurrency = max_concurrency
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.calls = 0
+        self.retries = 0
+        self._semaphore = None
+
+    async def call(self, model, model_input, config=None):
+        if self._semaphore is None:
+            # Created lazily so it binds to the running event loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        reserved = estimate_tokens(model_input)
+        for attempt in range(self.max_retries + 1):
+            if self.requests:
+                await self.requests.acquire()
+            if self.tokens:
+                await self.tokens.acquire(reserved)
+            try:
+                async with self._semaphore:
+                    self.calls += 1
+                    response = await model.ainvoke(model_input, config)
+            except Exception as error:
+                if not is_rate_limited(error) or attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                # Back off outside the semaphore so other calls keep the slot busy
+                await asyncio.sleep(self.backoff * 2 ** attempt * (0.5 + random.random()))
+                continue
+            usage = getattr(response, "usage_metadata", None) or {}
+            if self.tokens and "total_tokens" in usage:
+                self.tokens.charge(usage["total_tokens"] - reserved)
+            return response
+
+    def wrap(self, model):
+        """Runnable that sends each call to model through this gate (async only)"""
+        async def gated_call(model_input, config):
+            return await self.call(model, model_input, config)
+
+        return RunnableLambda(gated_call, name=f"Gated{model.get_name()}")
+
+
+async def stream_batch(runnable, inputs, max_pending=256, return_exceptions=False):
+    """Run runnable over inputs, yielding (index, output) as each input finishes.
+
+    At most max_pending inputs are started ahead of the results being read,
+    so an input list of any length is consumed lazily. With return_exceptions
+    a failed input yields (index, exception) instead of stopping the batch.
+    """
+    inputs = iter(enumerate(inputs))
+    pending = {}
+
+    def start_next():
+        for index, value in inputs:
+            pending[asyncio.ensure_future(runnable.ainvoke(value))] = index
+            return True
+        return False
+
+    try:
+        while len(pending) < max_pending and start_next():
+            pass
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = pending.pop(task)
+                error = task.exception()
+                if error is not None and not return_exceptions:
+                    raise error
+                yield index, error if error is not None else task.result()
+                start_next()
+    finally:
+        for task in pending:
+            task.cancel()
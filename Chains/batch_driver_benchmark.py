@@ -0,0 +1,72 @@
+import asyncio
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for fake_models.py
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableParallel
+
+from batch_driver import ModelGate, TokenBucket, stream_batch
+from fake_models import CountingFakeChatModel
+
+# Drives the summary/pros/cons fan-out from parallel_chain.py over many topics
+# against a fake model with fixed latency and injected 429 errors, and checks
+# that the shared concurrency limit and the request budget hold.
+
+N_TOPICS = 1_000
+MAX_CONCURRENCY = 64
+
+model = CountingFakeChatModel(latency=0.02, error_rate=0.05)
+parser = StrOutputParser()
+
+def build_chain(gate):
+    gated_model = gate.wrap(model)
+    return RunnableParallel({
+        "summary": ChatPromptTemplate.from_messages([
+            ("user", "Provide a brief summary of: {topic}")
+        ]) | gated_model | parser,
+        "pros": ChatPromptTemplate.from_messages([
+            ("user", "List 3 pros of: {topic}")
+        ]) | gated_model | parser,
+        "cons": ChatPromptTemplate.from_messages([
+            ("user", "List 3 cons of: {topic}")
+        ]) | gated_model | parser
+    })
+
+async def run(name, gate, topics):
+    model.reset()
+    chain = build_chain(gate)
+    start = time.perf_counter()
+    first = None
+    finished = []
+    async for index, result in stream_batch(chain, [{"topic": topic} for topic in topics]):
+        if first is None:
+            first = time.perf_counter() - start
+        assert result["pros"] == f"List 3 pros of: {topics[index]}"
+        finished.append(index)
+    elapsed = time.perf_counter() - start
+
+    assert sorted(finished) == list(range(len(topics)))
+    assert model.max_in_flight <= gate.max_concurrency
+    print(f"{name}: {len(topics)} topics in {elapsed:.2f} s ({len(topics) / elapsed:.0f} topics/s), "
+          f"first result after {first * 1000:.0f} ms")
+    print(f"  model calls: {model.calls}, 429s retried: {gate.retries}, "
+          f"peak concurrency: {model.max_in_flight} (limit {gate.max_concurrency})")
+    return elapsed
+
+async def main():
+    print("=" * 70)
+    print("Batch fan-out, 3 branches, 20 ms per call, 5% of calls fail with 429")
+    print("=" * 70)
+    topics = [f"topic {i}" for i in range(N_TOPICS)]
+    await run("Concurrency limit only", ModelGate(max_concurrency=MAX_CONCURRENCY, backoff=0.01), topics)
+
+    # 100 requests/second sustained with a burst of 10: 900 calls need ~9 s
+    gate = ModelGate(max_concurrency=MAX_CONCURRENCY, requests_per_minute=6_000, backoff=0.01)
+    gate.requests = TokenBucket(6_000, capacity=10)
+    elapsed = await run("With 6,000 requests/minute", gate, topics[:300])
+    assert elapsed >= (model.calls - 10) / 100 * 0.95
+
+asyncio.run(main())
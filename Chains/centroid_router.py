@@ -0,0 +1,77 @@
+import numpy as np
+
+from routing import FallbackRouter
+
+# Topic routing without an LLM call per input. Each label's labelled examples
+# are embedded once and averaged into a centroid; a query is embedded and goes
+# to the centroid with the highest cosine similarity. When the best and
+# second-best centroids are within min_margin of each other the query is
+# ambiguous, and only then is the LLM classifier asked.
+#
+#   router = CentroidRouter(embeddings, {"science": [...], "history": [...]},
+#                           fallback=route_by_category, min_margin=0.05)
+#   router.route("photosynthesis")           # -> "science"
+#   router.route_batch(topics)               # one embedding request, one matrix multiply
+#   route_once(router.as_classifier(), branches, default)
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class CentroidRouter(FallbackRouter):
+    """Route texts to the label whose example centroid is nearest.
+
+    embeddings: LangChain Embeddings
+    examples:   dict mapping label -> list of example texts for that label
+    fallback:   runnable or function taking {field: text} and returning a
+                label, asked when the margin is too small; None always takes
+                the nearest centroid
+    min_margin: cosine gap between the two nearest centroids below which the
+                fallback decides
+    field:      input dict key holding the text, for as_classifier()
+    """
+
+    def __init__(self, embeddings, examples, fallback=None, min_margin=0.05, field="topic"):
+        super().__init__(fallback, field)
+        self.embeddings = embeddings
+        self.labels = list(examples)
+        self.min_margin = min_margin
+
+        # All examples in one embedding request
+        texts = [text for label in self.labels for text in examples[label]]
+        vectors = _normalize_rows(np.asarray(embeddings.embed_documents(texts), dtype=np.float32))
+        centroids = []
+        start = 0
+        for label in self.labels:
+            count = len(examples[label])
+            if not count:
+                raise ValueError(f"No examples for label {label!r}")
+            centroids.append(vectors[start:start + count].mean(axis=0))
+            start += count
+        # (labels, dimensions); rows normalized so a product is a cosine
+        self.centroids = _normalize_rows(np.stack(centroids))
+
+    def scores(self, vectors):
+        """Cosine similarity of each vector (row) to each centroid: (texts, labels)"""
+        return _normalize_rows(np.asarray(vectors, dtype=np.float32)) @ self.centroids.T
+
+    def _labels(self, vectors):
+        # Returns (labels, indices of texts whose margin is too small)
+        scores = self.scores(vectors)
+        if len(self.labels) > 1:
+            top2 = np.partition(scores, -2, axis=1)[:, -2:]
+            margins = top2[:, 1] - top2[:, 0]
+        else:
+            margins = np.full(len(scores), np.inf, dtype=np.float32)
+        labels = [self.labels[i] for i in scores.argmax(axis=1)]
+        return labels, np.flatnonzero(margins < self.min_margin).tolist()
+
+    def _classify_batch(self, texts):
+        # One embedding request and one matrix multiply for the whole batch
+        return self._labels(self.embeddings.embed_documents(texts))
+
+    async def _aclassify_batch(self, texts):
+        return self._labels(await self.embeddings.aembed_documents(texts))
@@ -0,0 +1,156 @@
+import asyncio
+import os
+import random
+import sys
+import time
+import zlib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for fake_models.py
+
+import numpy as np
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+from centroid_router import CentroidRouter
+from fake_models import CountingFakeChatModel, NgramFakeEmbeddings
+
+# The topic classifier of conditional_chains.py (Example 3) as an LLM call per
+# topic versus CentroidRouter, on a labelled synthetic set. Topics are built
+# from per-category vocabularies; AMBIGUOUS of them also mention a term of
+# another category. The fake LLM classifier always answers correctly and takes
+# LLM_LATENCY, an embedding request EMBED_LATENCY. Reported per min_margin:
+# accuracy, how often the LLM was asked, and latency per query routed one at
+# a time and in one batch.
+#
+# Character trigrams alone carry no meaning, so a term never seen in the
+# examples would land anywhere. TopicEmbeddings stands in for a real model
+# that places related terms near each other: each vocabulary term gets a
+# vector near its category's direction (TERM_NOISE away from it), added to the
+# trigram vector of the whole text. Accuracy with a real embedding model
+# depends on that model; the fallback rate is what min_margin trades for it.
+
+LLM_LATENCY = 0.3
+EMBED_LATENCY = 0.03
+TERM_NOISE = 1.0
+EXAMPLES_PER_LABEL = 20
+TEST_TOPICS = 400
+AMBIGUOUS = 0.15
+
+VOCABULARY = {
+    "science": ["photosynthesis", "chlorophyll", "molecules", "atoms", "quantum physics", "photons", "DNA",
+                "genes", "living cells", "evolution", "gravity", "planets", "black holes", "chemical reactions",
+                "enzymes", "electrons", "ecosystems", "volcanoes", "neurons", "plate tectonics"],
+    "history": ["the Roman empire", "the French revolution", "medieval castles", "the Ming dynasty",
+                "ancient Egypt", "the pharaohs", "the Renaissance", "World War II", "the Treaty of Versailles",
+                "the British monarchy", "colonial trade", "the American civil war", "the crusades",
+                "feudal lords", "the Cold War", "Indian independence", "the Roman senate", "Napoleon",
+                "the Vikings", "the industrial revolution"],
+    "technology": ["software", "databases", "compilers", "sorting algorithms", "cloud computing", "smartphones",
+                   "the internet", "encryption", "computer networks", "operating systems", "web APIs",
+                   "machine learning", "robots", "semiconductors", "programming languages", "web browsers",
+                   "servers", "cybersecurity", "blockchain", "microchips"],
+    "general": ["cooking pasta", "gardening", "travel tips", "fitness", "chess", "music lessons", "fashion",
+                "pet care", "friendship", "sleep", "coffee", "hobbies", "painting", "yoga", "shopping",
+                "holidays", "football", "movies", "parenting", "budgeting"],
+}
+TEMPLATES = ["{a}", "the basics of {a}", "how {a} works", "why {a} matters", "a short guide to {a}",
+             "{a} explained", "common myths about {a}", "the future of {a}"]
+MIXED_TEMPLATES = ["how {a} relates to {b}", "{a} and {b}", "what {b} teaches us about {a}"]
+
+
+class TopicEmbeddings(NgramFakeEmbeddings):
+    """Trigram fake embeddings plus a category-aligned vector per vocabulary term"""
+
+    def __init__(self, vocabulary, term_noise, **kwargs):
+        super().__init__(**kwargs)
+        self.terms = {}
+        for index, (label, terms) in enumerate(vocabulary.items()):
+            for term in terms:
+                term_rng = np.random.default_rng(zlib.crc32(term.encode("utf-8")))
+                # Unit category direction plus noise of norm ~term_noise
+                vector = term_rng.normal(0.0, term_noise / np.sqrt(self.dimensions), self.dimensions)
+                vector[index] += 1.0
+                self.terms[term] = vector / np.linalg.norm(vector)
+
+    def _vector(self, text):
+        vector = np.asarray(super()._vector(text)) * 0.5
+        for term, term_vector in self.terms.items():
+            if term in text:
+                vector = vector + term_vector
+        return (vector / np.linalg.norm(vector)).tolist()
+
+
+rng = random.Random(0)
+labels = list(VOCABULARY)
+examples = {label: [rng.choice(TEMPLATES).format(a=rng.choice(VOCABULARY[label]))
+                    for _ in range(EXAMPLES_PER_LABEL)] for label in labels}
+truth = {}
+test_topics = []
+for _ in range(TEST_TOPICS):
+    label = rng.choice(labels)
+    if rng.random() < AMBIGUOUS:
+        other = rng.choice([other for other in labels if other != label])
+        topic = rng.choice(MIXED_TEMPLATES).format(a=rng.choice(VOCABULARY[label]), b=rng.choice(VOCABULARY[other]))
+    else:
+        topic = rng.choice(TEMPLATES).format(a=rng.choice(VOCABULARY[label]))
+    truth[topic] = label
+    test_topics.append(topic)
+
+
+def oracle(prompt):
+    return truth[prompt.split("Topic: ")[1].split("\n")[0]]
+
+
+classifier_model = CountingFakeChatModel(respond=oracle, latency=LLM_LATENCY)
+category_chain = ChatPromptTemplate.from_messages([
+    ("user", "Categorize this topic into ONE of these categories: 'science', 'history', 'technology', "
+             "or 'general'.\nTopic: {topic}\nRespond with ONLY the category name.")
+]) | classifier_model | StrOutputParser()
+
+
+def route_by_category(input_dict):
+    return category_chain.invoke({"topic": input_dict["topic"]}).strip().lower()
+
+
+def accuracy(predicted):
+    return sum(label == truth[topic] for topic, label in zip(test_topics, predicted)) / len(test_topics)
+
+
+def report(name, predicted, single, batch, fallback_rate):
+    print(f"{name:<26} accuracy {accuracy(predicted):6.1%}   LLM fallback {fallback_rate:6.1%}   "
+          f"one at a time {single * 1e3:7.1f} ms/query   batched {batch * 1e3:6.2f} ms/query")
+
+
+print(f"{TEST_TOPICS} topics ({AMBIGUOUS:.0%} mixing two categories), LLM classifier {LLM_LATENCY * 1e3:.0f} ms, "
+      f"embedding request {EMBED_LATENCY * 1e3:.0f} ms")
+
+# LLM classifier per topic: timed on a sample, it is a fixed latency
+sample = test_topics[:20]
+start = time.perf_counter()
+for topic in sample:
+    route_by_category({"topic": topic})
+single = (time.perf_counter() - start) / len(sample)
+# category_chain.batch with up to 8 calls in flight
+start = time.perf_counter()
+llm_labels = [label.strip().lower() for label in
+              category_chain.batch([{"topic": topic} for topic in test_topics], {"max_concurrency": 8})]
+report("LLM classifier", llm_labels, single, (time.perf_counter() - start) / TEST_TOPICS, 1.0)
+
+embeddings = TopicEmbeddings(VOCABULARY, TERM_NOISE, dimensions=256, latency=EMBED_LATENCY)
+for min_margin in (None, 0.02, 0.05, 0.1):
+    router = CentroidRouter(embeddings, examples, fallback=None if min_margin is None else route_by_category,
+                            min_margin=min_margin or 0.0)
+    start = time.perf_counter()
+    for topic in test_topics[:100]:
+        router.route(topic)
+    single = (time.perf_counter() - start) / 100
+    router.routed = router.fallbacks = 0
+    start = time.perf_counter()
+    predicted = router.route_batch(test_topics)
+    batch = (time.perf_counter() - start) / TEST_TOPICS
+    name = "centroids only" if min_margin is None else f"centroids, margin {min_margin}"
+    report(name, predicted, single, batch, router.stats()["fallback_rate"])
+
+# The async path routes the same way
+router = CentroidRouter(embeddings, examples, fallback=route_by_category, min_margin=0.05)
+assert asyncio.run(router.aroute_batch(test_topics)) == router.route_batch(test_topics)
@@ -1,23 +1,26 @@
-from typing import TypedDict
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for bootstrap.py and streaming_parser.py
+from bootstrap import chat_model
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
+from pydantic import BaseModel
+from streaming_parser import StreamingStructuredOutputParser
 
-load_dotenv()
-
-class Mood():
+class Mood(BaseModel):
     feeling: str
     reason: str
 
 prompt = ChatPromptTemplate.from_messages([
-    ("user", "What is your mood today?")
-])
+    ("user", "What is your mood today?\n{format_instructions}")
+]).partial(format_instructions=PydanticOutputParser(pydantic_object=Mood).get_format_instructions())
 
-model = ChatOpenAI(model="gpt-4o-mini")
+model = chat_model(model="gpt-4o-mini")
 
-parser = PydanticOutputParser(pydantic_object=Mood)
+# Emits {"feeling": ...} as soon as that field is complete, then the validated Mood
+parser = StreamingStructuredOutputParser(schema_type=Mood)
 
 chain = prompt | model | parser
 
-print(chain.invoke({"input": "I am feeling happy today."}))
\ No newline at end of file
+for partial in chain.stream({"input": "I am feeling happy today."}):
+    print(partial)
@@ -1,12 +1,18 @@
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for bootstrap.py
+from bootstrap import chat_model, embedding_model
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnableBranch, RunnableLambda
-
-load_dotenv()
-
-model = ChatOpenAI(model="gpt-4o-mini")
+from langchain_core.runnables import RunnableBranch
+from routing import route_once
+from keyword_router import KeywordRouter
+from semantic_cache import SemanticCache
+from centroid_router import CentroidRouter
+from language_id import LanguageIdentifier
+from single_flight import SingleFlight
+
+model = chat_model(model="gpt-4o-mini")
 parser = StrOutputParser()
 
 # ============================================================================
@@ -25,27 +31,23 @@ simple_prompt = ChatPromptTemplate.from_messages([
     ("user", "Explain {query} in simple, easy-to-understand terms")
 ])
 
-# Function to determine which chain to use
-def route_by_complexity(input_dict):
-    query = input_dict.get("query", "").lower()
-    # Simple heuristic: if query contains technical terms, use technical chain
-    technical_terms = ["algorithm", "api", "database", "protocol", "architecture", "framework"]
-    if any(term in query for term in technical_terms):
-        return "technical"
-    return "simple"
+# Router that determines which chain to use
+# Simple heuristic: if query contains technical terms, use technical chain.
+# The terms are compiled once into a keyword automaton and match whole words.
+technical_terms = ["algorithm", "api", "database", "protocol", "architecture", "framework"]
+complexity_router = KeywordRouter({"technical": technical_terms}, default="simple")
 
-# Create chains
-technical_chain = technical_prompt | model | parser
-simple_chain = simple_prompt | model | parser
+# Create chains - answers go through a semantic cache, so near-duplicate
+# questions ("What is an API?" / "what's an api") reuse the first answer
+semantic_cache = SemanticCache(embedding_model(model="text-embedding-3-small"), threshold=0.92)
+technical_chain = semantic_cache.wrap(technical_prompt, model) | parser
+simple_chain = semantic_cache.wrap(simple_prompt, model) | parser
 
 # Create conditional chain using RunnableLambda for routing
-def route_chain(input_dict):
-    if route_by_complexity(input_dict) == "technical":
-        return technical_chain.invoke(input_dict)
-    else:
-        return simple_chain.invoke(input_dict)
-
-conditional_chain = RunnableLambda(route_chain)
+conditional_chain = complexity_router.as_runnable({
+    "technical": technical_chain,
+    "simple": simple_chain
+})
 
 # Test with different inputs
 result1 = conditional_chain.invoke({"query": "What is an API?"})
@@ -58,6 +60,12 @@ print(f"Query: 'What is a cat?'")
 print(f"Route: Simple")
 print(f"Response: {result2}\n")
 
+result3 = conditional_chain.invoke({"query": "what's an api"})
+print(f"Query: 'what's an api'")
+print(f"Route: Technical (near-duplicate of 'What is an API?')")
+print(f"Response: {result3}")
+print(f"Semantic cache: {semantic_cache.stats()}\n")
+
 
 # ============================================================================
 # Example 2: Conditional Chain Based on Sentiment Analysis
@@ -84,7 +92,9 @@ sentiment_prompt = ChatPromptTemplate.from_messages([
     ("user", "Analyze the sentiment of this text and respond with ONLY one word: 'positive', 'negative', or 'neutral'. Text: {text}")
 ])
 
-sentiment_chain = sentiment_prompt | model | parser
+# Many users asking about the same trending text at once share one call
+single_flight = SingleFlight()
+sentiment_chain = sentiment_prompt | single_flight.wrap(model) | parser
 
 # Function to route based on sentiment
 def route_by_sentiment(input_dict):
@@ -103,11 +113,12 @@ positive_chain = positive_prompt | model | parser
 negative_chain = negative_prompt | model | parser
 neutral_chain = neutral_prompt | model | parser
 
-# Conditional routing
-conditional_chain = RunnableBranch(
-    (lambda x: route_by_sentiment(x) == "positive", positive_chain),
-    (lambda x: route_by_sentiment(x) == "negative", negative_chain),
-    (lambda x: True, neutral_chain)  # Default to neutral
+# Conditional routing - the sentiment classifier runs once per input and its
+# label picks the response chain (default to neutral)
+conditional_chain = route_once(
+    route_by_sentiment,
+    {"positive": positive_chain, "negative": negative_chain},
+    neutral_chain
 )
 
 result1 = conditional_chain.invoke({"text": "I love this product! It's amazing!"})
@@ -118,6 +129,10 @@ result2 = conditional_chain.invoke({"text": "This is terrible, I'm very disappoi
 print(f"Input: 'This is terrible, I'm very disappointed.'")
 print(f"Response: {result2}\n")
 
+# Four concurrent requests about the same text: one sentiment call between them
+conditional_chain.batch([{"text": "The new phone is amazing!"}] * 4)
+print(f"Single flight: {single_flight.stats()}\n")
+
 # ============================================================================
 # Example 3: Multi-Conditional Chain - Route by Topic Category
 # ============================================================================
@@ -171,12 +186,25 @@ history_chain = history_prompt | model | parser
 technology_chain = technology_prompt | model | parser
 general_chain = general_prompt | model | parser
 
-# Multi-conditional routing
-conditional_chain = RunnableBranch(
-    (lambda x: route_by_category(x) == "science", science_chain),
-    (lambda x: route_by_category(x) == "history", history_chain),
-    (lambda x: route_by_category(x) == "technology", technology_chain),
-    (lambda x: True, general_chain)  # Default fallback
+# Categories are picked by the nearest centroid of a few embedded examples;
+# the LLM classifier above is only asked when two categories are about as close
+category_router = CentroidRouter(
+    embedding_model(model="text-embedding-3-small"),
+    {
+        "science": ["photosynthesis", "black holes", "DNA and genes", "chemical reactions", "plate tectonics"],
+        "history": ["World War II", "the Roman empire", "the French revolution", "ancient Egypt", "the Cold War"],
+        "technology": ["databases", "cloud computing", "machine learning", "compilers", "smartphones"],
+        "general": ["cooking", "gardening", "travel", "fitness", "movies"],
+    },
+    fallback=route_by_category,
+    min_margin=0.05
+)
+
+# Multi-conditional routing - one category decision, then a dict lookup
+conditional_chain = route_once(
+    category_router.as_classifier(),
+    {"science": science_chain, "history": history_chain, "technology": technology_chain},
+    general_chain  # Default fallback
 )
 
 result1 = conditional_chain.invoke({"topic": "photosynthesis"})
@@ -188,6 +216,7 @@ result2 = conditional_chain.invoke({"topic": "World War II"})
 print(f"Topic: 'World War II'")
 print(f"Category: History")
 print(f"Response: {result2}\n")
+print(f"Category router: {category_router.stats()}\n")
 
 # ============================================================================
 # Example 4: Conditional Chain with Direct Condition Check
@@ -215,7 +244,7 @@ user_chain = user_prompt | model | parser
 
 conditional_chain = RunnableBranch(
     (lambda x: route_by_role(x), admin_chain),
-    (lambda x: True, user_chain)
+    user_chain  # default; RunnableBranch takes it without a condition
 )
 
 result1 = conditional_chain.invoke({"role": "admin", "query": "database optimization"})
@@ -253,14 +282,25 @@ lang_detect_chain = lang_detect_prompt | model | parser
 def route_by_language(input_dict):
     text = input_dict.get("text", "")
     detected_lang = lang_detect_chain.invoke({"text": text}).strip().lower()
-    return "spanish" in detected_lang
+    return "spanish" if "spanish" in detected_lang else "english"
+
+# Character n-gram profiles tell the languages apart locally; the detection
+# chain above is only asked for texts too short to be sure about
+language_identifier = LanguageIdentifier(
+    ["english", "spanish"],
+    fallback=route_by_language,
+    min_confidence=0.9
+)
 
 english_chain = english_prompt | model | parser
 spanish_chain = spanish_prompt | model | parser
 
-conditional_chain = RunnableBranch(
-    (lambda x: route_by_language(x), spanish_chain),
-    (lambda x: True, english_chain)
+# The language is known in microseconds, so there is nothing to gain from
+# starting an answer before it: route once, then run only the chosen chain
+conditional_chain = route_once(
+    language_identifier.as_classifier(),
+    {"spanish": spanish_chain},
+    english_chain
 )
 
 result1 = conditional_chain.invoke({"text": "Hello, how are you?"})
@@ -270,3 +310,4 @@ print(f"Response: {result1}\n")
 result2 = conditional_chain.invoke({"text": "Hola, ¿cómo estás?"})
 print(f"Input: 'Hola, ¿cómo estás?'")
 print(f"Response: {result2}\n")
+print(f"Language identifier: {language_identifier.stats()}\n")
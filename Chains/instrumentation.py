@@ -0,0 +1,273 @@
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for token_count.py
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from token_count import approximate_tokens, message_tokens
+
+# Per-node timing and token counts for a chain.
+#
+#   metrics = ChainMetrics()
+#   chain.invoke(inputs, config={"callbacks": [metrics]})
+#   print(metrics.draw_ascii(chain.get_graph()))   # graph with p50/p99 per node
+#   print(metrics.to_prometheus())                 # text exposition format
+#   json.dump(metrics.to_json(), f)
+#
+# For every runnable run the handler records, keyed by the runnable's name:
+#
+#   duration  wall time from start to end of the run
+#   wait      time between the node becoming ready and starting: since the
+#             previous step of its sequence ended, or since its parent started
+#   tokens    input/output tokens of chat model runs (the provider's usage
+#             when reported, otherwise ~4 characters per token)
+#
+# Durations go into fixed log-scale histograms, so recording is a clock read,
+# a bisect and a few dict operations. Nodes with the same name (the model in
+# both halves of sequential_chain.py, say) share one set of numbers.
+
+# Bucket upper bounds in seconds: 1 us to ~67 s, doubling
+BUCKETS = tuple(1e-6 * 2 ** i for i in range(27))
+
+
+class Histogram:
+    """Counts of observations per bucket of BUCKETS, plus sum and count"""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Approximate q-quantile, interpolated inside its bucket"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1] * 2
+                lower = BUCKETS[i - 1] if i else 0.0
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return BUCKETS[-1]
+
+    def to_json(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.50),
+            "p99": self.quantile(0.99),
+        }
+
+
+class NodeStats:
+    __slots__ = ("duration", "wait", "errors", "input_tokens", "output_tokens")
+
+    def __init__(self):
+        self.duration = Histogram()
+        self.wait = Histogram()
+        self.errors = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+
+def _step(tags):
+    # RunnableSequence tags its steps "seq:step:N"
+    for tag in tags or ():
+        if tag.startswith("seq:step:"):
+            return int(tag[9:])
+    return None
+
+
+def _format_seconds(value):
+    if value is None:
+        return "-"
+    if value < 1e-3:
+        return f"{value * 1e6:.0f}us"
+    if value < 1:
+        return f"{value * 1e3:.1f}ms"
+    return f"{value:.2f}s"
+
+
+class ChainMetrics(BaseCallbackHandler):
+    """Callback handler aggregating per-node durations, wait times and tokens"""
+
+    # Called directly on the event loop in async runs, not via a thread pool
+    run_inline = True
+
+    def __init__(self):
+        self.nodes = {}
+        self._runs = {}       # run_id -> (name, start, parent_run_id, step, input_tokens, ready)
+        self._step_ends = {}  # parent_run_id -> {step: end time}, dropped when the parent ends
+        # Guards nodes, _runs and _step_ends: sync callbacks of batch() and
+        # RunnableParallel steps arrive from several threads at once
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, parent_run_id, name, tags, input_tokens=0):
+        now = time.perf_counter()
+        step = _step(tags)
+        with self._lock:
+            ready = None
+            if step is not None and step > 1:
+                ends = self._step_ends.get(parent_run_id)
+                if ends:
+                    ready = ends.pop(step - 1, None)
+            if ready is None:
+                parent = self._runs.get(parent_run_id)
+                if parent is not None:
+                    ready = parent[1]
+            self._runs[run_id] = (name, now, parent_run_id, step, input_tokens, ready)
+
+    def _end(self, run_id, error=False, output_tokens=0, input_tokens=None):
+        # input_tokens, when given, replaces the estimate made at the start
+        now = time.perf_counter()
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+            if run is None:
+                return
+            # Step ends of this run's children are not needed any more
+            self._step_ends.pop(run_id, None)
+            name, start, parent_run_id, step, estimated_tokens, ready = run
+            if step is not None and parent_run_id in self._runs:
+                ends = self._step_ends.get(parent_run_id)
+                if ends is None:
+                    ends = self._step_ends[parent_run_id] = {}
+                ends[step] = now
+            stats = self.nodes.get(name)
+            if stats is None:
+                stats = self.nodes[name] = NodeStats()
+            stats.duration.observe(now - start)
+            if ready is not None:
+                stats.wait.observe(start - ready)
+            stats.errors += error
+            stats.input_tokens += estimated_tokens if input_tokens is None else input_tokens
+            stats.output_tokens += output_tokens
+
+    @staticmethod
+    def _name(serialized, kwargs, default):
+        return kwargs.get("name") or (serialized or {}).get("name") or default
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, **kwargs):
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "chain"), tags)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, tags=None, **kwargs):
+        # Estimate only; replaced by the provider's count in on_llm_end when it reports one
+        tokens = sum(message_tokens(message) for batch in messages for message in batch)
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "chat_model"), tags, tokens)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, tags=None, **kwargs):
+        tokens = sum(approximate_tokens(prompt) for prompt in prompts)
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "llm"), tags, tokens)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        input_tokens = output_tokens = 0
+        reported = False
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    reported = True
+                    input_tokens += usage.get("input_tokens", 0)
+                    output_tokens += usage.get("output_tokens", 0)
+                else:
+                    output_tokens += approximate_tokens(generation.text)
+        self._end(run_id, output_tokens=output_tokens, input_tokens=input_tokens if reported else None)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, tags=None, **kwargs):
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "retriever"), tags)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=True)
+
+    def reset(self):
+        with self._lock:
+            self.nodes = {}
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def to_json(self):
+        with self._lock:
+            return {
+                name: {
+                    "duration_seconds": stats.duration.to_json(),
+                    "wait_seconds": stats.wait.to_json(),
+                    "errors": stats.errors,
+                    "input_tokens": stats.input_tokens,
+                    "output_tokens": stats.output_tokens,
+                }
+                for name, stats in self.nodes.items()
+            }
+
+    def to_prometheus(self, prefix="langchain"):
+        """Metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            nodes = sorted(self.nodes.items())
+            for metric, attribute, help_text in (
+                ("node_duration_seconds", "duration", "Wall time of each run of a runnable node"),
+                ("node_wait_seconds", "wait", "Time a runnable node waited between becoming ready and starting"),
+            ):
+                lines.append(f"# HELP {prefix}_{metric} {help_text}")
+                lines.append(f"# TYPE {prefix}_{metric} histogram")
+                for name, stats in nodes:
+                    histogram = getattr(stats, attribute)
+                    label = name.replace("\\", "\\\\").replace('"', '\\"')
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{prefix}_{metric}_bucket{{node="{label}",le="{bound:.6g}"}} {cumulative}')
+                    lines.append(f'{prefix}_{metric}_bucket{{node="{label}",le="+Inf"}} {histogram.count}')
+                    lines.append(f'{prefix}_{metric}_sum{{node="{label}"}} {histogram.sum:.9g}')
+                    lines.append(f'{prefix}_{metric}_count{{node="{label}"}} {histogram.count}')
+            for metric, attribute, help_text in (
+                ("node_errors_total", "errors", "Failed runs of a runnable node"),
+                ("node_input_tokens_total", "input_tokens", "Input tokens of a model node"),
+                ("node_output_tokens_total", "output_tokens", "Output tokens of a model node"),
+            ):
+                lines.append(f"# HELP {prefix}_{metric} {help_text}")
+                lines.append(f"# TYPE {prefix}_{metric} counter")
+                for name, stats in nodes:
+                    label = name.replace("\\", "\\\\").replace('"', '\\"')
+                    lines.append(f'{prefix}_{metric}{{node="{label}"}} {getattr(stats, attribute)}')
+        return "\n".join(lines) + "\n"
+
+    def draw_ascii(self, graph):
+        """chain.get_graph() drawn as ASCII, each node labelled with its p50/p99 duration"""
+        from langchain_core.runnables.graph_ascii import draw_ascii
+
+        labels = {}
+        with self._lock:
+            for node in graph.nodes.values():
+                stats = self.nodes.get(node.name)
+                if stats is None or not stats.duration.count:
+                    labels[node.id] = node.name
+                else:
+                    labels[node.id] = (f"{node.name} p50 {_format_seconds(stats.duration.quantile(0.5))}"
+                                       f" p99 {_format_seconds(stats.duration.quantile(0.99))}")
+        return draw_ascii(labels, graph.edges)
@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+import uuid
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for fake_models.py
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+from fake_models import CountingFakeChatModel
+from instrumentation import ChainMetrics
+
+# Cost of ChainMetrics. The first part calls the handler's start/end hooks
+# directly, the way a RunnableSequence step reports them, so it measures the
+# handler alone. The second part runs simple_chain.py's prompt | model | parser
+# against a zero-latency fake model with no handler, a handler that does
+# nothing, and ChainMetrics; the no-op handler shows what LangChain's own
+# callback dispatch costs once any handler is attached. Each variant runs
+# ROUNDS times, interleaved, and the fastest round counts. Last, batch() on a
+# thread pool checks that concurrent callbacks lose no runs.
+
+NODES = 200_000
+INVOCATIONS = 2_000
+ROUNDS = 5
+BATCH = 2_000
+
+
+class NoOpHandler(BaseCallbackHandler):
+    run_inline = True
+
+
+def handler_cost():
+    metrics = ChainMetrics()
+    parent = uuid.uuid4()
+    run_ids = [uuid.uuid4() for _ in range(NODES)]
+    tags = [[f"seq:step:{step}"] for step in (1, 2, 3)]
+    metrics.on_chain_start({}, {}, run_id=parent, name="RunnableSequence")
+    start = time.perf_counter()
+    for i, run_id in enumerate(run_ids):
+        metrics.on_chain_start({}, {}, run_id=run_id, parent_run_id=parent, tags=tags[i % 3], name="Node")
+        metrics.on_chain_end({}, run_id=run_id)
+    return (time.perf_counter() - start) / NODES
+
+
+def simple_chain():
+    prompt = ChatPromptTemplate.from_messages([("user", "Write a poem about {topic}.")])
+    return prompt | CountingFakeChatModel(latency=0.0) | StrOutputParser()
+
+
+def chain_cost(chain, callbacks):
+    config = {"callbacks": callbacks}
+    chain.invoke({"topic": "courage"}, config=config)
+    start = time.perf_counter()
+    for _ in range(INVOCATIONS):
+        chain.invoke({"topic": "courage"}, config=config)
+    return (time.perf_counter() - start) / INVOCATIONS
+
+
+print(f"handler only:  {handler_cost() * 1e6:6.2f} us per node (start + end)")
+
+chain = simple_chain()
+variants = {
+    "no callbacks": lambda: [],
+    "no-op handler": lambda: [NoOpHandler()],
+    "ChainMetrics": lambda: [ChainMetrics()],
+}
+best = {name: float("inf") for name in variants}
+for _ in range(ROUNDS):
+    for name, callbacks in variants.items():
+        best[name] = min(best[name], chain_cost(chain, callbacks()))
+# 4 runs per invocation: the sequence and its three steps
+for name, cost in best.items():
+    extra = "" if name == "no callbacks" else f"   (+{(cost - best['no callbacks']) / 4 * 1e6:.1f} us per node)"
+    print(f"chain, {name + ':':<15} {cost * 1e6:8.1f} us per invoke{extra}")
+
+metrics = ChainMetrics()
+chain.batch([{"topic": f"topic {i}"} for i in range(BATCH)], config={"callbacks": [metrics], "max_concurrency": 16})
+counts = {name: node["duration_seconds"]["count"] for name, node in metrics.to_json().items()}
+assert all(count == BATCH for count in counts.values()), counts
+assert not metrics._runs and not metrics._step_ends
+print(f"batch of {BATCH} on 16 threads: {counts}, no runs left over")
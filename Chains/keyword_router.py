@@ -0,0 +1,100 @@
+import re
+from collections import deque
+
+from langchain_core.runnables import RunnableLambda
+
+# Keyword routing compiled once into an Aho-Corasick automaton over word
+# tokens. A query is tokenized once and scanned in a single pass, so the cost
+# depends on the query length rather than the number of terms, and a term only
+# matches whole words ("api" matches "What is an API?" but not "rapid").
+
+WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return WORD.findall(text.lower())
+
+
+class KeywordRouter:
+    """Route queries to a label by the keywords they contain.
+
+    routes:  dict mapping label -> iterable of terms; a term may span several
+             words ("machine learning"). When a query matches terms of several
+             labels, the label listed first wins.
+    default: label returned when no term matches
+    """
+
+    def __init__(self, routes, default):
+        self.labels = list(routes)
+        self.default = default
+
+        # Trie over word tokens; node 0 is the root
+        self._goto = [{}]
+        self._out = [None]  # best (lowest) label index ending at each node
+        for priority, label in enumerate(self.labels):
+            for term in routes[label]:
+                tokens = tokenize(term)
+                if not tokens:
+                    continue
+                node = 0
+                for token in tokens:
+                    child = self._goto[node].get(token)
+                    if child is None:
+                        child = len(self._goto)
+                        self._goto[node][token] = child
+                        self._goto.append({})
+                        self._out.append(None)
+                    node = child
+                if self._out[node] is None or priority < self._out[node]:
+                    self._out[node] = priority
+
+        # Failure links, filled breadth first so each node inherits the
+        # outputs of the longest proper suffix that is also in the trie
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                state = self._fail[node]
+                while state and token not in self._goto[state]:
+                    state = self._fail[state]
+                self._fail[child] = self._goto[state].get(token, 0)
+                inherited = self._out[self._fail[child]]
+                if inherited is not None and (self._out[child] is None or inherited < self._out[child]):
+                    self._out[child] = inherited
+
+    def _match(self, tokens):
+        goto, fail, out = self._goto, self._fail, self._out
+        best = None
+        state = 0
+        for token in tokens:
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            found = out[state]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break  # nothing can beat the first label
+        return best
+
+    def route(self, query):
+        best = self._match(tokenize(query))
+        return self.default if best is None else self.labels[best]
+
+    def route_batch(self, queries):
+        """Route a list of queries in one call, returning their labels in order"""
+        labels, default, match = self.labels, self.default, self._match
+        results = []
+        for query in queries:
+            best = match(WORD.findall(query.lower()))
+            results.append(default if best is None else labels[best])
+        return results
+
+    def as_runnable(self, chains, field="query"):
+        """RunnableLambda that routes on input_dict[field] and runs chains[label]"""
+        def route_chain(input_dict):
+            return chains[self.route(input_dict.get(field, ""))]
+
+        return RunnableLambda(route_chain)
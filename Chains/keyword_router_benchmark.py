@@ -0,0 +1,50 @@
+import random
+import string
+import time
+
+from keyword_router import KeywordRouter
+
+# Compares the linear `any(term in query ...)` scan used by the original
+# route_by_complexity with the compiled KeywordRouter at growing table sizes.
+
+random.seed(0)
+
+def random_word():
+    return "".join(random.choices(string.ascii_lowercase, k=random.randint(6, 10)))
+
+def linear_route(query, terms):
+    query = query.lower()
+    if any(term in query for term in terms):
+        return "technical"
+    return "simple"
+
+vocabulary = [random_word() for _ in range(5000)]
+
+for size in (10, 1_000, 10_000):
+    terms = [random_word() for _ in range(size)]
+    # About a third of the queries contain one of the routing terms
+    queries = []
+    for i in range(2_000):
+        words = random.sample(vocabulary, 12)
+        if i % 3 == 0:
+            words[random.randrange(12)] = random.choice(terms)
+        queries.append(" ".join(words))
+
+    start = time.perf_counter()
+    router = KeywordRouter({"technical": terms}, default="simple")
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [linear_route(query, terms) for query in queries]
+    linear_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    routed = router.route_batch(queries)
+    compiled_time = time.perf_counter() - start
+
+    assert routed == expected
+
+    print(f"{size:>6} terms  linear: {linear_time / len(queries) * 1e6:9.1f} us/query  "
+          f"compiled: {compiled_time / len(queries) * 1e6:6.1f} us/query  "
+          f"speedup: {linear_time / compiled_time:7.1f}x  "
+          f"(compile {compile_time * 1000:.1f} ms)")
@@ -0,0 +1,162 @@
+import re
+from collections import Counter
+
+import numpy as np
+
+from language_samples import SAMPLES
+from routing import FallbackRouter
+
+# Language identification without an LLM call, from character n-gram
+# profiles. Each language's sample text (language_samples.py) is cut into
+# 1-, 2- and 3-grams over its lower-cased words padded with spaces, and the
+# profile_size most frequent n-grams of each order are kept. Their smoothed
+# log probabilities form one float32 table (n-grams x languages); an n-gram
+# outside every profile falls into an "unseen" row of its order. A text is
+# scored by summing its rows, i.e. naive Bayes with a uniform prior, and a
+# batch is one gather and one np.add.reduceat. The confidence is the winning
+# language's posterior; below min_confidence the fallback classifier decides.
+#
+#   identifier = LanguageIdentifier(["english", "spanish"], fallback=route_by_language)
+#   identifier.classify("Hola, ¿cómo estás?")   # -> ("spanish", 0.99...)
+#   identifier.route_batch(texts)               # labels, fallback only for unsure ones
+#   route_once(identifier.as_classifier(), branches, default)
+
+LETTERS = re.compile(r"[^\W\d_]+")
+
+
+def _padded(text):
+    return " " + " ".join(LETTERS.findall(text.lower())) + " "
+
+
+class LanguageIdentifier(FallbackRouter):
+    """Identify the language of texts from character n-gram profiles.
+
+    languages:      labels to tell apart, keys of samples (default: all)
+    samples:        dict mapping label -> sample text (default: the bundled
+                    language_samples.SAMPLES)
+    fallback:       runnable or function taking {field: text} and returning a
+                    label, asked when the confidence is below min_confidence;
+                    None always takes the best profile
+    min_confidence: posterior of the best language below which the fallback
+                    decides
+    field:          input dict key holding the text, for as_classifier()
+    profile_size:   n-grams kept per language and order
+    orders:         n-gram lengths
+    alpha:          additive smoothing of the n-gram counts
+    """
+
+    def __init__(self, languages=None, samples=None, fallback=None, min_confidence=0.9, field="text",
+                 profile_size=300, orders=(1, 2, 3), alpha=0.5):
+        super().__init__(fallback, field)
+        samples = SAMPLES if samples is None else samples
+        languages = list(samples) if languages is None else list(languages)
+        self.samples = {label: samples[label] for label in languages}
+        self.min_confidence = min_confidence
+        self.profile_size = profile_size
+        self.orders = tuple(orders)
+        self.alpha = alpha
+        self._build()
+
+    def add_language(self, label, text):
+        """Add (or replace) a language from its sample text and rebuild the table"""
+        with self._lock:
+            self.samples = {**self.samples, label: text}
+            self._build()
+
+    def _build(self):
+        labels = list(self.samples)
+        if not labels:
+            raise ValueError("No languages to identify")
+        counts = {}  # (label, order) -> Counter of n-grams
+        vocabulary = []
+        index = {}
+        for label in labels:
+            padded = _padded(self.samples[label])
+            for n in self.orders:
+                grams = Counter(padded[i:i + n] for i in range(len(padded) - n + 1))
+                grams.pop(" ", None)
+                if not grams:
+                    raise ValueError(f"No sample text for language {label!r}")
+                counts[label, n] = grams
+                for gram, _ in grams.most_common(self.profile_size):
+                    if gram not in index:
+                        index[gram] = len(vocabulary)
+                        vocabulary.append(gram)
+        # One "unseen" row per order after the vocabulary
+        unseen = {n: len(vocabulary) + i for i, n in enumerate(self.orders)}
+        table = np.empty((len(vocabulary) + len(self.orders), len(labels)), dtype=np.float32)
+        for n in self.orders:
+            rows = [row for row, gram in enumerate(vocabulary) if len(gram) == n]
+            for column, label in enumerate(labels):
+                grams = counts[label, n]
+                # Smoothed over the kept n-grams of this order plus the unseen bucket
+                kept = np.array([grams.get(vocabulary[row], 0) for row in rows], dtype=np.float64)
+                rest = sum(grams.values()) - kept.sum()
+                total = sum(grams.values()) + self.alpha * (len(rows) + 1)
+                table[rows, column] = np.log((kept + self.alpha) / total)
+                table[unseen[n], column] = np.log((rest + self.alpha) / total)
+        # Swapped in one assignment so a concurrent classify sees old or new
+        self._model = (labels, index, unseen, table)
+
+    def _rows(self, text, index, unseen):
+        padded = _padded(text)
+        if len(padded) <= 2:
+            return []
+        get = index.get
+        rows = []
+        for n in self.orders:
+            default = unseen[n]
+            if n == 1:
+                rows.extend(get(char, default) for char in padded if char != " ")
+            else:
+                rows.extend(get(padded[i:i + n], default) for i in range(len(padded) - n + 1))
+        return rows
+
+    def scores(self, texts):
+        """Log likelihood of each text under each language: (texts, languages)"""
+        labels, index, unseen, table = self._model
+        offsets = []
+        rows = []
+        for text in texts:
+            offsets.append(len(rows))
+            rows.extend(self._rows(text, index, unseen))
+        result = np.zeros((len(texts), len(labels)), dtype=np.float32)
+        if rows:
+            lengths = np.diff(offsets + [len(rows)])
+            present = np.flatnonzero(lengths)
+            gathered = table.take(np.asarray(rows, dtype=np.intp), axis=0)
+            result[present] = np.add.reduceat(gathered, np.asarray(offsets)[present], axis=0)
+        return result
+
+    def classify_batch(self, texts):
+        """(label, confidence) per text, without the fallback"""
+        labels = self._model[0]
+        scores = self.scores(texts)
+        # Each character sits in one n-gram per order, so the orders count the
+        # same evidence len(orders) times; scaling keeps posteriors honest
+        scores /= len(self.orders)
+        scores -= scores.max(axis=1, keepdims=True)
+        posteriors = np.exp(scores)
+        posteriors /= posteriors.sum(axis=1, keepdims=True)
+        best = posteriors.argmax(axis=1)
+        # A text without letters has uniform posteriors: as unsure as it gets
+        return [(labels[i], float(posteriors[row, i])) for row, i in enumerate(best)]
+
+    def classify(self, text):
+        return self.classify_batch([text])[0]
+
+    def _classify_batch(self, texts):
+        # Returns (labels, indices of texts whose confidence is too low)
+        decided = self.classify_batch(texts)
+        labels = [label for label, _ in decided]
+        unsure = [i for i, (_, confidence) in enumerate(decided) if confidence < self.min_confidence]
+        return labels, unsure
+
+    def stats(self):
+        labels, index, _, table = self._model
+        return {
+            "languages": labels,
+            "ngrams": len(index),
+            "table_bytes": table.nbytes,
+            **super().stats(),
+        }
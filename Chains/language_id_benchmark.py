@@ -0,0 +1,136 @@
+import asyncio
+import os
+import random
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for fake_models.py
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+from fake_models import CountingFakeChatModel
+from language_id import LanguageIdentifier
+
+# The language detection of conditional_chains.py (Example 5) as an LLM call
+# per text versus LanguageIdentifier, on labelled English and Spanish queries
+# that are not in the bundled sample text. The fake LLM always answers
+# correctly and takes LLM_LATENCY. Queries are built from templates and
+# topics, plus short greetings and one-word inputs, which are where character
+# n-grams run out of evidence. Reported per min_confidence: accuracy, how
+# often the LLM was asked, and time per query one at a time (on the first
+# SINGLE_SAMPLE queries) and in one batch.
+
+LLM_LATENCY = 0.3
+QUERIES = 1000
+SHORT = 0.1
+SINGLE_SAMPLE = 200
+
+TEMPLATES = {
+    "english": ["What is {a}?", "Can you explain {a} to me?", "How does {a} work?", "Tell me about {a}",
+                "Why is {a} important?", "I need a short summary of {a}", "Give me three facts about {a}",
+                "What should I know before learning about {a}?"],
+    "spanish": ["¿Qué es {a}?", "¿Me puedes explicar {a}?", "¿Cómo funciona {a}?", "Háblame de {a}",
+                "¿Por qué es importante {a}?", "Necesito un resumen corto sobre {a}", "Dame tres datos sobre {a}",
+                "¿Qué debo saber antes de estudiar {a}?"],
+}
+TOPICS = {
+    "english": ["photosynthesis", "the Roman empire", "machine learning", "black holes", "the French revolution",
+                "healthy sleep", "the stock market", "climate change", "the human heart", "electric cars",
+                "ancient Egypt", "cloud computing", "volcanoes", "the printing press", "vaccines"],
+    "spanish": ["la fotosíntesis", "el imperio romano", "el aprendizaje automático", "los agujeros negros",
+                "la revolución francesa", "el sueño saludable", "la bolsa de valores", "el cambio climático",
+                "el corazón humano", "los coches eléctricos", "el antiguo Egipto", "la computación en la nube",
+                "los volcanes", "la imprenta", "las vacunas"],
+}
+# Greetings and one-word inputs, some shared between the languages
+SHORT_TEXTS = {
+    "english": ["Hi", "Thanks!", "Hello there", "OK", "Yes please", "Good morning", "Help", "Sorry", "Hotel",
+                "Taco", "Radio", "Chocolate"],
+    "spanish": ["Hola", "¡Gracias!", "Buenos días", "Vale", "Sí, por favor", "Ayuda", "Perdón", "Hotel", "Taco",
+                "Radio", "Chocolate", "Bueno"],
+}
+
+rng = random.Random(0)
+texts = []
+truth = []
+for _ in range(QUERIES):
+    label = rng.choice(list(TEMPLATES))
+    if rng.random() < SHORT:
+        texts.append(rng.choice(SHORT_TEXTS[label]))
+    else:
+        texts.append(rng.choice(TEMPLATES[label]).format(a=rng.choice(TOPICS[label])))
+    truth.append(label)
+# The LLM knows the intended language of each text; words like "Hotel" stay
+# ambiguous for everyone else, so the oracle answers the label seen most often
+answers = {}
+for text, label in zip(texts, truth):
+    answers.setdefault(text, []).append(label)
+answers = {text: max(set(labels), key=labels.count) for text, labels in answers.items()}
+
+classifier_model = CountingFakeChatModel(respond=lambda prompt: answers[prompt.split("Text: ")[1]],
+                                         latency=LLM_LATENCY)
+lang_detect_chain = ChatPromptTemplate.from_messages([
+    ("user", "Detect the language of this text and respond with ONLY 'english' or 'spanish'.\nText: {text}")
+]) | classifier_model | StrOutputParser()
+
+
+def route_by_language(input_dict):
+    detected_lang = lang_detect_chain.invoke({"text": input_dict.get("text", "")}).strip().lower()
+    return "spanish" if "spanish" in detected_lang else "english"
+
+
+def accuracy(predicted):
+    return sum(label == expected for label, expected in zip(predicted, truth)) / len(truth)
+
+
+def report(name, predicted, single, batch, fallback_rate):
+    print(f"{name:<24} accuracy {accuracy(predicted):6.1%}   LLM fallback {fallback_rate:6.1%}   "
+          f"one at a time {single * 1e6:9.1f} us/query   batched {batch * 1e6:8.1f} us/query")
+
+
+print(f"{QUERIES} queries ({SHORT:.0%} greetings or single words), LLM classifier {LLM_LATENCY * 1e3:.0f} ms")
+
+# LLM per text: timed on a sample, it is a fixed latency
+sample = texts[:20]
+start = time.perf_counter()
+for text in sample:
+    route_by_language({"text": text})
+single = (time.perf_counter() - start) / len(sample)
+# lang_detect_chain.batch with up to 8 calls in flight
+classifier_model.reset()
+start = time.perf_counter()
+llm_labels = [label.strip().lower() for label in
+              lang_detect_chain.batch([{"text": text} for text in texts], {"max_concurrency": 8})]
+report("LLM classifier", llm_labels, single, (time.perf_counter() - start) / QUERIES, 1.0)
+assert classifier_model.calls == QUERIES
+
+start = time.perf_counter()
+identifier = LanguageIdentifier(["english", "spanish"])
+print(f"profiles built in {(time.perf_counter() - start) * 1e3:.1f} ms: {identifier.stats()['ngrams']} n-grams, "
+      f"{identifier.stats()['table_bytes']} bytes")
+for min_confidence in (None, 0.9, 0.99, 0.999):
+    identifier = LanguageIdentifier(["english", "spanish"], min_confidence=min_confidence or 0.0,
+                                    fallback=None if min_confidence is None else route_by_language)
+    # One at a time on a sample, including the LLM calls for unsure texts
+    start = time.perf_counter()
+    for text in texts[:SINGLE_SAMPLE]:
+        identifier.route(text)
+    single = (time.perf_counter() - start) / SINGLE_SAMPLE
+    identifier.routed = identifier.fallbacks = 0
+    classifier_model.reset()
+    start = time.perf_counter()
+    predicted = identifier.route_batch(texts)
+    batch = (time.perf_counter() - start) / QUERIES
+    assert classifier_model.calls == identifier.fallbacks
+    name = "n-grams only" if min_confidence is None else f"n-grams, cutoff {min_confidence}"
+    report(name, predicted, single, batch, identifier.stats()["fallback_rate"])
+
+# More languages cost one table column each; Portuguese is the close one
+identifier = LanguageIdentifier()
+predicted = identifier.route_batch(texts)
+print(f"{len(identifier.stats()['languages'])} languages   accuracy {accuracy(predicted):6.1%} "
+      f"on the same English/Spanish queries")
+
+# The async path routes the same way
+identifier = LanguageIdentifier(["english", "spanish"], fallback=route_by_language, min_confidence=0.99)
+assert asyncio.run(identifier.aroute_batch(texts)) == identifier.route_batch(texts)
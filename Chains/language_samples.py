@@ -0,0 +1,78 @@
+# Sample text per language for language_id.LanguageIdentifier. A few
+# paragraphs of everyday prose and questions are enough for character n-gram
+# profiles; add a language by adding an entry with a similar amount of text.
+
+SAMPLES = {
+    "english": """
+Hello, how are you today? I hope everything is going well with you and your family.
+What is the best way to learn a new language? Most people say that you should practice
+every day, read books that you enjoy, and talk with native speakers whenever you can.
+Can you tell me how this works? I would like to understand why the results are different
+when I run the same program twice. Thank you very much for your help, it was really useful.
+The weather was nice this morning, so we walked to the park near the river and had lunch
+with some friends. In the afternoon it started to rain and we went back home to watch a movie.
+Where can I find a good restaurant around here? We are looking for something quiet, not too
+expensive, with food from the region. Please explain the difference between these two options
+and which one you would recommend for a small business that is just getting started.
+Science helps us understand the world: the stars, the oceans, the plants and the animals that
+live around us. History teaches us what happened before and why our cities look the way they do.
+Technology changes quickly, and every year there are new phones, new computers and new ideas.
+Could you write a short summary of this article? I need it for a meeting tomorrow morning.
+My brother works in a hospital and my sister teaches children at a school in the north of the country.
+They would rather stay at home than travel during the holidays, because the roads are always busy.
+""",
+    "spanish": """
+Hola, ¿cómo estás hoy? Espero que todo vaya bien contigo y con tu familia.
+¿Cuál es la mejor manera de aprender un idioma nuevo? Mucha gente dice que hay que practicar
+todos los días, leer libros que te gusten y hablar con hablantes nativos siempre que puedas.
+¿Me puedes explicar cómo funciona esto? Quisiera entender por qué los resultados son distintos
+cuando ejecuto el mismo programa dos veces. Muchas gracias por tu ayuda, fue realmente útil.
+Esta mañana hacía buen tiempo, así que caminamos hasta el parque cerca del río y comimos
+con unos amigos. Por la tarde empezó a llover y volvimos a casa para ver una película.
+¿Dónde puedo encontrar un buen restaurante por aquí? Buscamos algo tranquilo, no muy caro,
+con comida de la región. Por favor, explica la diferencia entre estas dos opciones y cuál
+recomendarías para una pequeña empresa que acaba de empezar.
+La ciencia nos ayuda a entender el mundo: las estrellas, los océanos, las plantas y los animales
+que viven a nuestro alrededor. La historia nos enseña lo que pasó antes y por qué nuestras ciudades
+son como son. La tecnología cambia muy rápido y cada año hay teléfonos, ordenadores e ideas nuevas.
+¿Podrías escribir un resumen corto de este artículo? Lo necesito para una reunión mañana temprano.
+Mi hermano trabaja en un hospital y mi hermana enseña a niños en una escuela del norte del país.
+Ellos prefieren quedarse en casa que viajar en vacaciones, porque las carreteras siempre están llenas.
+""",
+    "portuguese": """
+Olá, como você está hoje? Espero que tudo esteja bem com você e com a sua família.
+Qual é a melhor maneira de aprender uma língua nova? Muita gente diz que é preciso praticar
+todos os dias, ler livros de que você gosta e conversar com falantes nativos sempre que puder.
+Você pode me explicar como isso funciona? Eu gostaria de entender por que os resultados são
+diferentes quando executo o mesmo programa duas vezes. Muito obrigado pela sua ajuda, foi muito útil.
+Hoje de manhã o tempo estava bom, então caminhamos até o parque perto do rio e almoçamos
+com alguns amigos. À tarde começou a chover e voltamos para casa para assistir a um filme.
+Onde posso encontrar um bom restaurante por aqui? Procuramos algo tranquilo, não muito caro,
+com comida da região. Por favor, explique a diferença entre essas duas opções e qual você
+recomendaria para uma pequena empresa que está começando agora.
+A ciência nos ajuda a entender o mundo: as estrelas, os oceanos, as plantas e os animais que
+vivem ao nosso redor. A história nos ensina o que aconteceu antes e por que as nossas cidades
+são assim. A tecnologia muda muito rápido e todo ano há novos telefones, computadores e ideias.
+Você poderia escrever um resumo curto deste artigo? Preciso dele para uma reunião amanhã cedo.
+O meu irmão trabalha num hospital e a minha irmã ensina crianças numa escola no norte do país.
+Eles preferem ficar em casa a viajar nas férias, porque as estradas estão sempre cheias.
+""",
+    "french": """
+Bonjour, comment allez-vous aujourd'hui ? J'espère que tout va bien pour vous et votre famille.
+Quelle est la meilleure façon d'apprendre une nouvelle langue ? Beaucoup de gens disent qu'il faut
+pratiquer tous les jours, lire des livres qui vous plaisent et parler avec des locuteurs natifs
+dès que possible. Pouvez-vous m'expliquer comment cela fonctionne ? Je voudrais comprendre pourquoi
+les résultats sont différents quand je lance deux fois le même programme. Merci beaucoup pour votre
+aide, elle m'a été très utile. Ce matin il faisait beau, alors nous avons marché jusqu'au parc près
+de la rivière et nous avons déjeuné avec des amis. L'après-midi il a commencé à pleuvoir et nous
+sommes rentrés à la maison pour regarder un film. Où puis-je trouver un bon restaurant dans le
+quartier ? Nous cherchons quelque chose de calme, pas trop cher, avec une cuisine de la région.
+Expliquez la différence entre ces deux options, s'il vous plaît, et laquelle vous recommanderiez
+pour une petite entreprise qui vient de démarrer. La science nous aide à comprendre le monde : les
+étoiles, les océans, les plantes et les animaux qui vivent autour de nous. L'histoire nous apprend
+ce qui s'est passé avant et pourquoi nos villes sont ainsi. La technologie change très vite et chaque
+année il y a de nouveaux téléphones, de nouveaux ordinateurs et de nouvelles idées. Pourriez-vous
+écrire un court résumé de cet article ? J'en ai besoin pour une réunion demain matin. Mon frère
+travaille dans un hôpital et ma sœur enseigne aux enfants dans une école du nord du pays.
+""",
+}
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for token_count.py
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
+
+from token_count import approximate_tokens
+
+# Map-reduce summarization for the two-stage chain in sequential_chain.py.
+#
+# The single-shot chain waits for the whole stage-one report and then sends
+# all of it to one summary call. Here the report is streamed: as soon as the
+# text received so far holds chunk_tokens worth, that chunk is cut at a
+# paragraph or sentence boundary and summarized (map) while the rest of the
+# report is still being generated. When the stream ends, the partial
+# summaries are merged (reduce) - recursively in groups while they are too
+# long for one call - and the final prompt turns them into the summary.
+
+map_prompt = ChatPromptTemplate.from_messages([
+    ("user", "Summarize the key points of this section of a report:\n{text}")
+])
+
+combine_prompt = ChatPromptTemplate.from_messages([
+    ("user", "Combine these partial summaries into one concise summary, keeping every key point:\n{text}")
+])
+
+
+def split_point(text, limit):
+    """Index at which to cut text so the first part is at most ~limit characters"""
+    window = text[:limit]
+    for boundary in ("\n\n", "\n", ". "):
+        cut = window.rfind(boundary)
+        if cut > limit // 2:
+            return cut + len(boundary)
+    return limit
+
+
+class MapReduceSummarizer:
+    """Summarize a (streamed) text with concurrent map calls and a recursive reduce.
+
+    model:        chat model used for the map and combine calls
+    final_chain:  runnable turning the merged summaries (a string) into the result,
+                  e.g. prompt2 | model | parser from sequential_chain.py
+    chunk_tokens: size of each mapped chunk
+    reduce_tokens: largest input handed to one combine or final call
+    """
+
+    def __init__(self, model, final_chain, chunk_tokens=1000, reduce_tokens=3000, max_concurrency=8,
+                 count_tokens=approximate_tokens):
+        parser = StrOutputParser()
+        self.map_chain = map_prompt | model | parser
+        self.combine_chain = combine_prompt | model | parser
+        self.final_chain = final_chain
+        self.chunk_tokens = chunk_tokens
+        self.reduce_tokens = reduce_tokens
+        self.max_concurrency = max_concurrency
+        self.count_tokens = count_tokens
+
+    async def _run(self, semaphore, chain, text):
+        async with semaphore:
+            return await chain.ainvoke({"text": text})
+
+    async def asummarize_stream(self, text_stream):
+        """Summarize text arriving as an async iterator of string chunks"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        chunk_chars = self.chunk_tokens * 4
+        maps = []
+        buffer = ""
+        try:
+            async for piece in text_stream:
+                buffer += piece
+                # Hand off full chunks while the stream keeps coming
+                while self.count_tokens(buffer) > self.chunk_tokens:
+                    cut = split_point(buffer, chunk_chars)
+                    maps.append(asyncio.ensure_future(self._run(semaphore, self.map_chain, buffer[:cut])))
+                    buffer = buffer[cut:]
+        except BaseException:
+            for task in maps:
+                task.cancel()
+            raise
+        if buffer.strip():
+            if maps:
+                maps.append(asyncio.ensure_future(self._run(semaphore, self.map_chain, buffer)))
+            else:
+                # Short enough for the final call on its own
+                return await self.final_chain.ainvoke(buffer)
+
+        summaries = await asyncio.gather(*maps)
+        while len(summaries) > 1 and self.count_tokens("\n\n".join(summaries)) > self.reduce_tokens:
+            groups = self._group(summaries)
+            summaries = await asyncio.gather(*[
+                self._run(semaphore, self.combine_chain, "\n\n".join(group)) for group in groups
+            ])
+        return await self.final_chain.ainvoke("\n\n".join(summaries))
+
+    def _group(self, summaries):
+        # Consecutive summaries packed into groups of at most reduce_tokens;
+        # every group holds at least two so each round shrinks the list
+        groups = [[]]
+        tokens = 0
+        for summary in summaries:
+            size = self.count_tokens(summary)
+            if len(groups[-1]) >= 2 and tokens + size > self.reduce_tokens:
+                groups.append([])
+                tokens = 0
+            groups[-1].append(summary)
+            tokens += size
+        return groups
+
+    async def asummarize(self, text):
+        async def single():
+            yield text
+        return await self.asummarize_stream(single())
+
+    def as_chain(self, source_chain):
+        """Runnable: input -> stream source_chain's text output -> map-reduce summary"""
+        async def run(input_dict):
+            return await self.asummarize_stream(source_chain.astream(input_dict))
+
+        def run_sync(input_dict):
+            return asyncio.run(run(input_dict))
+
+        return RunnableLambda(run_sync, afunc=run, name="MapReduceSummary")
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for fake_models.py
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+from fake_models import CountingFakeChatModel
+from map_reduce import MapReduceSummarizer
+
+# Latency of the two-stage report -> 5 pointer summary chain from
+# sequential_chain.py, single-shot versus map-reduce, against a fake model
+# whose latency grows with the prompt size (0.1 ms per prompt token) and the
+# reply length (4 ms per reply word). "After report" is the time from the
+# last word of the report to the finished summary.
+
+INPUT_LATENCY = 0.0001
+OUTPUT_LATENCY = 0.004
+
+def respond(prompt):
+    if prompt.startswith("Generate a detailed report"):
+        sentences = [f"Finding {i} of the report discusses one aspect of the topic in some detail."
+                     for i in range(REPORT_SENTENCES)]
+        return "\n\n".join(" ".join(sentences[i:i + 5]) for i in range(0, len(sentences), 5))
+    return " ".join(["summary"] * 60)
+
+prompt1 = ChatPromptTemplate.from_messages([
+    ("user", "Generate a detailed report on {topic}.")
+])
+prompt2 = ChatPromptTemplate.from_messages([
+    ("user", "Generate a 5 pointer summary from the following text \n {text}")
+])
+parser = StrOutputParser()
+topic = {"topic": "The future of AI"}
+
+async def single_shot(model):
+    # Same steps as prompt1 | model | parser | prompt2 | model | parser
+    start = time.perf_counter()
+    report = await (prompt1 | model | parser).ainvoke(topic)
+    report_done = time.perf_counter()
+    await (prompt2 | model | parser).ainvoke(report)
+    end = time.perf_counter()
+    return end - start, end - report_done, len(report.split())
+
+async def map_reduce(model):
+    report_done = None
+
+    async def timed_report():
+        nonlocal report_done
+        async for piece in (prompt1 | model | parser).astream(topic):
+            yield piece
+        report_done = time.perf_counter()
+
+    summarizer = MapReduceSummarizer(model, prompt2 | model | parser, chunk_tokens=800)
+    start = time.perf_counter()
+    await summarizer.asummarize_stream(timed_report())
+    end = time.perf_counter()
+    return end - start, end - report_done
+
+async def main():
+    global REPORT_SENTENCES
+    print("=" * 70)
+    print("Report -> 5 pointer summary with a size-dependent fake model")
+    print("=" * 70)
+    for REPORT_SENTENCES in (100, 400):
+        model = CountingFakeChatModel(
+            respond=respond, latency=0.05,
+            latency_per_input_token=INPUT_LATENCY, latency_per_output_token=OUTPUT_LATENCY
+        )
+        total, after, words = await single_shot(model)
+        print(f"report {words:,} words")
+        print(f"  single-shot  total {total:6.2f} s  after report {after:5.2f} s  calls {model.calls}")
+        model.reset()
+        total, after = await map_reduce(model)
+        print(f"  map-reduce   total {total:6.2f} s  after report {after:5.2f} s  calls {model.calls}")
+
+asyncio.run(main())
@@ -1,12 +1,21 @@
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for bootstrap.py
+from bootstrap import chat_model
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from response_cache import ResponseCache
 from langchain_core.runnables import RunnableParallel
-
-load_dotenv()
-
-model = ChatOpenAI(model="gpt-4o-mini")
+from batch_driver import ModelGate, stream_batch
+import asyncio
+
+# Repeated prompts are answered from an on-disk cache. No temperature is set,
+# so the model samples; replaying its answers has to be opted into.
+cache = ResponseCache(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".response_cache.sqlite"),
+    allow_sampled=True
+)
+model = chat_model(model="gpt-4o-mini", cache=cache)
 parser = StrOutputParser()
 
 # ============================================================================
@@ -157,3 +166,33 @@ print(f"Topic: blockchain technology\n")
 print(f"Technical Perspective:\n{result['technical']}\n")
 print(f"Business Perspective:\n{result['business']}\n")
 print(f"Educational Perspective:\n{result['educational']}\n")
+
+# ============================================================================
+# Example 5: Batch Fan-Out Over Many Topics
+# ============================================================================
+print("=" * 70)
+print("Example 5: Parallel Chain - Batch Over Many Topics")
+print("=" * 70)
+
+# One gate shared by every branch and every input: at most 8 model calls in
+# flight, and calls stay within the requests/tokens per minute budgets
+gate = ModelGate(max_concurrency=8, requests_per_minute=500, tokens_per_minute=200_000)
+gated_model = gate.wrap(model)
+
+batch_chain = RunnableParallel({
+    "summary": summary_prompt | gated_model | parser,
+    "pros": pros_prompt | gated_model | parser,
+    "cons": cons_prompt | gated_model | parser
+})
+
+topics = ["solar energy", "remote work", "electric cars", "social media"]
+
+async def run_batch():
+    # Results arrive as each topic finishes, not in input order
+    async for index, result in stream_batch(batch_chain, [{"topic": topic} for topic in topics]):
+        print(f"Topic: {topics[index]}")
+        print(f"Summary: {result['summary']}\n")
+
+asyncio.run(run_batch())
+print(f"Model calls: {gate.calls}, rate-limit retries: {gate.retries}\n")
+print(f"Response cache: {cache.stats()}")
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import messages_from_dict, messages_to_dict
+from langchain_core.outputs import ChatGeneration
+
+# Exact-match response cache for chat models, stored in SQLite. Attach it to
+# a model with ChatOpenAI(..., cache=ResponseCache("responses.sqlite")) and
+# every call path (invoke, ainvoke, batch, abatch) checks it before going to
+# the API.
+#
+# LangChain hands the cache the fully formatted messages as `prompt` and the
+# model name plus all sampling parameters as `llm_string`; both go into the
+# key, so a different template variable, model or parameter is a different
+# entry. Responses sampled at temperature > 0 are not reproducible, so they
+# are only cached when allow_sampled=True. OpenAI samples at temperature 1
+# when none is given, and an unknown temperature counts as sampled.
+
+TEMPERATURE = re.compile(r"""["']temperature["']\s*[:,]\s*([-+.\deE]+|None|null)""")
+
+
+def sampling_temperature(llm_string):
+    """Temperature recorded in llm_string, or None when it is not set"""
+    # Per-call parameters follow the model's own, so the last match wins
+    matches = TEMPERATURE.findall(llm_string)
+    if not matches or matches[-1] in ("None", "null"):
+        return None
+    return float(matches[-1])
+
+
+class ResponseCache(BaseCache):
+    """SQLite-backed exact-match cache with LRU and TTL eviction.
+
+    path:          SQLite file (":memory:" for a process-local cache)
+    max_entries:   least recently used entries are evicted beyond this
+    ttl:           seconds an entry stays valid (None = forever)
+    allow_sampled: also cache calls made at temperature > 0 or with no temperature set
+    """
+
+    def __init__(self, path, max_entries=100_000, ttl=None, allow_sampled=False):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.allow_sampled = allow_sampled
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0  # lookups not cached because the call samples
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._connection.commit()
+        # Rows in the table as this process last knew it; the LRU trim only runs beyond max_entries
+        self._entries = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def _cacheable(self, llm_string):
+        if self.allow_sampled:
+            return True
+        temperature = sampling_temperature(llm_string)
+        return temperature is not None and temperature <= 0
+
+    @staticmethod
+    def _key(prompt, llm_string):
+        return hashlib.sha256(f"{prompt}\0{llm_string}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt, llm_string):
+        if not self._cacheable(llm_string):
+            with self._lock:
+                self.skipped += 1
+            return None
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._connection.commit()
+                self._entries -= 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._connection.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._connection.commit()
+            self.hits += 1
+        return [ChatGeneration(message=message) for message in messages_from_dict(json.loads(row[0]))]
+
+    def update(self, prompt, llm_string, return_val):
+        if not self._cacheable(llm_string):
+            return
+        value = json.dumps(messages_to_dict([generation.message for generation in return_val]))
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            new = self._connection.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone() is None
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._entries += new
+            if self._entries > self.max_entries:
+                # Recounted: other processes sharing the file add and evict rows too
+                self._entries = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                excess = self._entries - self.max_entries
+                if excess > 0:
+                    # The least recently used rows, found through the accessed index
+                    self._connection.execute(
+                        "DELETE FROM responses WHERE key IN ("
+                        "SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+                        (excess,),
+                    )
+                    self._entries = self.max_entries
+            self._connection.commit()
+
+    def clear(self, **kwargs):
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+            self._connection.commit()
+            self._entries = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "skipped": self.skipped}
+
+    def close(self):
+        self._connection.close()
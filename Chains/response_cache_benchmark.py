@@ -0,0 +1,108 @@
+import asyncio
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for fake_models.py
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+from fake_models import CountingFakeChatModel
+from response_cache import ResponseCache
+
+# ResponseCache in front of simple_chain.py's prompt | model | parser, with a
+# fake model that takes LATENCY per call and counts its calls. Checks that
+# sync, async and batch calls hit the cache, the hit/miss/skipped counters,
+# that sampled calls (temperature > 0) are skipped unless allow_sampled, TTL
+# expiry and LRU eviction, then times lookups and writes on a full cache.
+
+LATENCY = 0.05
+TOPICS = [f"topic {i}" for i in range(10)]
+FULL = 20_000
+
+prompt = ChatPromptTemplate.from_messages([("user", "Write a poem about {topic}.")])
+parser = StrOutputParser()
+
+
+def chain_for(cache, temperature=0.0):
+    model = CountingFakeChatModel(latency=LATENCY, temperature=temperature, cache=cache)
+    return prompt | model | parser, model
+
+
+# Sync, async and batch share one cache
+cache = ResponseCache(":memory:")
+chain, model = chain_for(cache)
+first = chain.invoke({"topic": "courage"})
+start = time.perf_counter()
+assert chain.invoke({"topic": "courage"}) == first
+hit_time = time.perf_counter() - start
+assert asyncio.run(chain.ainvoke({"topic": "courage"})) == first
+assert model.calls == 1 and cache.stats() == {"hits": 2, "misses": 1, "skipped": 0}, cache.stats()
+
+expected = chain.batch([{"topic": topic} for topic in TOPICS[:5]])
+assert model.calls == 6
+results = chain.batch([{"topic": topic} for topic in TOPICS])
+assert results[:5] == expected and model.calls == 11
+results = asyncio.run(chain.abatch([{"topic": topic} for topic in TOPICS]))
+assert model.calls == 11 and cache.stats()["hits"] == 2 + 5 + 10
+print(f"sync/async/batch: {model.calls} model calls for {1 + 2 + 5 + 10 + 10} requests, {cache.stats()}, "
+      f"hit {hit_time * 1e3:.2f} ms vs model {LATENCY * 1e3:.0f} ms")
+
+# Sampled calls are not reproducible: skipped unless opted in
+cache = ResponseCache(":memory:")
+chain, model = chain_for(cache, temperature=0.7)
+chain.invoke({"topic": "courage"})
+chain.invoke({"topic": "courage"})
+assert model.calls == 2 and cache.stats() == {"hits": 0, "misses": 0, "skipped": 2} and len(cache) == 0
+cache = ResponseCache(":memory:", allow_sampled=True)
+chain, model = chain_for(cache, temperature=0.7)
+chain.invoke({"topic": "courage"})
+chain.invoke({"topic": "courage"})
+assert model.calls == 1 and cache.stats() == {"hits": 1, "misses": 1, "skipped": 0}
+print("temperature 0.7: skipped by default, cached with allow_sampled=True")
+
+# TTL: an expired entry is a miss and is replaced
+cache = ResponseCache(":memory:", ttl=0.2)
+chain, model = chain_for(cache)
+chain.invoke({"topic": "courage"})
+chain.invoke({"topic": "courage"})
+time.sleep(0.3)
+chain.invoke({"topic": "courage"})
+assert model.calls == 2 and cache.stats() == {"hits": 1, "misses": 2, "skipped": 0} and len(cache) == 1
+print("ttl 0.2 s: hit before expiry, miss after")
+
+# LRU: reading an entry keeps it; the least recently used one goes
+cache = ResponseCache(":memory:", max_entries=3)
+chain, model = chain_for(cache)
+for topic in ("a", "b", "c"):
+    chain.invoke({"topic": topic})
+    time.sleep(0.01)
+chain.invoke({"topic": "a"})
+time.sleep(0.01)
+chain.invoke({"topic": "d"})
+assert len(cache) == 3 and model.calls == 4
+for topic in ("a", "c", "d"):
+    chain.invoke({"topic": topic})
+assert model.calls == 4
+chain.invoke({"topic": "b"})
+assert model.calls == 5 and len(cache) == 3
+print("max_entries 3: 'b' evicted after 'a' was read again, cache stays at 3 entries")
+
+# Cost per write and lookup once the cache is full
+cache = ResponseCache(":memory:", max_entries=FULL)
+llm_string = CountingFakeChatModel()._get_llm_string()
+value = [ChatGeneration(message=AIMessage(content="A poem."))]
+for i in range(FULL):
+    cache.update(f"prompt {i}", llm_string, value)
+start = time.perf_counter()
+for i in range(FULL, FULL + 2_000):
+    cache.update(f"prompt {i}", llm_string, value)
+write = (time.perf_counter() - start) / 2_000
+start = time.perf_counter()
+for i in range(FULL, FULL + 2_000):
+    assert cache.lookup(f"prompt {i}", llm_string) is not None
+read = (time.perf_counter() - start) / 2_000
+assert len(cache) == FULL
+print(f"full cache of {FULL:,}: write + LRU trim {write * 1e6:.0f} us, hit {read * 1e6:.0f} us")
@@ -0,0 +1,241 @@
+import asyncio
+import contextvars
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+from langchain_core.runnables.base import coerce_to_runnable
+
+# A RunnableBranch evaluates its conditions one after another, so when every
+# condition calls an LLM classifier a single input can pay for the classifier
+# once per branch. route_once runs the classifier a single time, stores its
+# label on the input under `key`, and picks the target chain with a dict lookup.
+#
+# route_once still waits for the classifier before the chosen chain starts, so
+# a request takes two LLM latencies back to back. SpeculativeRouter starts the
+# most frequent route(s) so far together with the classifier; when the label
+# matches, the answer is already on its way, and the other speculative runs
+# are cancelled; those that had already started count as wasted calls.
+
+
+def route_once(classifier, branches, default, key="route"):
+    """Build a runnable that classifies the input once and dispatches on the label.
+
+    classifier: runnable or function taking the input dict and returning a label
+    branches:   dict mapping label -> chain
+    default:    chain used when the label is not in branches
+    """
+    def dispatch(input_dict):
+        # Returning a runnable makes RunnableLambda invoke it with the same input
+        return branches.get(input_dict[key], default)
+
+    return RunnablePassthrough.assign(**{key: classifier}) | RunnableLambda(dispatch)
+
+
+def _discard(task):
+    # Retrieve the outcome of an abandoned speculative task so a failure in
+    # it is not reported as "never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+class SpeculativeRouter:
+    """route_once that runs the likeliest branches while the classifier decides.
+
+    classifier, branches, default, key: as in route_once
+    speculate:   how many of the most frequent labels to start with the classifier
+    min_share:   only speculate on labels with at least this share of past routes
+    prior:       starting route counts, e.g. {"english": 9, "spanish": 1};
+                 without any, the first requests are routed sequentially
+    max_workers: threads for speculative branches of synchronous calls
+
+    A speculative branch gets the input with its own label under `key`, as it
+    would if the classifier had picked it. Async calls cancel the losing
+    branches; sync calls cannot stop a branch that has already started, so it
+    finishes in the background and its result is dropped.
+    """
+
+    def __init__(self, classifier, branches, default, key="route", speculate=1, min_share=0.0,
+                 prior=None, max_workers=32):
+        self.classifier = coerce_to_runnable(classifier)
+        self.branches = branches
+        self.default = default
+        self.key = key
+        self.speculate = speculate
+        self.min_share = min_share
+        self.max_workers = max_workers
+        self.counts = Counter(prior or {})
+        self.requests = 0
+        self.speculated = 0
+        self.hits = 0
+        self.wasted_calls = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def guesses(self):
+        """Labels to start speculatively: the most frequent ones so far"""
+        with self._lock:
+            total = sum(self.counts.values())
+            if not total:
+                return []
+            return [label for label, count in self.counts.most_common(self.speculate)
+                    if count / total >= self.min_share]
+
+    def _record(self, label, started, hit, wasted):
+        with self._lock:
+            self.counts[label] += 1
+            self.requests += 1
+            self.speculated += bool(started)
+            self.hits += hit
+            self.wasted_calls += wasted
+
+    def _branch_input(self, input_dict, label):
+        return {**input_dict, self.key: label}
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="speculative-branch")
+            return self._executor
+
+    def invoke(self, input_dict, config=None):
+        guesses = self.guesses()
+        started = {}
+        if guesses:
+            pool = self._pool()
+            for label in guesses:
+                chain = self.branches.get(label, self.default)
+                context = contextvars.copy_context()
+                started[label] = pool.submit(context.run, chain.invoke, self._branch_input(input_dict, label), config)
+        try:
+            label = self.classifier.invoke(input_dict, config)
+        except BaseException:
+            for future in started.values():
+                future.cancel()
+            raise
+        winner = started.pop(label, None)
+        # A branch still queued for a worker is cancelled before it calls
+        # anything; only the ones already running are wasted
+        wasted = sum(not future.cancel() for future in started.values())
+        self._record(label, len(started) + (winner is not None), winner is not None, wasted)
+        if winner is not None:
+            return winner.result()
+        return self.branches.get(label, self.default).invoke(self._branch_input(input_dict, label), config)
+
+    async def ainvoke(self, input_dict, config=None):
+        started = {}
+        for label in self.guesses():
+            chain = self.branches.get(label, self.default)
+            started[label] = asyncio.ensure_future(chain.ainvoke(self._branch_input(input_dict, label), config))
+        try:
+            label = await self.classifier.ainvoke(input_dict, config)
+        except BaseException:
+            for task in started.values():
+                task.cancel()
+                task.add_done_callback(_discard)
+            raise
+        winner = started.pop(label, None)
+        for task in started.values():
+            task.cancel()
+            task.add_done_callback(_discard)
+        self._record(label, len(started) + (winner is not None), winner is not None, len(started))
+        if winner is not None:
+            return await winner
+        return await self.branches.get(label, self.default).ainvoke(self._branch_input(input_dict, label), config)
+
+    def as_runnable(self):
+        return RunnableLambda(self.invoke, afunc=self.ainvoke, name="SpeculativeRouter")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "speculated": self.speculated,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.speculated if self.speculated else 0.0,
+                "wasted_calls": self.wasted_calls,
+                "wasted_calls_per_request": self.wasted_calls / self.requests if self.requests else 0.0,
+                "routes": dict(self.counts),
+            }
+
+
+class FallbackRouter:
+    """Base for local classifiers that ask a slower classifier only when unsure.
+
+    fallback: runnable or function taking {field: text} and returning a
+              label, asked for the texts the local classifier is unsure of;
+              None always takes the local label
+    field:    input dict key holding the text, for as_classifier()
+
+    Subclasses implement _classify_batch(texts) (and _aclassify_batch when
+    they have an async path), returning the local labels and the indices of
+    the texts they are unsure of.
+    """
+
+    def __init__(self, fallback=None, field="topic"):
+        self.fallback = coerce_to_runnable(fallback) if fallback is not None else None
+        self.field = field
+        self.routed = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def _classify_batch(self, texts):
+        raise NotImplementedError
+
+    async def _aclassify_batch(self, texts):
+        return self._classify_batch(texts)
+
+    def _decide(self, labels, unsure):
+        if self.fallback is None:
+            unsure = []
+        with self._lock:
+            self.routed += len(labels)
+            self.fallbacks += len(unsure)
+        return labels, unsure
+
+    def route_batch(self, texts, config=None):
+        """Labels for texts, in order, with one fallback batch for the unsure ones"""
+        if not texts:
+            return []
+        texts = list(texts)
+        labels, unsure = self._decide(*self._classify_batch(texts))
+        if unsure:
+            decided = self.fallback.batch([{self.field: texts[i]} for i in unsure], config)
+            for i, label in zip(unsure, decided):
+                labels[i] = label
+        return labels
+
+    async def aroute_batch(self, texts, config=None):
+        if not texts:
+            return []
+        texts = list(texts)
+        labels, unsure = self._decide(*await self._aclassify_batch(texts))
+        if unsure:
+            decided = await self.fallback.abatch([{self.field: texts[i]} for i in unsure], config)
+            for i, label in zip(unsure, decided):
+                labels[i] = label
+        return labels
+
+    def route(self, text, config=None):
+        return self.route_batch([text], config)[0]
+
+    async def aroute(self, text, config=None):
+        return (await self.aroute_batch([text], config))[0]
+
+    def as_classifier(self):
+        """Runnable taking the input dict and returning its label, for route_once"""
+        def classify(input_dict, config):
+            return self.route(input_dict.get(self.field, ""), config)
+
+        async def aclassify(input_dict, config):
+            return await self.aroute(input_dict.get(self.field, ""), config)
+
+        return RunnableLambda(classify, afunc=aclassify, name=type(self).__name__)
+
+    def stats(self):
+        return {
+            "routed": self.routed,
+            "fallbacks": self.fallbacks,
+            "fallback_rate": self.fallbacks / self.routed if self.routed else 0.0,
+        }
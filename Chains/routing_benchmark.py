@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for fake_models.py
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableBranch
+
+from fake_models import CountingFakeChatModel
+from routing import route_once
+
+# Compares the RunnableBranch sentiment router from conditional_chains.py
+# (classifier called inside every branch condition) with route_once
+# (classifier called once per input). Runs offline against fake models.
+
+LATENCY = 0.05
+
+def classify(prompt):
+    text = prompt.lower()
+    if "love" in text or "great" in text:
+        return "positive"
+    if "terrible" in text or "hate" in text:
+        return "negative"
+    return "neutral"
+
+classifier_model = CountingFakeChatModel(respond=classify, latency=LATENCY)
+answer_model = CountingFakeChatModel(latency=LATENCY)
+parser = StrOutputParser()
+
+sentiment_chain = ChatPromptTemplate.from_messages([
+    ("user", "Analyze the sentiment of this text and respond with ONLY one word: 'positive', 'negative', or 'neutral'. Text: {text}")
+]) | classifier_model | parser
+
+def route_by_sentiment(input_dict):
+    return sentiment_chain.invoke({"text": input_dict.get("text", "")}).strip().lower()
+
+def response_chain(tone):
+    return ChatPromptTemplate.from_messages([
+        ("user", "The user said: '{text}'. Respond " + tone + ".")
+    ]) | answer_model | parser
+
+positive_chain = response_chain("enthusiastically and positively")
+negative_chain = response_chain("empathetically and helpfully")
+neutral_chain = response_chain("neutrally and informatively")
+
+branch_router = RunnableBranch(
+    (lambda x: route_by_sentiment(x) == "positive", positive_chain),
+    (lambda x: route_by_sentiment(x) == "negative", negative_chain),
+    neutral_chain
+)
+
+once_router = route_once(
+    route_by_sentiment,
+    {"positive": positive_chain, "negative": negative_chain},
+    neutral_chain
+)
+
+inputs = [
+    {"text": "I love this product! It's amazing!"},
+    {"text": "This is terrible, I'm very disappointed."},
+    {"text": "The package arrived on Tuesday."},
+] * 10
+
+def run(name, router):
+    classifier_model.reset()
+    answer_model.reset()
+    start = time.perf_counter()
+    for input_dict in inputs:
+        router.invoke(input_dict)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<15} classifier calls/input: {classifier_model.calls / len(inputs):.2f}  "
+          f"answer calls/input: {answer_model.calls / len(inputs):.2f}  "
+          f"mean latency: {elapsed / len(inputs) * 1000:.1f} ms")
+    return elapsed
+
+print("=" * 70)
+print(f"Sentiment routing, {len(inputs)} inputs, {LATENCY * 1000:.0f} ms per model call")
+print("=" * 70)
+
+branch_time = run("RunnableBranch", branch_router)
+once_time = run("route_once", once_router)
+
+# route_once must classify each input exactly once and still answer once
+assert classifier_model.calls == len(inputs), classifier_model.calls
+assert answer_model.calls == len(inputs), answer_model.calls
+
+# Both routers must pick the same chain for every input
+for input_dict in inputs:
+    assert branch_router.invoke(input_dict) == once_router.invoke(input_dict)
+
+print(f"\nLatency cut: {(1 - once_time / branch_time) * 100:.0f}%")
@@ -0,0 +1,124 @@
+import hashlib
+import threading
+
+import numpy as np
+from langchain_core.runnables import RunnableBinding, RunnableLambda
+
+# Semantic response cache. The exact-match ResponseCache misses near-duplicate
+# questions ("What is an API?" vs "what's an api"); this cache embeds each
+# formatted prompt and serves the stored response of an earlier prompt when
+# their cosine similarity reaches `threshold`.
+#
+# Entries are scoped per prompt template and model, so an answer written for
+# the technical template is never served for the simple one. Each scope keeps
+# at most max_entries normalized vectors in a NumPy ring buffer; the oldest
+# entry is overwritten first.
+#
+#   semantic_cache = SemanticCache(OpenAIEmbeddings(model="text-embedding-3-small"))
+#   technical_chain = semantic_cache.wrap(technical_prompt, model) | parser
+
+
+class _ScopeIndex:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.vectors = None
+        self.responses = [None] * max_entries
+        self.prompts = [None] * max_entries
+        self.count = 0
+        self.next = 0
+
+    def search(self, vector):
+        if not self.count:
+            return None, -1.0
+        scores = self.vectors[:self.count] @ vector
+        best = int(np.argmax(scores))
+        return best, float(scores[best])
+
+    def add(self, vector, prompt, response):
+        if self.vectors is None:
+            self.vectors = np.empty((self.max_entries, len(vector)), dtype=np.float32)
+        self.vectors[self.next] = vector
+        self.prompts[self.next] = prompt
+        self.responses[self.next] = response
+        self.next = (self.next + 1) % self.max_entries
+        self.count = min(self.count + 1, self.max_entries)
+
+
+class SemanticCache:
+    """Serve stored responses for prompts similar to earlier ones.
+
+    embeddings:  LangChain Embeddings used to embed the formatted prompts
+    threshold:   minimum cosine similarity for a hit
+    max_entries: size cap of each scope
+    """
+
+    def __init__(self, embeddings, threshold=0.92, max_entries=10_000):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._scopes = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, scope, vector):
+        """Return (response, matched_prompt) for the closest entry above threshold, else (None, None)"""
+        with self._lock:
+            index = self._scopes.get(scope)
+            slot, score = index.search(vector) if index else (None, -1.0)
+            if slot is None or score < self.threshold:
+                self.misses += 1
+                return None, None
+            self.hits += 1
+            return index.responses[slot], index.prompts[slot]
+
+    def update(self, scope, vector, prompt, response):
+        with self._lock:
+            if scope not in self._scopes:
+                self._scopes[scope] = _ScopeIndex(self.max_entries)
+            self._scopes[scope].add(vector, prompt, response)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def wrap(self, prompt, model, scope=None):
+        """Runnable taking the prompt's input dict and returning the model's message.
+
+        scope defaults to the template text plus the model's configuration.
+        """
+        if scope is None:
+            if isinstance(model, RunnableBinding):
+                # bind_tools / bind(...): the bound parameters are part of the scope
+                llm_string = model.bound._get_llm_string(**model.kwargs)
+            else:
+                llm_string = model._get_llm_string()
+            scope = hashlib.sha256((prompt.pretty_repr() + "\0" + llm_string).encode("utf-8")).hexdigest()
+
+        def cached_call(input_dict, config):
+            prompt_value = prompt.invoke(input_dict, config)
+            text = prompt_value.to_string()
+            vector = self._normalize(self.embeddings.embed_query(text))
+            response, _ = self.lookup(scope, vector)
+            if response is None:
+                response = model.invoke(prompt_value, config)
+                self.update(scope, vector, text, response)
+            return response
+
+        async def acached_call(input_dict, config):
+            prompt_value = await prompt.ainvoke(input_dict, config)
+            text = prompt_value.to_string()
+            vector = self._normalize(await self.embeddings.aembed_query(text))
+            response, _ = self.lookup(scope, vector)
+            if response is None:
+                response = await model.ainvoke(prompt_value, config)
+                self.update(scope, vector, text, response)
+            return response
+
+        return RunnableLambda(cached_call, afunc=acached_call, name="SemanticCache")
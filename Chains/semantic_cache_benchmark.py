@@ -0,0 +1,75 @@
+import os
+import random
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for fake_models.py
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+from fake_models import CountingFakeChatModel, NgramFakeEmbeddings
+from semantic_cache import SemanticCache
+
+# Replays a synthetic query log of near-duplicate questions through the
+# technical chain from conditional_chains.py, with and without the semantic
+# cache, at several similarity thresholds. A "wrong hit" serves the answer
+# of a different underlying question.
+
+CHAT_LATENCY = 0.05
+EMBED_LATENCY = 0.005
+N_QUERIES = 1_000
+
+subjects = [
+    "an API", "a database index", "a REST protocol", "microservice architecture",
+    "a web framework", "a sorting algorithm", "a hash table", "TCP congestion control",
+    "garbage collection", "a compiler", "virtual memory", "a load balancer",
+    "public key cryptography", "a message queue", "container orchestration",
+    "a neural network", "gradient descent", "a binary search tree", "DNS resolution",
+    "a mutex", "event sourcing", "a CDN", "OAuth", "a bloom filter", "consistent hashing",
+]
+templates = [
+    "What is {s}?", "what is {s}", "What's {s}?", "what's {s}", "Can you explain {s}?",
+    "explain {s}", "What is {s} exactly?", "Tell me what {s} is",
+]
+
+random.seed(0)
+log = []
+for _ in range(N_QUERIES):
+    # A few popular questions dominate, like in a real query log
+    subject = random.choices(subjects, weights=[1 / (i + 1) for i in range(len(subjects))])[0]
+    log.append((subject, random.choice(templates).format(s=subject)))
+
+prompt = ChatPromptTemplate.from_messages([
+    ("user", "Provide a technical explanation of {query}")
+])
+parser = StrOutputParser()
+
+def replay(chain):
+    latencies = []
+    answers = []
+    for _, query in log:
+        start = time.perf_counter()
+        answers.append(chain.invoke({"query": query}))
+        latencies.append(time.perf_counter() - start)
+    return answers, sum(latencies) / len(latencies)
+
+def answer_subject(answer):
+    # The fake model echoes the prompt, so the answer names its question
+    return next(subject for subject in sorted(subjects, key=len, reverse=True) if subject in answer)
+
+model = CountingFakeChatModel(latency=CHAT_LATENCY)
+_, baseline = replay(prompt | model | parser)
+print("=" * 70)
+print(f"{N_QUERIES} queries over {len(subjects)} questions, "
+      f"{CHAT_LATENCY * 1000:.0f} ms chat / {EMBED_LATENCY * 1000:.0f} ms embedding calls")
+print("=" * 70)
+print(f"no cache          mean latency {baseline * 1000:5.1f} ms  model calls {model.calls}")
+
+for threshold in (0.95, 0.85, 0.75, 0.65):
+    model = CountingFakeChatModel(latency=CHAT_LATENCY)
+    cache = SemanticCache(NgramFakeEmbeddings(latency=EMBED_LATENCY), threshold=threshold)
+    answers, mean = replay(cache.wrap(prompt, model) | parser)
+    wrong = sum(answer_subject(answer) != subject for answer, (subject, _) in zip(answers, log))
+    print(f"threshold {threshold:.2f}   mean latency {mean * 1000:5.1f} ms  model calls {model.calls:4}  "
+          f"hit rate {cache.stats()['hit_rate']:.1%}  wrong hits {wrong}  "
+          f"saved {(baseline - mean) * 1000:5.1f} ms/query")
@@ -1,9 +1,10 @@
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for bootstrap.py
+from bootstrap import chat_model
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-
-load_dotenv()
+from map_reduce import MapReduceSummarizer
 
 prompt1 = ChatPromptTemplate.from_messages([
     ("user", "Generate a detailed report on {topic}.")
@@ -13,7 +14,7 @@ prompt2 = ChatPromptTemplate.from_messages([
     ("user", "Generate a 5 pointer summary from the following text \n {text}")
 ])
 
-model = ChatOpenAI()
+model = chat_model()
 
 parser = StrOutputParser()
 
@@ -33,5 +34,18 @@ parser = StrOutputParser()
 
 chain = prompt1 | model | parser | prompt2 | model | parser
 
-result = chain.invoke({"topic": "The future of AI"})
+# Map-reduce mode for long reports: stage one is streamed, each ~800-token
+# chunk is summarized as soon as it arrives (several at once), and the
+# partial summaries are merged before prompt2 writes the 5 pointer summary.
+summarizer = MapReduceSummarizer(model, prompt2 | model | parser, chunk_tokens=800)
+map_reduce_chain = summarizer.as_chain(prompt1 | model | parser)
+
+# "single" sends the whole report to one prompt2 call, "map_reduce" uses the
+# chunked summarization above
+SUMMARY_MODE = "single"
+
+if SUMMARY_MODE == "map_reduce":
+    result = map_reduce_chain.invoke({"topic": "The future of AI"})
+else:
+    result = chain.invoke({"topic": "The future of AI"})
 print(result)
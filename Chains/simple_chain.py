@@ -1,20 +1,33 @@
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for bootstrap.py
+from bootstrap import chat_model
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-
-load_dotenv()
+from response_cache import ResponseCache
+from instrumentation import ChainMetrics
 
 prompt = ChatPromptTemplate.from_messages([
     ("user", "Write a poem about {topic}.")
 ])
 
-model = ChatOpenAI(model="gpt-4o-mini")
+# Repeated prompts are answered from an on-disk cache. No temperature is set,
+# so the model samples; replaying its answers has to be opted into.
+cache = ResponseCache(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".response_cache.sqlite"),
+    allow_sampled=True
+)
+model = chat_model(model="gpt-4o-mini", cache=cache)
 
 parser = StrOutputParser()
 
 chain = prompt | model | parser
 
-print(chain.invoke({"topic": "courage"}))
+# Per-node timings and token counts, collected by a callback handler
+metrics = ChainMetrics()
+
+print(chain.invoke({"topic": "courage"}, config={"callbacks": [metrics]}))
+
+print(metrics.draw_ascii(chain.get_graph()))
 
-chain.get_graph().print_ascii()
+print(f"Response cache: {cache.stats()}")
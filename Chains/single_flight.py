@@ -0,0 +1,199 @@
+import asyncio
+import hashlib
+import json
+import threading
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import HumanMessage, convert_to_messages, messages_to_dict
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import RunnableBinding, RunnableLambda
+
+# Single-flight coalescing: identical calls that are in flight at the same
+# time share one upstream call. The first caller for a key starts it, every
+# caller that arrives before it finishes waits for it, and all of them get
+# its result (or its exception). Nothing is kept afterwards; this is not a
+# cache, so a later identical call goes upstream again.
+#
+# Async callers share an asyncio task, so a caller that is cancelled, the
+# first one included, only stops waiting; the upstream call is cancelled once
+# no caller is left. Threaded callers share the leading thread's call.
+#
+#   flight = SingleFlight()
+#   sentiment_chain = sentiment_prompt | flight.wrap(model) | parser
+#   embeddings = flight.wrap_embeddings(OpenAIEmbeddings(...))
+#   flight.stats()   # {"calls": ..., "upstream": ..., "coalesced": ...}
+
+
+def _messages_key(input):
+    if isinstance(input, PromptValue):
+        messages = input.to_messages()
+    elif isinstance(input, str):
+        messages = [HumanMessage(content=input)]
+    else:
+        messages = convert_to_messages(input)
+    return json.dumps(messages_to_dict(messages), sort_keys=True, default=str)
+
+
+def _llm_string(model):
+    # Model name and sampling parameters, as LangChain's own caches key them;
+    # bootstrap's lazy stand-ins resolve to the model they build
+    model = getattr(model, "target", model)
+    if isinstance(model, RunnableBinding):
+        return getattr(model.bound, "target", model.bound)._get_llm_string(**model.kwargs)
+    return model._get_llm_string()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Share one upstream call among identical calls in flight at the same time.
+
+    Keys are any hashable value; wrap() and wrap_embeddings() build them from
+    the formatted messages and the model's parameters, or the texts.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.upstream = 0
+        self.coalesced = 0
+        self.cancelled = 0  # upstream calls cancelled because every caller went away
+        self._threads = {}  # key -> _Flight
+        self._tasks = {}  # (loop, key) -> [task, waiting callers]
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """func() once for all threads calling with key at the same time"""
+        with self._lock:
+            self.calls += 1
+            flight = self._threads.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._threads[key] = _Flight()
+                self.upstream += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if isinstance(flight.error, Exception):
+                raise flight.error
+            if flight.error is not None:
+                # The leader was interrupted (KeyboardInterrupt, SystemExit):
+                # that is not an answer, so make the call again
+                return self.do(key, func)
+            return flight.result
+        try:
+            flight.result = func()
+            return flight.result
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._threads[key]
+            flight.done.set()
+
+    async def ado(self, key, func):
+        """await func() once for all coroutines awaiting with key at the same time"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.calls += 1
+            entry = self._tasks.get((loop, key))
+            if entry is None:
+                entry = [loop.create_task(func()), 0]
+                self._tasks[loop, key] = entry
+                entry[0].add_done_callback(lambda _, slot=(loop, key), entry=entry: self._forget(slot, entry))
+                self.upstream += 1
+            else:
+                self.coalesced += 1
+            entry[1] += 1
+        task = entry[0]
+        try:
+            # shield: cancelling one caller must not cancel the shared task
+            return await asyncio.shield(task)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                abandoned = entry[1] == 0 and not task.done()
+                if abandoned:
+                    self.cancelled += 1
+                    # Later callers start a fresh call instead of joining this one
+                    self._forget_locked((loop, key), entry)
+            if abandoned:
+                task.cancel()
+
+    def _forget(self, slot, entry):
+        with self._lock:
+            self._forget_locked(slot, entry)
+
+    def _forget_locked(self, slot, entry):
+        if self._tasks.get(slot) is entry:
+            del self._tasks[slot]
+
+    def wrap(self, model):
+        """Runnable calling the chat model, coalescing identical calls.
+
+        Calls are identical when their formatted messages and the model's
+        name and parameters are. Callers that join another's call get its
+        result but not their own callbacks, which only see the call they run.
+        """
+        llm_string = None
+
+        def key(input):
+            nonlocal llm_string
+            if llm_string is None:
+                llm_string = _llm_string(model)
+            return hashlib.sha256(f"{_messages_key(input)}\0{llm_string}".encode("utf-8")).hexdigest()
+
+        def call(input, config):
+            return self.do(key(input), lambda: model.invoke(input, config))
+
+        async def acall(input, config):
+            return await self.ado(key(input), lambda: model.ainvoke(input, config))
+
+        return RunnableLambda(call, afunc=acall, name="SingleFlight")
+
+    def wrap_embeddings(self, embeddings):
+        """Embeddings coalescing identical embed_query / embed_documents calls"""
+        return SingleFlightEmbeddings(self, embeddings)
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._threads) + len(self._tasks)
+        return {
+            "calls": self.calls,
+            "upstream": self.upstream,
+            "coalesced": self.coalesced,
+            "coalesced_rate": self.coalesced / self.calls if self.calls else 0.0,
+            "cancelled": self.cancelled,
+            "in_flight": in_flight,
+        }
+
+
+class SingleFlightEmbeddings(Embeddings):
+    """Embeddings whose identical in-flight calls share one upstream request"""
+
+    def __init__(self, flight, embeddings):
+        self.flight = flight
+        self.embeddings = embeddings
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        return self.flight.do((id(self.embeddings), "documents", tuple(texts)),
+                              lambda: self.embeddings.embed_documents(texts))
+
+    def embed_query(self, text):
+        return self.flight.do((id(self.embeddings), "query", text), lambda: self.embeddings.embed_query(text))
+
+    async def aembed_documents(self, texts):
+        texts = list(texts)
+        return await self.flight.ado((id(self.embeddings), "documents", tuple(texts)),
+                                     lambda: self.embeddings.aembed_documents(texts))
+
+    async def aembed_query(self, text):
+        return await self.flight.ado((id(self.embeddings), "query", text),
+                                     lambda: self.embeddings.aembed_query(text))
@@ -0,0 +1,172 @@
+import asyncio
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for fake_models.py
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+from fake_models import CountingFakeChatModel, FakeRateLimitError, NgramFakeEmbeddings
+from single_flight import SingleFlight
+
+# The sentiment chain of conditional_chains.py under a burst of concurrent
+# requests about a few trending texts, with and without SingleFlight in front
+# of the model. The fake model takes LATENCY per call and counts its calls.
+# Asyncio callers and threaded callers each run REQUESTS requests, CONCURRENCY
+# at a time; each request arrives up to ARRIVAL_SPREAD after the start. Then
+# the cancellation, error and embedding paths are checked against the counts.
+
+LATENCY = 0.2
+REQUESTS = 400
+CONCURRENCY = 100
+ARRIVAL_SPREAD = 2.0
+TRENDING = [f"Trending post number {i}: the new phone is amazing" for i in range(8)]
+
+rng = random.Random(0)
+inputs = [{"text": rng.choice(TRENDING)} for _ in range(REQUESTS)]
+arrivals = sorted(rng.uniform(0, ARRIVAL_SPREAD) for _ in range(REQUESTS))
+
+model = CountingFakeChatModel(respond=lambda prompt: "positive", latency=LATENCY)
+sentiment_prompt = ChatPromptTemplate.from_messages([
+    ("user", "Analyze the sentiment of this text and respond with ONLY one word: 'positive', 'negative', "
+             "or 'neutral'. Text: {text}")
+])
+parser = StrOutputParser()
+
+
+def report(name, latencies, flight=None):
+    line = (f"{name:<28} upstream calls {model.calls:4d}   mean {statistics.mean(latencies) * 1e3:6.1f} ms   "
+            f"max {max(latencies) * 1e3:6.1f} ms")
+    if flight is not None:
+        stats = flight.stats()
+        line += f"   coalesced {stats['coalesced']} ({stats['coalesced_rate']:.0%})"
+    print(line)
+
+
+async def run_async(chain):
+    model.reset()
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    begin = time.perf_counter()
+    latencies = []
+
+    async def one(input_dict, arrival):
+        await asyncio.sleep(max(0.0, begin + arrival - time.perf_counter()))
+        async with semaphore:
+            start = time.perf_counter()
+            result = await chain.ainvoke(input_dict)
+            latencies.append(time.perf_counter() - start)
+            return result
+
+    results = await asyncio.gather(*(one(input_dict, arrival) for input_dict, arrival in zip(inputs, arrivals)))
+    return results, latencies
+
+
+def run_threads(chain):
+    model.reset()
+    begin = time.perf_counter()
+    latencies = []
+
+    def one(args):
+        input_dict, arrival = args
+        time.sleep(max(0.0, begin + arrival - time.perf_counter()))
+        start = time.perf_counter()
+        result = chain.invoke(input_dict)
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    with ThreadPoolExecutor(CONCURRENCY) as pool:
+        results = list(pool.map(one, zip(inputs, arrivals)))
+    return results, latencies
+
+
+print(f"{REQUESTS} requests over {len(TRENDING)} texts, {CONCURRENCY} concurrent, model {LATENCY * 1e3:.0f} ms")
+plain_chain = sentiment_prompt | model | parser
+for mode, run in (("asyncio", lambda chain: asyncio.run(run_async(chain))), ("threads", run_threads)):
+    expected, latencies = run(plain_chain)
+    report(f"{mode}, one call each", latencies)
+    assert model.calls == REQUESTS
+
+    flight = SingleFlight()
+    results, latencies = run(sentiment_prompt | flight.wrap(model) | parser)
+    report(f"{mode}, single flight", latencies, flight)
+    stats = flight.stats()
+    assert results == expected
+    assert stats["upstream"] == model.calls and stats["upstream"] + stats["coalesced"] == REQUESTS
+    assert stats["in_flight"] == 0
+
+
+async def cancellation():
+    flight = SingleFlight()
+    chain = sentiment_prompt | flight.wrap(model) | parser
+    input_dict = {"text": TRENDING[0]}
+
+    # The caller that started the call goes away; the others still get the answer
+    model.reset()
+    leader = asyncio.create_task(chain.ainvoke(input_dict))
+    await asyncio.sleep(LATENCY / 4)
+    followers = [asyncio.create_task(chain.ainvoke(input_dict)) for _ in range(5)]
+    while flight.stats()["coalesced"] < 5:
+        await asyncio.sleep(0.001)
+    leader.cancel()
+    assert await asyncio.gather(*followers) == ["positive"] * 5
+    assert leader.cancelled() and model.calls == 1, model.calls
+
+    # Every caller goes away: the upstream call is cancelled too
+    model.reset()
+    callers = [asyncio.create_task(chain.ainvoke(input_dict)) for _ in range(5)]
+    await asyncio.sleep(LATENCY / 4)
+    for caller in callers:
+        caller.cancel()
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.sleep(0.01)
+    assert model.calls == 1 and model.in_flight == 0, (model.calls, model.in_flight)
+    assert flight.stats()["cancelled"] == 1 and flight.stats()["in_flight"] == 0
+
+    # A new caller after that starts a fresh call
+    model.reset()
+    assert await chain.ainvoke(input_dict) == "positive" and model.calls == 1
+    return flight.stats()
+
+
+print(f"cancellation: {asyncio.run(cancellation())}")
+
+# Errors reach every caller that shared the call, and are not kept
+failing = CountingFakeChatModel(latency=LATENCY, error_rate=1.0)
+flight = SingleFlight()
+chain = sentiment_prompt | flight.wrap(failing) | parser
+barrier = threading.Barrier(20)
+
+
+def failing_call(_):
+    barrier.wait()
+    try:
+        chain.invoke({"text": TRENDING[0]})
+    except FakeRateLimitError as error:
+        return error
+
+
+with ThreadPoolExecutor(20) as pool:
+    errors = list(pool.map(failing_call, range(20)))
+assert all(isinstance(error, FakeRateLimitError) for error in errors) and failing.calls == 1, failing.calls
+print(f"errors: 20 threaded callers, {failing.calls} upstream call, 20 FakeRateLimitError")
+
+# Embeddings: the same query from many threads and coroutines at once
+embeddings = NgramFakeEmbeddings(latency=LATENCY)
+coalescing = SingleFlight().wrap_embeddings(embeddings)
+with ThreadPoolExecutor(20) as pool:
+    vectors = list(pool.map(lambda _: coalescing.embed_query("trending phone"), range(20)))
+
+
+async def embed_concurrently():
+    return await asyncio.gather(*(coalescing.aembed_query("trending phone") for _ in range(20)))
+
+
+vectors += asyncio.run(embed_concurrently())
+assert all(vector == vectors[0] for vector in vectors)
+print(f"embeddings: 40 embed_query calls (20 threads, then 20 coroutines), {embeddings.requests} upstream requests, "
+      f"{coalescing.flight.stats()}")
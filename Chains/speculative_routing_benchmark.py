@@ -0,0 +1,152 @@
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for fake_models.py
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
+
+from fake_models import CountingFakeChatModel
+from routing import SpeculativeRouter, route_once
+
+# The topic-category router of conditional_chains.py (Example 3), sequential
+# (route_once) versus SpeculativeRouter starting the 1 or 2 most frequent
+# categories alongside the classifier. The classifier takes CLASSIFIER_LATENCY
+# and an answer ANSWER_LATENCY; topics are skewed like real traffic, 70%
+# science. REQUESTS requests run CONCURRENCY at a time, first as coroutines
+# (ainvoke), then on threads (invoke). On threads, speculative branches share
+# the router's pool of max_workers; with 2 branches per request there are
+# more branches than workers, and a branch still queued when the classifier
+# answers is cancelled without calling the model.
+
+CLASSIFIER_LATENCY = 0.1
+ANSWER_LATENCY = 0.2
+REQUESTS = 400
+CONCURRENCY = 20
+TOPICS = {
+    "science": ["photosynthesis", "black holes", "plate tectonics", "vaccines"],
+    "history": ["World War II", "the Roman empire"],
+    "technology": ["databases", "compilers"],
+    "general": ["gardening", "chess"],
+}
+WEIGHTS = {"science": 0.70, "history": 0.15, "technology": 0.10, "general": 0.05}
+
+
+def categorize(prompt):
+    for category, topics in TOPICS.items():
+        if any(topic in prompt for topic in topics):
+            return category
+    return "general"
+
+
+classifier_model = CountingFakeChatModel(respond=categorize, latency=CLASSIFIER_LATENCY)
+answer_model = CountingFakeChatModel(latency=ANSWER_LATENCY)
+parser = StrOutputParser()
+
+category_chain = ChatPromptTemplate.from_messages([
+    ("user", "Categorize this topic into ONE of these categories: 'science', 'history', 'technology', "
+             "or 'general'.\nTopic: {topic}\nRespond with ONLY the category name.")
+]) | classifier_model | parser
+
+
+def route_by_category_sync(input_dict):
+    return category_chain.invoke({"topic": input_dict["topic"]}).strip().lower()
+
+
+async def route_by_category(input_dict):
+    return (await category_chain.ainvoke({"topic": input_dict["topic"]})).strip().lower()
+
+
+classify = RunnableLambda(route_by_category_sync, afunc=route_by_category)
+
+
+def expert_chain(template):
+    return ChatPromptTemplate.from_messages([("user", template)]) | answer_model | parser
+
+
+branches = {
+    "science": expert_chain("As a science expert, explain: {topic}"),
+    "history": expert_chain("As a history expert, explain: {topic}"),
+    "technology": expert_chain("As a technology expert, explain: {topic}"),
+}
+general_chain = expert_chain("Explain: {topic}")
+
+rng = random.Random(0)
+inputs = []
+for _ in range(REQUESTS):
+    category = rng.choices(list(WEIGHTS), weights=list(WEIGHTS.values()))[0]
+    inputs.append({"topic": rng.choice(TOPICS[category])})
+
+
+async def run(router):
+    classifier_model.reset()
+    answer_model.reset()
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+
+    async def one(input_dict):
+        async with semaphore:
+            start = time.perf_counter()
+            result = await router.ainvoke(input_dict)
+            latencies.append(time.perf_counter() - start)
+            return result
+
+    results = await asyncio.gather(*(one(input_dict) for input_dict in inputs))
+    # Let cancelled speculative calls unwind before reading the counters
+    await asyncio.sleep(0.01)
+    latencies.sort()
+    return results, latencies
+
+
+def run_threads(router):
+    classifier_model.reset()
+    answer_model.reset()
+    latencies = []
+
+    def one(input_dict):
+        start = time.perf_counter()
+        result = router.invoke(input_dict)
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    with ThreadPoolExecutor(CONCURRENCY) as pool:
+        results = list(pool.map(one, inputs))
+    # Losing branches that had started finish in the background
+    while answer_model.in_flight:
+        time.sleep(0.01)
+    latencies.sort()
+    return results, latencies
+
+
+def report(name, latencies, extra=""):
+    print(f"{name:<24} mean {statistics.mean(latencies) * 1e3:6.1f} ms   "
+          f"p50 {statistics.median(latencies) * 1e3:6.1f} ms   "
+          f"p95 {latencies[int(len(latencies) * 0.95)] * 1e3:6.1f} ms   "
+          f"answer calls/request {answer_model.calls / REQUESTS:4.2f}{extra}")
+
+
+print(f"{REQUESTS} requests, classifier {CLASSIFIER_LATENCY * 1e3:.0f} ms, answer {ANSWER_LATENCY * 1e3:.0f} ms, "
+      f"{CONCURRENCY} concurrent")
+for mode, execute in (("async", lambda router: asyncio.run(run(router))), ("threads", run_threads)):
+    print(mode)
+    expected, latencies = execute(route_once(classify, branches, general_chain))
+    report("route_once", latencies)
+    baseline = statistics.mean(latencies)
+
+    for speculate in (1, 2):
+        speculative = SpeculativeRouter(classify, branches, general_chain, speculate=speculate)
+        results, latencies = execute(speculative.as_runnable())
+        stats = speculative.stats()
+        report(f"speculative, {speculate} branch{'es' if speculate > 1 else ''}", latencies,
+               f"   hit rate {stats['hit_rate']:.0%}   wasted calls/request {stats['wasted_calls_per_request']:.2f}"
+               f"   latency cut {(1 - statistics.mean(latencies) / baseline) * 100:.0f}%")
+        # Speculation must not change any answer, and every answer call
+        # beyond one per request is a counted wasted call
+        assert results == expected
+        assert classifier_model.calls == REQUESTS, classifier_model.calls
+        assert answer_model.calls == REQUESTS + stats["wasted_calls"], (answer_model.calls, stats)
@@ -0,0 +1,84 @@
+import json
+import os
+import sys
+import time
+from typing import TypedDict
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for fake_models.py and streaming_parser.py
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import JsonOutputParser, PydanticOutputParser
+from pydantic import BaseModel
+
+from fake_models import CountingFakeChatModel
+from streaming_parser import StreamingStructuredOutputParser
+
+# Time to first field of a streamed structured reply: PydanticOutputParser
+# (as in chain_with_structured_output.py) versus StreamingStructuredOutputParser.
+# The fake model takes 300 ms to the first token and 10 ms per word after it,
+# and answers with a MovieInfo-like object whose last field is a long plot.
+# PydanticOutputParser re-parses the buffer on each chunk and emits a model
+# once every required field has started, so its first output already holds
+# all four fields, with the plot cut off mid-sentence.
+#
+# The second part feeds the same reply, pre-chunked, straight into the
+# parsers to compare their CPU cost as the reply grows. JsonOutputParser is
+# LangChain's partial parser, which re-parses the whole buffer on each chunk.
+
+
+class MovieInfo(TypedDict):
+    title: str
+    year: int
+    genre: str
+    plot: str
+
+
+class MovieModel(BaseModel):
+    title: str
+    year: int
+    genre: str
+    plot: str
+
+
+def reply(plot_words):
+    return json.dumps({
+        "title": "Inception", "year": 2010, "genre": "Science fiction",
+        "plot": " ".join(["A thief enters dreams to plant an idea."] * (plot_words // 8)),
+    })
+
+
+prompt = ChatPromptTemplate.from_messages([("user", "Tell me about the movie {movie}")])
+model = CountingFakeChatModel(respond=lambda _: reply(200), latency=0.3, latency_per_output_token=0.01)
+
+print("Streaming from the fake model, 200-word plot")
+for name, parser in [
+    ("PydanticOutputParser", PydanticOutputParser(pydantic_object=MovieModel)),
+    ("StreamingStructuredOutputParser", StreamingStructuredOutputParser(schema_type=MovieInfo)),
+]:
+    chain = prompt | model | parser
+    start = time.perf_counter()
+    first = None
+    fields = {}
+    for output in chain.stream({"movie": "Inception"}):
+        now = time.perf_counter() - start
+        keys = output.keys() if isinstance(output, dict) else type(output).model_fields
+        for key in keys:
+            fields.setdefault(key, now)
+        first = first or now
+    total = time.perf_counter() - start
+    print(f"  {name:<32} first field {first * 1000:6.0f} ms   "
+          + "  ".join(f"{key} {at * 1000:.0f}" for key, at in fields.items())
+          + f"   done {total * 1000:.0f} ms")
+
+print("\nParser CPU time per reply (chunks of one word)")
+for plot_words in (200, 2000, 8000):
+    text = reply(plot_words)
+    chunks = text.split(" ")
+    chunks = [chunk + " " for chunk in chunks[:-1]] + chunks[-1:]
+    timings = []
+    for parser in (JsonOutputParser(), StreamingStructuredOutputParser(schema_type=MovieInfo)):
+        start = time.perf_counter()
+        outputs = list(parser.transform(iter(chunks)))
+        timings.append(time.perf_counter() - start)
+        assert outputs[-1] == json.loads(text)
+    print(f"  {len(chunks):>5} chunks: JsonOutputParser {timings[0] * 1000:8.1f} ms   "
+          f"StreamingStructuredOutputParser {timings[1] * 1000:6.1f} ms")
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import os
+import sys
+from collections import deque
+from typing import get_type_hints
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for token_count.py
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from token_count import approximate_tokens
+
+# Packed structured extraction: many items per request.
+#
+# structured_output_demo.py makes one with_structured_output call per movie,
+# so every item pays the full request overhead. BatchExtractor numbers the
+# inputs, sends as many as fit in one request, and asks for a list of
+# item-schema objects that carry the input's id:
+#
+#   extractor = BatchExtractor(model, MovieInfo, token_budget=4000)
+#   results = extractor.extract(["Inception", "Alien", ...])   # same order as the inputs
+#
+# Each returned item is validated on its own; only the items that are missing
+# or invalid go into a later request. A request that fails as a whole is
+# retried in halves. Each request is sized when it is sent, to fit the token
+# budget given the reply tokens per item seen so far. Items that still fail
+# after max_attempts come back as an exception in their result slot.
+
+extraction_prompt = ChatPromptTemplate.from_messages([
+    ("system", "Extract the requested information for every numbered item below. "
+               "Return exactly one entry per item and copy its number into the id field."),
+    ("human", "{items}")
+])
+
+
+class ExtractionError(Exception):
+    """An item that could not be extracted within max_attempts"""
+
+
+class BatchExtractor:
+    """Extract item_schema from many inputs with packed requests.
+
+    model:          chat model supporting with_structured_output
+    item_schema:    TypedDict or Pydantic model of one item (e.g. MovieInfo)
+    token_budget:   prompt plus expected reply tokens allowed per request
+    max_items:      upper bound on items per request
+    max_attempts:   requests an item may take part in before it is given up
+    max_concurrency: requests in flight at once
+    """
+
+    def __init__(self, model, item_schema, token_budget=4000, max_items=100, max_attempts=3,
+                 max_concurrency=8, count_tokens=approximate_tokens):
+        self.item_schema = item_schema
+        self.token_budget = token_budget
+        self.max_items = max_items
+        self.max_attempts = max_attempts
+        self.max_concurrency = max_concurrency
+        self.count_tokens = count_tokens
+        self.requests = 0
+        # Output tokens per item, learned from the replies
+        self.output_tokens_per_item = 50.0
+
+        item = convert_to_openai_tool(item_schema)["function"]
+        name = item["name"]
+        properties = {"id": {"type": "integer", "description": "Number of the input item"}}
+        properties.update(item["parameters"]["properties"])
+        self.batch_schema = {
+            "title": f"{name}Batch",
+            "description": f"{name} for each numbered input item",
+            "type": "object",
+            "properties": {"items": {"type": "array", "items": {
+                "type": "object",
+                "properties": properties,
+                "required": ["id"] + item["parameters"].get("required", []),
+            }}},
+            "required": ["items"],
+        }
+        self.chain = extraction_prompt | model.with_structured_output(self.batch_schema)
+
+        if isinstance(item_schema, type) and issubclass(item_schema, BaseModel):
+            self._validate = item_schema.model_validate
+        else:
+            # Field by field: pydantic rejects typing.TypedDict before Python 3.12
+            adapters = {key: TypeAdapter(hint) for key, hint in get_type_hints(item_schema).items()}
+            required = getattr(item_schema, "__required_keys__", adapters.keys())
+
+            def validate(data):
+                missing = [key for key in required if key not in data]
+                if missing:
+                    raise ValueError(f"missing {missing}")
+                return {key: adapters[key].validate_python(value) if key in adapters else value
+                        for key, value in data.items()}
+            self._validate = validate
+
+    def batch_size(self, inputs):
+        """Items per request that fit the token budget, from the first pending inputs"""
+        sample = inputs[:self.max_items]
+        prompt_tokens = self.count_tokens(extraction_prompt.messages[0].prompt.template)
+        per_item = sum(self.count_tokens(f"{i}: {text}\n") for i, text in enumerate(sample)) / max(len(sample), 1)
+        size = int((self.token_budget - prompt_tokens) / (per_item + self.output_tokens_per_item))
+        return max(1, min(self.max_items, size))
+
+    async def _request(self, batch):
+        # batch: list of (index, text); returns {index: value or exception}
+        items = "\n".join(f"{index}: {text}" for index, text in batch)
+        self.requests += 1
+        response = await self.chain.ainvoke({"items": items})
+        entries = (response or {}).get("items") or []
+        wanted = {index for index, _ in batch}
+        results = {}
+        for entry in entries:
+            data = dict(entry)
+            index = data.pop("id", None)
+            if index not in wanted or index in results:
+                continue
+            try:
+                results[index] = self._validate(data)
+            except (ValidationError, ValueError) as e:
+                results[index] = ExtractionError(f"item {index}: {e}")
+        if entries:
+            # Running average of reply tokens per returned item
+            observed = self.count_tokens(json.dumps(entries)) / len(entries)
+            self.output_tokens_per_item = 0.8 * self.output_tokens_per_item + 0.2 * observed
+        for index in wanted - results.keys():
+            results[index] = ExtractionError(f"item {index}: missing from the reply")
+        return results
+
+    async def aextract(self, inputs):
+        """Extract every input; returns results in input order"""
+        results = [None] * len(inputs)
+        attempts = [0] * len(inputs)
+        queue = deque(range(len(inputs)))
+        limit = self.max_items  # lowered after a whole request fails, raised again on success
+        running = {}
+        while queue or running:
+            # Size each request when it is sent, so it uses the latest estimates
+            while queue and len(running) < self.max_concurrency:
+                upcoming = [inputs[queue[i]] for i in range(min(len(queue), self.max_items))]
+                size = min(limit, self.batch_size(upcoming), len(queue))
+                batch = [queue.popleft() for _ in range(size)]
+                task = asyncio.ensure_future(self._request([(index, inputs[index]) for index in batch]))
+                running[task] = batch
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                batch = running.pop(task)
+                if task.exception() is not None:
+                    # The whole request failed: its items go back in smaller requests
+                    outcome = {index: task.exception() for index in batch}
+                    limit = max(1, len(batch) // 2)
+                else:
+                    outcome = task.result()
+                    limit = min(self.max_items, limit * 2)
+                for index, value in outcome.items():
+                    attempts[index] += 1
+                    results[index] = value
+                    if isinstance(value, Exception) and attempts[index] < self.max_attempts:
+                        queue.append(index)
+        return results
+
+    def extract(self, inputs):
+        return asyncio.run(self.aextract(inputs))
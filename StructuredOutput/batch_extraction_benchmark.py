@@ -0,0 +1,48 @@
+import asyncio
+import os
+import sys
+import time
+from typing import TypedDict
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for fake_models.py
+
+from batch_extraction import BatchExtractor
+from fake_models import FakeMovieModel, fake_movie
+
+# One structured call per movie (as in structured_output_demo.py) versus
+# packed requests, for TITLES movie titles with 8 requests in flight. The
+# fake model takes 200 ms per request plus 5 ms per movie in the reply; in
+# the packed runs 2% of items come back invalid and 1% are left out, so
+# retries are included.
+
+TITLES = 1000
+CONCURRENCY = 8
+
+
+class MovieInfo(TypedDict):
+    title: str
+    year: int
+    genre: str
+
+
+titles = [f"Movie number {i} ({'sequel ' * (i % 3)}edition)" for i in range(TITLES)]
+expected = [fake_movie(title) for title in titles]
+
+
+def report(name, elapsed, requests, results):
+    correct = sum(result == want for result, want in zip(results, expected))
+    print(f"{name:<28} {TITLES / elapsed:8.1f} items/s   {requests / TITLES:6.3f} requests/item   "
+          f"{elapsed:6.1f}s   {correct}/{TITLES} correct")
+
+
+model = FakeMovieModel(latency=0.2, latency_per_item=0.005)
+structured_model = model.with_structured_output(MovieInfo)
+start = time.perf_counter()
+results = asyncio.run(structured_model.abatch(titles, config={"max_concurrency": CONCURRENCY}))
+report("one call per item", time.perf_counter() - start, model.calls, results)
+
+for budget in (1000, 4000, 16000):
+    model = FakeMovieModel(latency=0.2, latency_per_item=0.005, invalid_rate=0.02, drop_rate=0.01)
+    extractor = BatchExtractor(model, MovieInfo, token_budget=budget, max_items=500, max_concurrency=CONCURRENCY)
+    start = time.perf_counter()
+    results = extractor.extract(titles)
+    report(f"packed, budget {budget}", time.perf_counter() - start, extractor.requests, results)
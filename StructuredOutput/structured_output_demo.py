@@ -1,17 +1,30 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repo root, for bootstrap.py and streaming_parser.py
+from bootstrap import chat_model
 from typing import TypedDict
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
-
-load_dotenv()  # Load .env file from parent directory (LANGCHAIN folder)
+from batch_extraction import BatchExtractor
+from streaming_parser import StreamingStructuredOutputParser
 
 class MovieInfo(TypedDict):
     title: str
     year: int
     genre: str
 
-model = ChatOpenAI(model="gpt-4o-mini")
+model = chat_model(model="gpt-4o-mini")
 
 structured_model = model.with_structured_output(MovieInfo)
 
 result = structured_model.invoke("Tell me about the movie Inception")
 print(result)
+
+# The same tool call, streamed: each field is printed as soon as it is complete
+streaming_model = model.bind_tools([MovieInfo], tool_choice="MovieInfo") | StreamingStructuredOutputParser(
+    schema_type=MovieInfo)
+for partial in streaming_model.stream("Tell me about the movie Inception"):
+    print(partial)
+
+# Many movies: packed into as few requests as fit the token budget
+extractor = BatchExtractor(model, MovieInfo, token_budget=4000)
+for movie in extractor.extract(["Inception", "The Matrix", "Spirited Away"]):
+    print(movie)
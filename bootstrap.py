@@ -0,0 +1,331 @@
+import importlib
+import os
+import sys
+import threading
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import Runnable
+
+# Shared start-up for the scripts in this repo.
+#
+# Importing langchain_openai pulls in the whole openai SDK (~2 s cold here,
+# more than everything else a script imports), and every script used to pay
+# that, plus reading .env and building its clients, before doing anything.
+# The factories below return stand-ins that import langchain_openai, load
+# .env (once per process) and build the real client on first use:
+#
+#   import os, sys
+#   sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+#   from bootstrap import chat_model
+#
+#   model = chat_model(model="gpt-4o-mini")    # nothing imported or built yet
+#   chain = prompt | model | parser
+#   chain.invoke(...)                          # ChatOpenAI built here
+#
+# The stand-ins are runnables/embeddings, so they compose and stream like the
+# real objects; any other attribute is looked up on the built client (or taken
+# from the constructor arguments, e.g. embeddings.dimensions).
+#
+# Benchmarks/startup_benchmark.py measures the difference.
+
+_env_loaded = False
+_env_lock = threading.Lock()
+
+
+def _find_env_file():
+    # Like load_dotenv(): the nearest .env at or above the running script
+    main = getattr(sys.modules.get("__main__"), "__file__", None)
+    directory = os.path.dirname(os.path.abspath(main)) if main else os.getcwd()
+    while True:
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            return path
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def load_env():
+    """Load the nearest .env into os.environ; only the first call in a process reads it.
+
+    Returns the path read, or None if there was none or it was already loaded.
+    """
+    global _env_loaded
+    with _env_lock:
+        if _env_loaded:
+            return None
+        _env_loaded = True
+        path = _find_env_file()
+        if path is not None:
+            from dotenv import load_dotenv
+            load_dotenv(path)
+        return path
+
+
+class _Deferred:
+    # Shared part of the stand-ins: builds the target once, on first use
+
+    def __init__(self, factory, kwargs):
+        self._factory = factory
+        self._kwargs = kwargs
+        self._target = None
+        self._build_lock = threading.Lock()
+
+    @property
+    def target(self):
+        if self._target is None:
+            with self._build_lock:
+                if self._target is None:
+                    self._target = self._factory()
+        return self._target
+
+    @property
+    def built(self):
+        return self._target is not None
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name in self._kwargs:
+            return self._kwargs[name]
+        return getattr(self.target, name)
+
+
+class LazyRunnable(_Deferred, Runnable):
+    """Runnable that builds the runnable it stands for on first use"""
+
+    def __init__(self, factory, name, kwargs=None):
+        super().__init__(factory, kwargs or {})
+        self.name = name
+
+    # Any: the real input/output types are only known once the target is built
+    @property
+    def InputType(self):
+        return object
+
+    @property
+    def OutputType(self):
+        return object
+
+    def invoke(self, input, config=None, **kwargs):
+        return self.target.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        return await self.target.ainvoke(input, config, **kwargs)
+
+    def batch(self, inputs, config=None, *, return_exceptions=False, **kwargs):
+        return self.target.batch(inputs, config, return_exceptions=return_exceptions, **kwargs)
+
+    async def abatch(self, inputs, config=None, *, return_exceptions=False, **kwargs):
+        return await self.target.abatch(inputs, config, return_exceptions=return_exceptions, **kwargs)
+
+    def stream(self, input, config=None, **kwargs):
+        return self.target.stream(input, config, **kwargs)
+
+    def astream(self, input, config=None, **kwargs):
+        return self.target.astream(input, config, **kwargs)
+
+    def transform(self, input, config=None, **kwargs):
+        return self.target.transform(input, config, **kwargs)
+
+    def atransform(self, input, config=None, **kwargs):
+        return self.target.atransform(input, config, **kwargs)
+
+    # Model name plus parameters, which LangChain's caches and SemanticCache
+    # key on; __getattr__ does not forward private names
+    def _get_llm_string(self, stop=None, **kwargs):
+        return self.target._get_llm_string(stop=stop, **kwargs)
+
+    # Chat model methods that return a new runnable stay deferred too
+    def with_structured_output(self, schema, **kwargs):
+        return LazyRunnable(lambda: self.target.with_structured_output(schema, **kwargs), self.name)
+
+    def bind_tools(self, tools, **kwargs):
+        return LazyRunnable(lambda: self.target.bind_tools(tools, **kwargs), self.name)
+
+
+class LazyEmbeddings(_Deferred, Embeddings):
+    """Embeddings that build the embeddings client they stand for on first use"""
+
+    def embed_documents(self, texts):
+        return self.target.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.target.embed_query(text)
+
+    async def aembed_documents(self, texts):
+        return await self.target.aembed_documents(texts)
+
+    async def aembed_query(self, text):
+        return await self.target.aembed_query(text)
+
+
+# ----------------------------------------------------------------------
+# Shared clients
+# ----------------------------------------------------------------------
+#
+# chat_model(), completion_model() and embedding_model() return one instance
+# per distinct set of arguments, so every chatbot or session asking for the
+# same model shares it. All the clients they build talk to their API host
+# through one ConnectionPool: keep-alive httpx clients (sync and async) with a
+# per-host connection limit, instead of a pool per client object that every
+# new client fills with fresh TCP/TLS handshakes.
+#
+#   model = chat_model(model="gpt-4o-mini")   # same object on every call
+#   ...
+#   print(pool_stats())   # {"https://api.openai.com": {"requests": ..., "connections_opened": ...}}
+
+MAX_CONNECTIONS_PER_HOST = 256
+KEEPALIVE_EXPIRY = 60.0  # seconds an idle connection is kept open
+
+
+class ConnectionPool:
+    """Keep-alive httpx clients for one API host, with usage counters.
+
+    client / async_client share the limits but not connections: a process
+    using both opens up to max_connections of each.
+    """
+
+    def __init__(self, max_connections=MAX_CONNECTIONS_PER_HOST, keepalive_expiry=KEEPALIVE_EXPIRY):
+        import openai
+        # The httpx flavour the installed openai SDK is built on (httpx2 for
+        # openai>=3), read off its public client class
+        client_class = next(cls for cls in openai.DefaultHttpxClient.__mro__ if cls.__name__ == "Client")
+        httpx = sys.modules[client_class.__module__.partition(".")[0]]
+
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                              keepalive_expiry=keepalive_expiry)
+        self.max_connections = max_connections
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self._lock = threading.Lock()
+        # The SDK's client classes keep its timeouts and redirect handling
+        self.client = openai.DefaultHttpxClient(limits=limits, event_hooks={"request": [self._on_request]})
+        self.async_client = openai.DefaultAsyncHttpxClient(limits=limits,
+                                                           event_hooks={"request": [self._on_async_request]})
+
+    # httpcore reports connection and request events through the "trace"
+    # request extension; the sync client needs a plain callback, the async
+    # one a coroutine function
+    def _trace(self, event, info):
+        with self._lock:
+            if event.endswith("send_request_headers.started"):
+                self.requests += 1
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            elif event.endswith(("response_closed.complete", "response_closed.failed")):
+                self.in_flight -= 1
+            elif event == "connection.connect_tcp.complete":
+                self.connections_opened += 1
+            elif event == "connection.start_tls.complete":
+                self.tls_handshakes += 1
+
+    async def _atrace(self, event, info):
+        self._trace(event, info)
+
+    def _on_request(self, request):
+        request.extensions["trace"] = self._trace
+
+    async def _on_async_request(self, request):
+        request.extensions["trace"] = self._atrace
+
+    def open_connections(self):
+        # httpx keeps its connection pool private; count what it holds if we can
+        try:
+            return sum(len(client._transport._pool.connections) for client in (self.client, self.async_client))
+        except AttributeError:
+            return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "connections_opened": self.connections_opened,
+                "tls_handshakes": self.tls_handshakes,
+                "open_connections": self.open_connections(),
+                "max_connections": self.max_connections,
+                # Share of the connection limit in use, now and at the peak
+                "utilization": self.in_flight / self.max_connections,
+                "peak_utilization": self.peak_in_flight / self.max_connections,
+                # Requests that went out on an already open connection
+                "reuse_ratio": 1 - self.connections_opened / self.requests if self.requests else None,
+            }
+
+
+_registry = {}
+_pools = {}
+_registry_lock = threading.Lock()
+
+
+def _host(base_url):
+    from urllib.parse import urlsplit
+
+    parts = urlsplit(base_url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def connection_pool(base_url=None):
+    """The process-wide ConnectionPool for base_url's host (OPENAI_BASE_URL or the OpenAI API by default)"""
+    load_env()
+    host = _host(base_url or os.environ.get("OPENAI_BASE_URL") or "https://api.openai.com/v1")
+    with _registry_lock:
+        pool = _pools.get(host)
+        if pool is None:
+            pool = _pools[host] = ConnectionPool()
+        return pool
+
+
+def pool_stats():
+    """ConnectionPool.stats() of every host used so far"""
+    with _registry_lock:
+        pools = dict(_pools)
+    return {host: pool.stats() for host, pool in pools.items()}
+
+
+def _shared(kind, kwargs, make):
+    # Arguments that cannot be hashed (lists, dicts) are keyed by their repr
+    key = []
+    for name, value in sorted(kwargs.items()):
+        try:
+            hash(value)
+        except TypeError:
+            value = repr(value)
+        key.append((name, value))
+    key = (kind, tuple(key))
+    with _registry_lock:
+        instance = _registry.get(key)
+        if instance is None:
+            instance = _registry[key] = make()
+        return instance
+
+
+def _openai_factory(name, kwargs):
+    def build():
+        load_env()
+        pool = connection_pool(kwargs.get("base_url") or kwargs.get("openai_api_base"))
+        cls = getattr(importlib.import_module("langchain_openai"), name)
+        return cls(**{"http_client": pool.client, "http_async_client": pool.async_client, **kwargs})
+    return build
+
+
+def chat_model(**kwargs):
+    """The shared ChatOpenAI(**kwargs), built on first use"""
+    return _shared("ChatOpenAI", kwargs,
+                   lambda: LazyRunnable(_openai_factory("ChatOpenAI", kwargs), "ChatOpenAI", kwargs))
+
+
+def completion_model(**kwargs):
+    """The shared OpenAI(**kwargs) completion model, built on first use"""
+    return _shared("OpenAI", kwargs, lambda: LazyRunnable(_openai_factory("OpenAI", kwargs), "OpenAI", kwargs))
+
+
+def embedding_model(**kwargs):
+    """The shared OpenAIEmbeddings(**kwargs), built on first use"""
+    return _shared("OpenAIEmbeddings", kwargs,
+                   lambda: LazyEmbeddings(_openai_factory("OpenAIEmbeddings", kwargs), kwargs))
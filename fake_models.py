@@ -0,0 +1,318 @@
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from typing import Callable
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+from token_count import approximate_tokens, message_tokens
+
+# Offline stand-ins for ChatOpenAI and OpenAIEmbeddings so the scripts in this
+# repo can be exercised and benchmarked without API keys. Benchmarks in a
+# subfolder reach it like bootstrap.py, with the repo root on sys.path.
+
+
+def echo(prompt):
+    return prompt
+
+
+def sample_latency(rng, mean, distribution="fixed", jitter=0.0):
+    """One latency draw around mean.
+
+    fixed:       always mean
+    uniform:     mean * [1 - jitter, 1 + jitter]
+    exponential: exponential with the given mean (jitter unused)
+    lognormal:   lognormal with the given mean and sigma = jitter, for long tails
+    """
+    if mean <= 0 or distribution == "fixed":
+        return max(mean, 0.0)
+    if distribution == "uniform":
+        return mean * rng.uniform(1 - jitter, 1 + jitter)
+    if distribution == "exponential":
+        return rng.expovariate(1 / mean)
+    if distribution == "lognormal":
+        return mean * rng.lognormvariate(-jitter * jitter / 2, jitter)
+    raise ValueError(f"Unknown latency distribution {distribution!r}")
+
+
+class FakeRateLimitError(Exception):
+    """Mimics openai.RateLimitError, which carries status_code 429"""
+
+    status_code = 429
+
+
+class CountingFakeChatModel(BaseChatModel):
+    """Fake chat model that answers with respond(prompt) and counts its calls.
+
+    With tools bound (bind_tools, with_structured_output) the reply text is
+    parsed as JSON and returned as the arguments of a call to the first tool.
+    """
+
+    # Receives the text of the last message and returns the reply text
+    respond: Callable[[str], str] = echo
+    # Seconds each call takes, to mimic a network round trip
+    latency: float = 0.0
+    # Spread of that latency per call, see sample_latency
+    latency_distribution: str = "fixed"
+    latency_jitter: float = 0.0
+    # Extra seconds per prompt token (reading the input, by message_tokens)
+    # and per reply word (generating the output), so bigger prompts and
+    # answers take longer
+    latency_per_input_token: float = 0.0
+    latency_per_output_token: float = 0.0
+    # Reported in the cache key like a real model's sampling parameter
+    temperature: float = 0.0
+    # Fraction of calls that fail with FakeRateLimitError after the latency
+    error_rate: float = 0.0
+    seed: int = 0
+    calls: int = 0
+    errors: int = 0
+    # Calls running right now, and the most seen at once
+    in_flight: int = 0
+    max_in_flight: int = 0
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _random: random.Random = PrivateAttr(default=None)
+
+    @property
+    def _llm_type(self):
+        return "counting-fake-chat-model"
+
+    @property
+    def _identifying_params(self):
+        return {"temperature": self.temperature}
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools])
+
+    def _rng(self):
+        # Call with self._lock held
+        if self._random is None:
+            self._random = random.Random(self.seed)
+        return self._random
+
+    def _start(self, messages):
+        # Returns the reply plus the delay before the first word and per word
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            latency = sample_latency(self._rng(), self.latency, self.latency_distribution, self.latency_jitter)
+        text = self.respond(messages[-1].content)
+        prompt_tokens = sum(message_tokens(message) for message in messages)
+        return text, latency + self.latency_per_input_token * prompt_tokens, self.latency_per_output_token
+
+    def _end(self, failed=False):
+        with self._lock:
+            self.in_flight -= 1
+            if failed:
+                self.errors += 1
+
+    def _fails(self):
+        with self._lock:
+            return self.error_rate and self._rng().random() < self.error_rate
+
+    def _result(self, text, tools=None):
+        if self._fails():
+            self._end(failed=True)
+            raise FakeRateLimitError("Rate limit reached (fake)")
+        self._end()
+        if tools:
+            call = {"name": tools[0]["function"]["name"], "args": json.loads(text), "id": f"call_{self.calls}"}
+            message = AIMessage(content="", tool_calls=[call])
+        else:
+            message = AIMessage(content=text)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, tools=None, **kwargs):
+        text, first, per_word = self._start(messages)
+        time.sleep(first + per_word * len(text.split()))
+        return self._result(text, tools)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, tools=None, **kwargs):
+        text, first, per_word = self._start(messages)
+        try:
+            await asyncio.sleep(first + per_word * len(text.split()))
+        except asyncio.CancelledError:
+            self._end()
+            raise
+        return self._result(text, tools)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        text, first, per_word = self._start(messages)
+        try:
+            time.sleep(first)
+            if self._fails():
+                self.errors += 1
+                raise FakeRateLimitError("Rate limit reached (fake)")
+            # Sleep against a schedule so per-chunk overhead does not add up
+            begin = time.monotonic()
+            for i, word in enumerate(re.findall(r"\S+\s*", text), 1):
+                time.sleep(max(0.0, begin + i * per_word - time.monotonic()))
+                yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+        finally:
+            self._end()
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        text, first, per_word = self._start(messages)
+        try:
+            await asyncio.sleep(first)
+            if self._fails():
+                self.errors += 1
+                raise FakeRateLimitError("Rate limit reached (fake)")
+            begin = time.monotonic()
+            for i, word in enumerate(re.findall(r"\S+\s*", text), 1):
+                await asyncio.sleep(max(0.0, begin + i * per_word - time.monotonic()))
+                yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+        finally:
+            self._end()
+
+    def reset(self):
+        """Reset the call counters"""
+        self.calls = 0
+        self.errors = 0
+        self.max_in_flight = 0
+
+
+class NgramFakeEmbeddings(Embeddings):
+    """Offline embeddings from hashed character trigrams.
+
+    Texts that share most of their characters ("What is an API?" and
+    "what's an api") get similar vectors, which is enough to exercise
+    similarity-based code without a real embedding model. Each request
+    (embed_query or one embed_documents call) takes latency, drawn as in
+    sample_latency, plus per_text_latency for each text it carries.
+    """
+
+    def __init__(self, dimensions=256, latency=0.0, latency_distribution="fixed", latency_jitter=0.0,
+                 per_text_latency=0.0, error_rate=0.0, seed=0):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.latency_distribution = latency_distribution
+        self.latency_jitter = latency_jitter
+        self.per_text_latency = per_text_latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.texts_embedded = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _request(self, texts):
+        # Returns this request's latency, or raises like a failed API call
+        with self._lock:
+            self.requests += 1
+            latency = sample_latency(self._random, self.latency, self.latency_distribution, self.latency_jitter)
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.errors += 1
+                raise FakeRateLimitError("Rate limit reached (fake)")
+            self.texts_embedded += len(texts)
+        return latency + self.per_text_latency * len(texts)
+
+    def _vector(self, text):
+        text = " " + re.sub(r"[^a-z0-9 ]", "", text.lower()) + " "
+        vector = [0.0] * self.dimensions
+        for i in range(len(text) - 2):
+            vector[zlib.crc32(text[i:i + 3].encode("utf-8")) % self.dimensions] += 1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts):
+        latency = self._request(texts)
+        if latency:
+            time.sleep(latency)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts):
+        latency = self._request(texts)
+        if latency:
+            await asyncio.sleep(latency)
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text):
+        return (await self.aembed_documents([text]))[0]
+
+    def reset(self):
+        """Reset the request counters"""
+        self.requests = 0
+        self.texts_embedded = 0
+        self.errors = 0
+
+
+GENRES = ["Drama", "Comedy", "Science fiction", "Thriller", "Animation", "Documentary"]
+ITEM_LINE = re.compile(r"^(\d+): (.*)$", re.MULTILINE)
+
+
+def fake_movie(title):
+    digest = zlib.crc32(title.encode("utf-8"))
+    return {"title": title, "year": 1950 + digest % 75, "genre": GENRES[digest % len(GENRES)]}
+
+
+class FakeMovieModel(CountingFakeChatModel):
+    """Answers MovieInfo tool calls, one movie or a numbered batch per request.
+
+    A request takes latency plus latency_per_item for each movie in the reply.
+    invalid_rate and drop_rate make that fraction of batch items come back with
+    a bad year or not at all; prompts over max_prompt_tokens fail outright.
+    """
+
+    latency: float = 0.5
+    latency_per_item: float = 0.02
+    invalid_rate: float = 0.0
+    drop_rate: float = 0.0
+    max_prompt_tokens: int = 16_000
+
+    @property
+    def _llm_type(self):
+        return "fake-movie-model"
+
+    def _reply(self, messages, tools):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        prompt = "\n".join(str(message.content) for message in messages)
+        if approximate_tokens(prompt) > self.max_prompt_tokens:
+            raise ValueError("This model's maximum context length was exceeded (fake)")
+        name = tools[0]["function"]["name"]
+        if "items" not in tools[0]["function"]["parameters"]["properties"]:
+            # One movie per request, as in structured_output_demo.py
+            args = fake_movie(str(messages[-1].content))
+            count = 1
+        else:
+            items = []
+            for index, title in ITEM_LINE.findall(str(messages[-1].content)):
+                with self._lock:
+                    roll = self._rng().random()
+                if roll < self.drop_rate:
+                    continue
+                item = {"id": int(index), **fake_movie(title)}
+                if roll < self.drop_rate + self.invalid_rate:
+                    item["year"] = "unknown"
+                items.append(item)
+            args = {"items": items}
+            count = len(items)
+        message = AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"call_{call}"}])
+        return ChatResult(generations=[ChatGeneration(message=message)]), self.latency + self.latency_per_item * count
+
+    def _generate(self, messages, stop=None, run_manager=None, tools=(), **kwargs):
+        result, delay = self._reply(messages, tools)
+        time.sleep(delay)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, tools=(), **kwargs):
+        result, delay = self._reply(messages, tools)
+        await asyncio.sleep(delay)
+        return result
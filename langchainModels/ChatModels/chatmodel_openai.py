@@ -1,9 +1,9 @@
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # repo root, for bootstrap.py
+from bootstrap import chat_model
 
-load_dotenv()
-
-model = ChatOpenAI(model="gpt-5-nano", temperature=0.7) #this temperature param is used to control the randomness of the output
+model = chat_model(model="gpt-5-nano", temperature=0.7) #this temperature param is used to control the randomness of the output
 
 result = model.invoke("Suggest me girl names starting from A?") #in invoke we pass the input prompt to the model
 
@@ -0,0 +1,50 @@
+import tempfile
+import time
+
+import numpy as np
+
+from ann_index import IVFIndex
+from similarity import SimilarityIndex
+
+# Recall@k and queries per second of IVFIndex against exact search on
+# synthetic clustered 32-d embeddings, for a range of nprobe settings.
+
+DIMENSIONS = 32
+N_VECTORS = 500_000
+N_QUERIES = 1_000
+K = 10
+
+rng = np.random.default_rng(0)
+centers = rng.standard_normal((2_000, DIMENSIONS))
+def sample(n):
+    return (centers[rng.integers(len(centers), size=n)]
+            + 0.8 * rng.standard_normal((n, DIMENSIONS))).astype(np.float32)
+
+vectors = sample(N_VECTORS)
+queries = sample(N_QUERIES)
+
+start = time.perf_counter()
+exact_ids, _ = SimilarityIndex(vectors).top_k(queries, k=K)
+exact_qps = N_QUERIES / (time.perf_counter() - start)
+
+start = time.perf_counter()
+index = IVFIndex.build(vectors[:-50_000])
+print(f"Built IVF index over {N_VECTORS - 50_000:,} vectors, {index.n_lists} lists "
+      f"in {time.perf_counter() - start:.1f} s")
+start = time.perf_counter()
+for block in np.array_split(vectors[-50_000:], 10):
+    index.add(block)
+print(f"Inserted 50,000 more vectors in {time.perf_counter() - start:.2f} s\n")
+
+with tempfile.TemporaryDirectory() as path:
+    index.save(path)
+    index = IVFIndex.load(path)
+
+    print(f"exact        recall@{K}: 1.000  {exact_qps:8.0f} QPS")
+    for nprobe in (1, 2, 4, 8, 16, 32):
+        start = time.perf_counter()
+        ids, _ = index.search(queries, k=K, nprobe=nprobe)
+        qps = N_QUERIES / (time.perf_counter() - start)
+        recall = np.mean([len(np.intersect1d(a, b)) / K for a, b in zip(ids, exact_ids)])
+        print(f"nprobe={nprobe:<4} recall@{K}: {recall:.3f}  {qps:8.0f} QPS")
+    del index
@@ -0,0 +1,178 @@
+import json
+import os
+
+import numpy as np
+
+from similarity import SimilarityIndex, normalize
+
+# Approximate nearest-neighbour search with an inverted file (IVF) index in
+# pure NumPy. Spherical k-means splits the normalized vectors into n_lists
+# clusters; a query is compared with the centroids and then only with the
+# vectors of its nprobe closest clusters. Raising nprobe trades latency for
+# recall.
+#
+# The vectors are stored grouped by cluster (a CSR layout: list l owns rows
+# offsets[l]:offsets[l + 1]), so probing a cluster reads one contiguous
+# slice. Inserts go to a small pending buffer that is searched exhaustively
+# and folded into the grouped arrays once it grows past merge_threshold.
+# save() writes plain .npy files so load() can memory-map them.
+
+
+def nearest_centroid(centroids, vectors, block=4096):
+    """Index of the most similar centroid for each (normalized) vector"""
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block):
+        assignment[start:start + block] = np.argmax(vectors[start:start + block] @ centroids.T, axis=1)
+    return assignment
+
+
+def train_centroids(vectors, n_lists, iterations=10, seed=0):
+    """Spherical k-means: unit-length centroids of the (normalized) vectors"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = nearest_centroid(centroids, vectors)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=n_lists)
+        # Re-seed empty clusters with random vectors
+        empty = np.flatnonzero(counts == 0)
+        sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        centroids = normalize(sums)
+    return centroids
+
+
+class IVFIndex:
+    """Inverted-file ANN index over cosine similarity.
+
+    Build one with IVFIndex.build(matrix) or IVFIndex.load(path). Row ids
+    are assigned in insertion order, starting at 0.
+    """
+
+    def __init__(self, centroids, vectors, ids, offsets, nprobe=8, merge_threshold=10_000):
+        self.centroids = centroids
+        self.vectors = vectors
+        self.ids = ids
+        self.offsets = offsets
+        self.nprobe = nprobe
+        self.merge_threshold = merge_threshold
+        self._pending_vectors = []
+        self._pending_lists = []
+        self._pending_count = 0
+        self._next_id = int(ids.max()) + 1 if len(ids) else 0
+
+    @classmethod
+    def build(cls, matrix, n_lists=None, nprobe=8, train_size=None, iterations=10, seed=0):
+        vectors = normalize(matrix)
+        n_lists = n_lists or max(1, int(4 * np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+        train_size = min(len(vectors), train_size or 64 * n_lists)
+        sample = vectors[np.random.default_rng(seed).choice(len(vectors), train_size, replace=False)]
+        centroids = train_centroids(sample, n_lists, iterations, seed)
+
+        index = cls(
+            centroids,
+            np.empty((0, vectors.shape[1]), dtype=np.float32),
+            np.empty(0, dtype=np.int64),
+            np.zeros(n_lists + 1, dtype=np.int64),
+            nprobe=nprobe,
+        )
+        index._append(vectors)
+        index.merge()
+        return index
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    def __len__(self):
+        return len(self.ids) + self._pending_count
+
+    def _assign(self, vectors):
+        return nearest_centroid(self.centroids, vectors)
+
+    def _append(self, vectors):
+        ids = np.arange(self._next_id, self._next_id + len(vectors))
+        self._next_id += len(vectors)
+        self._pending_vectors.append((ids, vectors))
+        self._pending_lists.append(self._assign(vectors))
+        self._pending_count += len(vectors)
+        return ids
+
+    def add(self, matrix):
+        """Insert vectors and return their ids"""
+        ids = self._append(normalize(matrix))
+        if self._pending_count >= self.merge_threshold:
+            self.merge()
+        return ids
+
+    def merge(self):
+        """Fold the pending inserts into the cluster-grouped arrays"""
+        if not self._pending_count:
+            return
+        new_ids = np.concatenate([ids for ids, _ in self._pending_vectors])
+        new_vectors = np.concatenate([vectors for _, vectors in self._pending_vectors])
+        new_lists = np.concatenate(self._pending_lists)
+
+        old_lists = np.repeat(np.arange(self.n_lists), np.diff(self.offsets))
+        lists = np.concatenate([old_lists, new_lists])
+        order = np.argsort(lists, kind="stable")
+        self.vectors = np.concatenate([self.vectors, new_vectors])[order]
+        self.ids = np.concatenate([self.ids, new_ids])[order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(lists, minlength=self.n_lists))])
+
+        self._pending_vectors = []
+        self._pending_lists = []
+        self._pending_count = 0
+
+    def search(self, queries, k=10, nprobe=None):
+        """Return (ids, scores) of the approximate k nearest rows for each query.
+
+        Both arrays have shape (len(queries), k), best match first; rows with
+        fewer than k candidates are padded with id -1 and score -inf.
+        """
+        queries = normalize(queries)
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        probes, _ = SimilarityIndex(self.centroids, normalized=True).top_k(queries, k=nprobe)
+
+        if self._pending_count:
+            pending_ids = np.concatenate([ids for ids, _ in self._pending_vectors])
+            pending_vectors = np.concatenate([vectors for _, vectors in self._pending_vectors])
+
+        result_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        result_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        starts, ends = self.offsets[:-1], self.offsets[1:]
+        for row, (query, lists) in enumerate(zip(queries, probes)):
+            rows = np.concatenate([np.arange(starts[l], ends[l]) for l in lists])
+            candidate_ids = self.ids[rows]
+            scores = self.vectors[rows] @ query
+            if self._pending_count:
+                candidate_ids = np.concatenate([candidate_ids, pending_ids])
+                scores = np.concatenate([scores, pending_vectors @ query])
+            if len(scores) > k:
+                top = np.argpartition(scores, -k)[-k:]
+                candidate_ids, scores = candidate_ids[top], scores[top]
+            order = np.argsort(-scores)
+            result_ids[row, :len(order)] = candidate_ids[order]
+            result_scores[row, :len(order)] = scores[order]
+        return result_ids, result_scores
+
+    def save(self, path):
+        self.merge()
+        os.makedirs(path, exist_ok=True)
+        for name in ("centroids", "vectors", "ids", "offsets"):
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"nprobe": self.nprobe, "merge_threshold": self.merge_threshold}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a saved index; with mmap the arrays are mapped, not read into memory"""
+        mode = "r" if mmap else None
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+            for name in ("centroids", "vectors", "ids", "offsets")
+        }
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        return cls(**arrays, **meta)
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # repo root, for token_count.py
+
+import numpy as np
+
+from token_count import default_count_tokens
+
+# Bulk embedding on top of any LangChain Embeddings object (OpenAIEmbeddings,
+# FakeEmbeddings, ...). Instead of one embed_query round trip per sentence,
+# the texts are packed into requests capped by token count, several requests
+# run at once, and the vectors land in one contiguous float32 matrix whose
+# row i is the embedding of texts[i].
+
+# OpenAI accepts at most 2048 inputs and 300k tokens per embeddings request.
+# The token cap is a third of the limit: without tiktoken the counts are
+# token_count.approximate_tokens estimates, and the headroom absorbs how far
+# they can fall short (about 2.3x for CJK).
+MAX_TEXTS_PER_REQUEST = 1000
+MAX_TOKENS_PER_REQUEST = 100_000
+
+def chunk_texts(texts, max_tokens=MAX_TOKENS_PER_REQUEST, max_texts=MAX_TEXTS_PER_REQUEST,
+                count_tokens=None):
+    """Split texts into (start, end) index ranges that each fit in one request"""
+    count_tokens = count_tokens or default_count_tokens()
+    chunks = []
+    start = 0
+    tokens = 0
+    for i, text in enumerate(texts):
+        text_tokens = count_tokens(text)
+        if i > start and (tokens + text_tokens > max_tokens or i - start >= max_texts):
+            chunks.append((start, i))
+            start = i
+            tokens = 0
+        tokens += text_tokens
+    if start < len(texts):
+        chunks.append((start, len(texts)))
+    return chunks
+
+
+def _fill(matrix, start, vectors, n_rows):
+    block = np.asarray(vectors, dtype=np.float32)
+    if matrix is None:
+        matrix = np.empty((n_rows, block.shape[1]), dtype=np.float32)
+    matrix[start:start + len(block)] = block
+    return matrix
+
+
+def _empty(embeddings):
+    return np.empty((0, getattr(embeddings, "dimensions", None) or 0), dtype=np.float32)
+
+
+def embed_corpus(embeddings, texts, max_concurrency=8, max_tokens=MAX_TOKENS_PER_REQUEST,
+                 max_texts=MAX_TEXTS_PER_REQUEST, count_tokens=None):
+    """Embed texts with up to max_concurrency requests in flight.
+
+    Returns a (len(texts), dimensions) float32 matrix in input order.
+    """
+    texts = list(texts)
+    chunks = chunk_texts(texts, max_tokens, max_texts, count_tokens)
+    if not chunks:
+        return _empty(embeddings)
+
+    matrix = None
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        futures = {
+            pool.submit(embeddings.embed_documents, texts[start:end]): start
+            for start, end in chunks
+        }
+        # Rows are written by position as requests finish, so completion
+        # order does not affect the output order
+        for future in as_completed(futures):
+            matrix = _fill(matrix, futures[future], future.result(), len(texts))
+    return matrix
+
+
+async def aembed_corpus(embeddings, texts, max_concurrency=8, max_tokens=MAX_TOKENS_PER_REQUEST,
+                        max_texts=MAX_TEXTS_PER_REQUEST, count_tokens=None):
+    """Async version of embed_corpus using aembed_documents"""
+    texts = list(texts)
+    chunks = chunk_texts(texts, max_tokens, max_texts, count_tokens)
+    if not chunks:
+        return _empty(embeddings)
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def embed_chunk(start, end):
+        async with semaphore:
+            return start, await embeddings.aembed_documents(texts[start:end])
+
+    matrix = None
+    for task in asyncio.as_completed([embed_chunk(start, end) for start, end in chunks]):
+        start, vectors = await task
+        matrix = _fill(matrix, start, vectors, len(texts))
+    return matrix
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import random
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # repo root, for fake_models.py
+
+import numpy as np
+
+from bulk_embedding import aembed_corpus, chunk_texts, embed_corpus
+from fake_models import NgramFakeEmbeddings
+from token_count import approximate_tokens, default_count_tokens
+
+# embed_corpus and aembed_corpus against a fake endpoint that records every
+# request: how many texts and tokens it carried and how many requests were in
+# flight at once. Each request takes LATENCY on average with uniform jitter,
+# so requests finish out of order. Checked for both paths:
+#
+#   caps         no request has more than MAX_TEXTS texts or MAX_TOKENS tokens
+#   concurrency  no more than MAX_CONCURRENCY requests in flight, and that
+#                many are used
+#   order        row i is the vector of texts[i]
+#
+# Then embed_query one text at a time for comparison, and the token estimate
+# next to tiktoken's count for a few scripts when its encoding is available.
+
+N_TEXTS = 5_000
+MAX_TEXTS = 64
+MAX_TOKENS = 2_000
+MAX_CONCURRENCY = 4
+LATENCY = 0.02
+
+
+class RecordingEmbeddings(NgramFakeEmbeddings):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []  # texts per request, in the order they arrived
+        self.in_flight = 0
+        self.most_in_flight = 0
+
+    def _enter(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+            self.in_flight += 1
+            self.most_in_flight = max(self.most_in_flight, self.in_flight)
+
+    def _leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def embed_documents(self, texts):
+        self._enter(texts)
+        try:
+            return super().embed_documents(texts)
+        finally:
+            self._leave()
+
+    async def aembed_documents(self, texts):
+        self._enter(texts)
+        try:
+            return await super().aembed_documents(texts)
+        finally:
+            self._leave()
+
+
+def corpus():
+    rng = random.Random(0)
+    words = "the model routes each question about weather travel history science cooking music".split()
+    # Lengths vary so that the token cap, not only the text cap, closes requests
+    return [f"{i} " + " ".join(rng.choice(words) for _ in range(rng.randint(3, 60))) for i in range(N_TEXTS)]
+
+
+def matrix_of(embeddings, texts):
+    return np.asarray([embeddings._vector(text) for text in texts], dtype=np.float32)
+
+
+def check(name, embeddings, matrix, elapsed, texts, count_tokens):
+    sizes = [len(batch) for batch in embeddings.batches]
+    tokens = [sum(count_tokens(text) for text in batch) for batch in embeddings.batches]
+    assert max(sizes) <= MAX_TEXTS, max(sizes)
+    assert all(n <= MAX_TOKENS or size == 1 for n, size in zip(tokens, sizes)), max(tokens)
+    assert sum(sizes) == len(texts) and embeddings.requests == len(chunk_texts(texts, MAX_TOKENS, MAX_TEXTS))
+    assert embeddings.most_in_flight == MAX_CONCURRENCY, embeddings.most_in_flight
+    assert matrix.dtype == np.float32 and np.array_equal(matrix, matrix_of(embeddings, texts))
+    print(f"{name:<14} {embeddings.requests:4d} requests   {elapsed:6.2f} s   "
+          f"texts/request {min(sizes)}-{max(sizes)}   tokens/request {min(tokens)}-{max(tokens)}   "
+          f"at most {embeddings.most_in_flight} in flight   order ok")
+
+
+def endpoint():
+    return RecordingEmbeddings(latency=LATENCY, latency_distribution="uniform", latency_jitter=0.9)
+
+
+texts = corpus()
+count_tokens = default_count_tokens()
+print(f"{N_TEXTS} texts, at most {MAX_TEXTS} texts and {MAX_TOKENS} tokens per request, "
+      f"{MAX_CONCURRENCY} requests at once, {LATENCY * 1e3:.0f} ms per request, tokens by {count_tokens.__name__}")
+
+embeddings = endpoint()
+start = time.perf_counter()
+matrix = embed_corpus(embeddings, texts, MAX_CONCURRENCY, MAX_TOKENS, MAX_TEXTS)
+check("embed_corpus", embeddings, matrix, time.perf_counter() - start, texts, count_tokens)
+
+embeddings = endpoint()
+start = time.perf_counter()
+matrix = asyncio.run(aembed_corpus(embeddings, texts, MAX_CONCURRENCY, MAX_TOKENS, MAX_TEXTS))
+check("aembed_corpus", embeddings, matrix, time.perf_counter() - start, texts, count_tokens)
+
+# One oversized text still goes out, alone; an empty corpus sends nothing
+embeddings = endpoint()
+huge = "word " * (MAX_TOKENS * 4)
+matrix = embed_corpus(embeddings, ["short", huge, "short again"], MAX_CONCURRENCY, MAX_TOKENS, MAX_TEXTS)
+assert [len(batch) for batch in embeddings.batches if huge in batch] == [1] and matrix.shape[0] == 3
+assert embed_corpus(embeddings, [], MAX_CONCURRENCY).shape == (0, embeddings.dimensions)
+# Any iterable works, a generator included
+assert np.array_equal(embed_corpus(embeddings, (text for text in texts[:10]), MAX_CONCURRENCY),
+                      matrix_of(embeddings, texts[:10]))
+
+sample = texts[:100]
+embeddings = endpoint()
+start = time.perf_counter()
+one_by_one = [embeddings.embed_query(text) for text in sample]
+elapsed = time.perf_counter() - start
+print(f"{'embed_query':<14} {embeddings.requests:4d} requests   {elapsed:6.2f} s   for the first {len(sample)} "
+      f"texts only ({elapsed * N_TEXTS / len(sample):.1f} s projected for all)")
+assert np.array_equal(np.asarray(one_by_one, dtype=np.float32), matrix_of(embeddings, sample))
+
+# The estimate next to tiktoken's count: approximate_tokens is not a bound,
+# which MAX_TOKENS_PER_REQUEST's headroom (a third of the API limit) covers
+samples = {
+    "english": "The quick brown fox jumps over the lazy dog near the river bank today.",
+    "spanish": "El rápido zorro marrón salta sobre el perro perezoso cerca del río hoy.",
+    "russian": "Быстрая коричневая лиса прыгает через ленивую собаку у реки сегодня.",
+    "chinese": "今天敏捷的棕色狐狸在河边跳过了那只懒狗。",
+    "japanese": "今日、素早い茶色の狐が川の近くで怠け者の犬を飛び越えた。",
+}
+if count_tokens is approximate_tokens:
+    print("token estimate (tiktoken's encoding unavailable, no comparison): "
+          + ", ".join(f"{language} {approximate_tokens(text)}" for language, text in samples.items()))
+else:
+    print("tokens, estimate / tiktoken: " + ", ".join(
+        f"{language} {approximate_tokens(text)}/{count_tokens(text)}" for language, text in samples.items()))
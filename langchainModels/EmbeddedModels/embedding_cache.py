@@ -0,0 +1,247 @@
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from bulk_embedding import embed_corpus
+
+# Disk-backed cache in front of an Embeddings object. Vectors live in a
+# memory-mapped float32 file, so reopening a cache of a million vectors maps
+# the file instead of reading it into Python lists. Each slot is keyed by a
+# 64-bit hash of (model, dimensions, sha256 of the text); the lookup index is
+# a sorted NumPy copy of the occupied slots' keys, so a whole batch is
+# resolved with one searchsorted call and only the misses are sent to the
+# model. The index is sorted from scratch only when another process has
+# written since it was built; this process's own writes are merged into it.
+#
+# Layout of the cache directory:
+#   meta.json     dimensions and capacity
+#   vectors.f32   (capacity, dimensions) float32 vectors
+#   keys.u64      (capacity,) slot keys, 0 marks a free slot
+#   ticks.u64     (capacity,) last-used time of each slot, for LRU eviction
+#   header.u64    [generation], bumped by every write so readers can tell
+#                 their index is stale
+#   lock          flock()ed by writers
+#
+# Any number of processes may read while one writes. Writers serialize on the
+# lock file and clear a slot's key before overwriting its vector; readers copy
+# the vectors they need and then re-check the keys, treating any slot that
+# changed underneath them as a miss. flock() does not exclude threads sharing
+# one file descriptor, so threads of one process also take a threading lock
+# to write, and the index is swapped as one (generation, keys, slots) tuple
+# that a lookup reads once.
+
+
+class MmapEmbeddingCache(Embeddings):
+    """Embeddings wrapper that caches vectors in a memory-mapped file.
+
+    embeddings:  the wrapped Embeddings object, called only for cache misses
+    path:        cache directory, created on first use
+    max_entries: size cap; the least recently used vectors are evicted beyond
+                 it. Fixed when the cache is created; reopening it with another
+                 value raises ValueError
+    model, dimensions: default to the attributes of the wrapped object
+    """
+
+    def __init__(self, embeddings, path, max_entries=1_000_000, model=None, dimensions=None):
+        self.embeddings = embeddings
+        self.model = model or getattr(embeddings, "model", type(embeddings).__name__)
+        self.dimensions = dimensions or getattr(embeddings, "dimensions", None)
+        if not self.dimensions:
+            raise ValueError("dimensions must be given when the embeddings object does not set it")
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # guards _index and the counters
+        self._write_lock = threading.Lock()  # one writing thread per process, next to flock
+
+        os.makedirs(path, exist_ok=True)
+        self._lock_file = open(os.path.join(path, "lock"), "a+")
+        with self._locked():
+            meta_path = os.path.join(path, "meta.json")
+            if os.path.exists(meta_path):
+                with open(meta_path) as f:
+                    meta = json.load(f)
+                if meta["dimensions"] != self.dimensions:
+                    raise ValueError(
+                        f"cache at {path} holds {meta['dimensions']}-d vectors, not {self.dimensions}-d"
+                    )
+                if meta["capacity"] != max_entries:
+                    raise ValueError(
+                        f"cache at {path} was created with max_entries={meta['capacity']}, not {max_entries}"
+                    )
+                mode = "r+"
+            else:
+                meta = {"dimensions": self.dimensions, "capacity": max_entries}
+                mode = "w+"
+            self.capacity = meta["capacity"]
+
+            self._vectors = self._map("vectors.f32", np.float32, (self.capacity, self.dimensions), mode)
+            self._keys = self._map("keys.u64", np.uint64, (self.capacity,), mode)
+            self._ticks = self._map("ticks.u64", np.uint64, (self.capacity,), mode)
+            self._header = self._map("header.u64", np.uint64, (1,), mode)
+            if mode == "w+":
+                # Write meta last so a half-created cache is never opened
+                with open(meta_path, "w") as f:
+                    json.dump(meta, f)
+
+        # (generation, sorted keys of the occupied slots, their slots), or None
+        self._index = None
+
+    def _map(self, name, dtype, shape, mode):
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode=mode, shape=shape)
+
+    def _locked(self):
+        return _FileLock(self._lock_file, self._write_lock)
+
+    def key(self, text):
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        key = hashlib.blake2b(
+            f"{self.model}\0{self.dimensions}\0".encode("utf-8") + digest, digest_size=8
+        ).digest()
+        return int.from_bytes(key, "little") or 1
+
+    def _current_index(self):
+        index = self._index
+        generation = int(self._header[0])
+        if index is not None and index[0] == generation:
+            return index
+        with self._lock:
+            # Another thread may have rebuilt it while this one waited
+            index = self._index
+            if index is None or index[0] != generation:
+                keys = np.array(self._keys)
+                occupied = np.flatnonzero(keys)
+                order = occupied[np.argsort(keys[occupied])]
+                index = self._index = (generation, keys[order], order)
+            return index
+
+    def _find(self, keys, index=None):
+        """Return the slot of each key, or -1 where it is not cached"""
+        _, sorted_keys, order = index or self._current_index()
+        if not len(sorted_keys):
+            return np.full(len(keys), -1, dtype=np.int64)
+        positions = np.searchsorted(sorted_keys, keys)
+        positions[positions == len(sorted_keys)] = 0
+        slots = order[positions]
+        found = sorted_keys[positions] == keys
+        return np.where(found, slots, -1)
+
+    def _merge_index(self, index, old_keys, new_keys, slots, generation):
+        # Apply one write to the sorted index in O(entries) copies instead of
+        # an O(entries log entries) sort: drop the evicted keys, insert the new
+        _, sorted_keys, order = index
+        old_keys = old_keys[old_keys != 0]
+        if len(old_keys):
+            drop = np.searchsorted(sorted_keys, old_keys)
+            sorted_keys = np.delete(sorted_keys, drop)
+            order = np.delete(order, drop)
+        new_order = np.argsort(new_keys)
+        new_keys, slots = new_keys[new_order], slots[new_order]
+        at = np.searchsorted(sorted_keys, new_keys)
+        return generation, np.insert(sorted_keys, at, new_keys), np.insert(order, at, slots)
+
+    def embed_matrix(self, texts):
+        """Embed texts as a (len(texts), dimensions) float32 matrix, embedding only misses"""
+        texts = list(texts)
+        result = np.empty((len(texts), self.dimensions), dtype=np.float32)
+        if not texts:
+            return result
+        keys = np.fromiter((self.key(text) for text in texts), dtype=np.uint64, count=len(texts))
+
+        slots = self._find(keys)
+        hit = slots >= 0
+        if hit.any():
+            hit_slots = slots[hit]
+            result[hit] = self._vectors[hit_slots]
+            # A writer may have reused a slot while we copied it
+            still_valid = self._keys[hit_slots] == keys[hit]
+            hit[np.flatnonzero(hit)[~still_valid]] = False
+            self._ticks[hit_slots[still_valid]] = time.time_ns()
+
+        missing = np.flatnonzero(~hit)
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        if len(missing):
+            # Embed each distinct missing text once
+            unique_keys, first, inverse = np.unique(keys[missing], return_index=True, return_inverse=True)
+            vectors = embed_corpus(self.embeddings, [texts[missing[i]] for i in first])
+            result[missing] = vectors[inverse.reshape(-1)]
+            self._store(unique_keys, vectors)
+        return result
+
+    def _store(self, keys, vectors):
+        with self._locked():
+            # Another process may have stored some of these meanwhile; the
+            # index is re-sorted only if one did
+            index = self._current_index()
+            new = self._find(keys, index) < 0
+            keys, vectors = keys[new][:self.capacity], vectors[new][:self.capacity]
+            if not len(keys):
+                return
+
+            free = np.flatnonzero(self._keys == 0)[:len(keys)]
+            if len(free) < len(keys):
+                # Evict the least recently used occupied slots
+                needed = len(keys) - len(free)
+                occupied = np.flatnonzero(self._keys != 0)
+                victims = occupied[np.argpartition(self._ticks[occupied], needed - 1)[:needed]]
+                free = np.concatenate([free, victims])
+
+            old_keys = np.array(self._keys[free])
+            self._keys[free] = 0
+            self._vectors[free] = vectors
+            self._keys[free] = keys
+            self._ticks[free] = time.time_ns()
+            self._header[0] += 1
+            # The index was current when the lock was taken, so this write is
+            # the only change to merge; readers keep the old tuple until the swap
+            index = self._merge_index(index, old_keys, keys, free, int(self._header[0]))
+            with self._lock:
+                self._index = index
+
+    @property
+    def vectors(self):
+        """Memory-mapped view of every slot (free slots included), without copying"""
+        return self._vectors
+
+    def __len__(self):
+        return int(np.count_nonzero(self._keys))
+
+    def embed_documents(self, texts):
+        return self.embed_matrix(texts).tolist()
+
+    def embed_query(self, text):
+        return self.embed_matrix([text])[0].tolist()
+
+    def flush(self):
+        for array in (self._vectors, self._keys, self._ticks, self._header):
+            array.flush()
+
+    def close(self):
+        self.flush()
+        self._lock_file.close()
+
+
+class _FileLock:
+    def __init__(self, file, thread_lock):
+        self.file = file
+        self.thread_lock = thread_lock
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        try:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        except BaseException:
+            self.thread_lock.release()
+            raise
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.thread_lock.release()
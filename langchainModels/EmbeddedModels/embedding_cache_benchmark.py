@@ -0,0 +1,199 @@
+import hashlib
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from embedding_cache import MmapEmbeddingCache
+
+# MmapEmbeddingCache at N_VECTORS entries:
+#
+#   writes      a batch with misses, index merged (now) versus re-sorted from
+#               scratch after every write (what _store used to force)
+#   warm start  a fresh process opens the full cache: time, resident memory
+#               it adds, and the first lookup (which builds the index from
+#               the keys only; the vectors stay mapped, not read)
+#   readers     READERS processes look up known texts while a writer keeps
+#               storing new ones and evicting old ones; every vector a reader
+#               gets must be the right one for its text
+#   threads     the same with READERS reader threads and a writer thread
+#               sharing one cache object in one process, which must also keep
+#               its hit/miss counters exact
+#
+# HashEmbeddings derives each vector from the text's hash, so filling a
+# million entries is fast and any reader can check what it got.
+
+N_VECTORS = 1_000_000
+DIMENSIONS = 32
+BATCH = 50_000
+READERS = 3
+READER_BATCHES = 40
+
+
+class HashEmbeddings(Embeddings):
+    model = "hash"
+    dimensions = DIMENSIONS
+
+    def embed_documents(self, texts):
+        return [vector(text).tolist() for text in texts]
+
+    def embed_query(self, text):
+        return vector(text).tolist()
+
+
+def vector(text):
+    digest = hashlib.sha512(text.encode("utf-8")).digest()
+    return np.frombuffer(digest, dtype=np.int16)[:DIMENSIONS].astype(np.float32) / 32768
+
+
+def texts(start, end):
+    return [f"sentence {i}" for i in range(start, end)]
+
+
+def resident_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def warm_start(path):
+    before = resident_mb()
+    start = time.perf_counter()
+    cache = MmapEmbeddingCache(HashEmbeddings(), path, max_entries=N_VECTORS)
+    opened = time.perf_counter() - start
+    after_open = resident_mb()
+    start = time.perf_counter()
+    # The most recently stored texts; the oldest ones were evicted by the small writes
+    cache.embed_matrix(texts(N_VECTORS - 2_000, N_VECTORS - 1_000))
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    cache.embed_matrix(texts(N_VECTORS - 1_000, N_VECTORS))
+    second = time.perf_counter() - start
+    assert cache.misses == 0, cache.misses
+    print(f"warm start: open {opened * 1e3:.1f} ms (+{after_open - before:.1f} MB resident), "
+          f"first 1000 lookups {first * 1e3:.1f} ms incl. index build (+{resident_mb() - after_open:.1f} MB), "
+          f"next 1000 {second * 1e3:.1f} ms; vectors file {N_VECTORS * DIMENSIONS * 4 / 2 ** 20:.0f} MB")
+
+
+def read(cache, seed):
+    # Returns the number of wrong vectors
+    rng = np.random.default_rng(seed)
+    wrong = 0
+    for _ in range(READER_BATCHES):
+        ids = rng.integers(0, N_VECTORS + READER_BATCHES * 1_000, size=1_000)
+        batch = [f"sentence {i}" for i in ids]
+        matrix = cache.embed_matrix(batch)
+        wrong += sum(not np.array_equal(row, vector(text)) for row, text in zip(matrix, batch))
+    return wrong
+
+
+def write(cache, stop, start):
+    # Returns the number of texts looked up (and stored)
+    first = start
+    while not stop.is_set():
+        cache.embed_matrix(texts(start, start + 1_000))
+        start += 1_000
+    return start - first
+
+
+def reader(path, seed, results):
+    cache = MmapEmbeddingCache(HashEmbeddings(), path, max_entries=N_VECTORS)
+    wrong = read(cache, seed)
+    results.put((cache.hits, cache.misses, wrong))
+
+
+def writer(path, stop):
+    write(MmapEmbeddingCache(HashEmbeddings(), path, max_entries=N_VECTORS), stop, N_VECTORS)
+
+
+def threads(path):
+    cache = MmapEmbeddingCache(HashEmbeddings(), path, max_entries=N_VECTORS)
+    stop = threading.Event()
+    wrong = []
+    written = []
+    writing = threading.Thread(target=lambda: written.append(write(cache, stop, N_VECTORS * 3)))
+    readers = [threading.Thread(target=lambda seed=seed: wrong.append(read(cache, READERS + seed)))
+               for seed in range(READERS)]
+    writing.start()
+    for thread in readers:
+        thread.start()
+    for thread in readers:
+        thread.join()
+    stop.set()
+    writing.join()
+    lookups = cache.hits + cache.misses
+    assert len(wrong) == READERS and sum(wrong) == 0, wrong
+    assert lookups == READERS * READER_BATCHES * 1_000 + written[0], lookups
+    print(f"{READERS} reader threads + 1 writer thread, one cache object: {lookups:,} lookups, "
+          f"{cache.hits:,} hits, {cache.misses:,} misses, 0 wrong vectors")
+
+
+if __name__ == "__main__":
+    if not sys.platform.startswith("linux"):
+        print("resident memory is read from /proc; run on Linux")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache")
+        cache = MmapEmbeddingCache(HashEmbeddings(), path, max_entries=N_VECTORS)
+        merged = []
+        for start in range(0, N_VECTORS, BATCH):
+            begin = time.perf_counter()
+            cache.embed_matrix(texts(start, start + BATCH))
+            merged.append(time.perf_counter() - begin)
+        # A small write to the full cache (evicting), then the lookup after it
+        for label, force_rebuild in (("index merged", False), ("index re-sorted", True)):
+            timings = []
+            for batch in range(5):
+                first = N_VECTORS * 2 + batch * 100 + (1_000 if force_rebuild else 0)
+                begin = time.perf_counter()
+                cache.embed_matrix(texts(first, first + 100))
+                if force_rebuild:
+                    cache._index = None
+                cache.embed_matrix(texts(first, first + 100))
+                timings.append(time.perf_counter() - begin)
+            print(f"100 misses + lookup on a full {N_VECTORS:,}-entry cache, {label}: "
+                  f"{np.median(timings) * 1e3:7.1f} ms")
+        print(f"filling {N_VECTORS:,} entries in batches of {BATCH:,}: "
+              f"{sum(merged):.1f} s ({merged[-1] * 1e3:.0f} ms for the last batch)")
+        cache.close()
+        del cache
+
+        context = multiprocessing.get_context("spawn")
+        process = context.Process(target=warm_start, args=(path,))
+        process.start()
+        process.join()
+        assert process.exitcode == 0
+
+        results = context.Queue()
+        stop = context.Event()
+        writing = context.Process(target=writer, args=(path, stop))
+        readers = [context.Process(target=reader, args=(path, seed, results)) for seed in range(READERS)]
+        writing.start()
+        for process in readers:
+            process.start()
+        outcomes = [results.get() for _ in readers]
+        for process in readers:
+            process.join()
+        stop.set()
+        writing.join()
+        hits = sum(outcome[0] for outcome in outcomes)
+        misses = sum(outcome[1] for outcome in outcomes)
+        wrong = sum(outcome[2] for outcome in outcomes)
+        print(f"{READERS} readers + 1 writer: {hits + misses:,} lookups, {hits:,} hits, {misses:,} misses, "
+              f"{wrong} wrong vectors")
+        assert wrong == 0
+
+        threads(path)
+
+        try:
+            MmapEmbeddingCache(HashEmbeddings(), path, max_entries=N_VECTORS // 2)
+        except ValueError as error:
+            print(f"reopened with another max_entries: {error}")
+        else:
+            raise AssertionError("a different max_entries was accepted")
@@ -1,10 +1,15 @@
-from langchain_openai import OpenAIEmbeddings
-from dotenv import load_dotenv
-import numpy as np
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # repo root, for bootstrap.py
+from bootstrap import embedding_model
+from embedding_cache import MmapEmbeddingCache
+from similarity import SimilarityIndex
 
-load_dotenv()
-
-embedding = OpenAIEmbeddings(model="text-embedding-3-large", dimensions=32)
+# Vectors are cached on disk, so later runs only pay for sentences not seen before
+embedding = MmapEmbeddingCache(
+    embedding_model(model="text-embedding-3-large", dimensions=32),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".embedding_cache"),
+)
 
 sentences = [
     "Delhi is the capital of India",
@@ -18,13 +23,13 @@ sentences = [
     "JavaScript powers the web"
 ]
 
-# Generate embeddings
-vectors = [embedding.embed_query(s) for s in sentences]
+# Generate embeddings - cache misses go out in batched requests instead of
+# one request per sentence; row i of the float32 matrix is sentences[i]
+vectors = embedding.embed_matrix(sentences)
+print(f"Embedding cache: {embedding.hits} hits, {embedding.misses} misses")
 
-# Cosine similarity function
-def cosine_similarity(vec1, vec2):
-    vec1, vec2 = np.array(vec1), np.array(vec2)
-    return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
+# Normalize all vectors once; cosine similarity is then a dot product
+index = SimilarityIndex(vectors)
 
 # Compare similarities across themes
 pairs = [
@@ -37,6 +42,11 @@ pairs = [
     (5, 7),  # Cricket vs Python
 ]
 
-for i, j in pairs:
-    sim = cosine_similarity(vectors[i], vectors[j])
-    print(f"Similarity ({sentences[i]}  <->  {sentences[j]}): {sim:.3f}")
\ No newline at end of file
+for (i, j), sim in zip(pairs, index.pair_scores(pairs)):
+    print(f"Similarity ({sentences[i]}  <->  {sentences[j]}): {sim:.3f}")
+
+# Nearest neighbour of every sentence, all found with one matrix multiply
+neighbours, scores = index.top_k(None, k=1, exclude_self=True)
+print()
+for i, (j, sim) in enumerate(zip(neighbours[:, 0], scores[:, 0])):
+    print(f"Closest to '{sentences[i]}': '{sentences[j]}' ({sim:.3f})")
\ No newline at end of file
@@ -0,0 +1,194 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from langchain_core.embeddings import Embeddings
+
+# Micro-batching across callers. Code that embeds one sentence at a time with
+# embed_query sends one request per sentence; this wrapper queues the
+# embed_query calls of all threads and coroutines and a dispatcher thread
+# sends them as embed_documents requests. A batch closes when it holds
+# max_batch_size texts or max_wait seconds after its first text arrived,
+# whichever comes first, and each caller gets its own vector back.
+#
+# At most max_concurrency requests are in flight; while they all are, the
+# next batch keeps filling, so batches grow with load instead of requests
+# queueing up. At most max_pending texts may be waiting or in flight; further
+# callers block (backpressure) until there is room. A caller's timeout covers
+# both the wait for room and the wait for its vector; a caller that gives up
+# before its text was sent is dropped from the batch.
+#
+#   embedding = MicroBatchEmbeddings(embedding_model(model="text-embedding-3-small"), max_wait=0.005)
+#   vector = embedding.embed_query("Delhi is the capital of India")   # from any thread
+#   vector = await embedding.aembed_query("Paris is the capital of France")
+
+
+class MicroBatchEmbeddings(Embeddings):
+    """Embeddings wrapper that batches embed_query calls from many callers.
+
+    embeddings:      the wrapped Embeddings object; its embed_documents is
+                     called from worker threads
+    max_batch_size:  texts per request at most
+    max_wait:        seconds a batch waits for more texts after its first
+    max_concurrency: requests in flight at most
+    max_pending:     texts waiting or in flight at most; callers block beyond it
+    timeout:         default seconds a caller waits for its vector (None = forever)
+    """
+
+    def __init__(self, embeddings, max_batch_size=256, max_wait=0.005, max_concurrency=4, max_pending=4096,
+                 timeout=None):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.requests = 0
+        self.texts = 0
+        self.timeouts = 0
+        self.largest_batch = 0
+        self._queue = queue.SimpleQueue()
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._workers = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_concurrency, thread_name_prefix="micro-batch")
+        self._lock = threading.Lock()
+        self._dispatcher = None
+        self._closed = False
+
+    def _start(self):
+        if self._closed:
+            raise RuntimeError("MicroBatchEmbeddings is closed")
+        if self._dispatcher is None:
+            with self._lock:
+                if self._dispatcher is None:
+                    self._dispatcher = threading.Thread(target=self._dispatch, name="micro-batch-dispatcher",
+                                                        daemon=True)
+                    self._dispatcher.start()
+
+    def _submit(self, text, wait):
+        # Returns the Future of text's vector once there is room for it,
+        # waiting at most wait seconds (None = as long as it takes)
+        self._start()
+        if not self._pending.acquire(timeout=wait):
+            raise TimeoutError(f"no room in the micro-batch queue within {wait:.3f} s")
+        future = Future()
+        future.add_done_callback(lambda _: self._pending.release())
+        self._queue.put((text, future, time.monotonic()))
+        return future
+
+    def _dispatch(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            # Waiting for a free worker lets the batch fill meanwhile
+            self._workers.acquire()
+            batch = [item]
+            # Counted from the first text's arrival: once it has waited
+            # max_wait, only what is already queued joins the batch
+            deadline = item[2] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # stop after this batch
+                    break
+                batch.append(item)
+            # Callers that gave up before their text was sent are dropped
+            batch = [(text, future) for text, future, _ in batch if future.set_running_or_notify_cancel()]
+            if batch:
+                self._executor.submit(self._run, batch)
+            else:
+                self._workers.release()
+
+    def _run(self, batch):
+        try:
+            vectors = self.embeddings.embed_documents([text for text, _ in batch])
+        except BaseException as error:
+            for _, future in batch:
+                future.set_exception(error)
+        else:
+            if len(vectors) != len(batch):
+                # Which vector belongs to which text is unknown, so every
+                # caller gets the error rather than some a wrong vector
+                error = ValueError(f"embed_documents returned {len(vectors)} vectors for {len(batch)} texts")
+                for _, future in batch:
+                    future.set_exception(error)
+            else:
+                for (_, future), vector in zip(batch, vectors):
+                    future.set_result(vector)
+        finally:
+            with self._lock:
+                self.requests += 1
+                self.texts += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+            self._workers.release()
+
+    def _deadline(self, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        return None if timeout is None else time.monotonic() + timeout
+
+    @staticmethod
+    def _remaining(deadline):
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    def _timed_out(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def embed_query(self, text, timeout=None):
+        deadline = self._deadline(timeout)
+        future = None
+        try:
+            future = self._submit(text, self._remaining(deadline))
+            return future.result(self._remaining(deadline))
+        except TimeoutError:
+            if future is not None:
+                future.cancel()
+            self._timed_out()
+            raise
+
+    async def aembed_query(self, text, timeout=None):
+        deadline = self._deadline(timeout)
+        try:
+            try:
+                future = self._submit(text, 0)
+            except TimeoutError:
+                # Queue full: wait for room in a thread, not on the event loop
+                loop = asyncio.get_running_loop()
+                future = await loop.run_in_executor(None, self._submit, text, self._remaining(deadline))
+            # wait_for cancels the future on timeout, dropping a text not sent yet
+            return await asyncio.wait_for(asyncio.wrap_future(future), self._remaining(deadline))
+        except TimeoutError:
+            self._timed_out()
+            raise
+
+    def embed_documents(self, texts):
+        # Already a batch: sent as it is
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts):
+        return await self.embeddings.aembed_documents(texts)
+
+    def close(self):
+        """Send what is queued, then stop the dispatcher and workers"""
+        with self._lock:
+            self._closed = True
+            dispatcher = self._dispatcher
+        if dispatcher is not None:
+            self._queue.put(None)
+            dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "texts": self.texts,
+            "mean_batch_size": self.texts / self.requests if self.requests else 0.0,
+            "largest_batch": self.largest_batch,
+            "timeouts": self.timeouts,
+        }
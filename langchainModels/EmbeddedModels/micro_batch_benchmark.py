@@ -0,0 +1,124 @@
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # repo root, for fake_models.py
+
+from fake_models import NgramFakeEmbeddings
+from micro_batch import MicroBatchEmbeddings
+
+# embed_query one sentence at a time, as embedding_openai.py used to, versus
+# MicroBatchEmbeddings, at several arrival rates. The fake endpoint takes
+# LATENCY plus PER_TEXT_LATENCY per text for each request and serves at most
+# ENDPOINT_CONCURRENCY requests at once (a connection or rate limit), so it
+# manages ENDPOINT_CONCURRENCY / LATENCY single-text requests per second.
+# Calls arrive as a Poisson process for DURATION seconds, each on its own
+# caller thread; latency is measured from the arrival.
+
+LATENCY = 0.05
+PER_TEXT_LATENCY = 0.0002
+ENDPOINT_CONCURRENCY = 8
+DURATION = 1.0
+RATES = (50, 150, 500, 2000)
+CALLER_THREADS = 512
+
+
+class CappedEndpoint(NgramFakeEmbeddings):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._slots = threading.BoundedSemaphore(ENDPOINT_CONCURRENCY)
+
+    def embed_documents(self, texts):
+        with self._slots:
+            return super().embed_documents(texts)
+
+
+class ShortEndpoint(NgramFakeEmbeddings):
+    # Returns one vector fewer than it was sent texts
+    def embed_documents(self, texts):
+        return super().embed_documents(texts)[:-1]
+
+
+def run(embed_query, rate, seed=0):
+    rng = random.Random(seed)
+    arrivals = []
+    now = 0.0
+    while True:
+        now += rng.expovariate(rate)
+        if now > DURATION:
+            break
+        arrivals.append(now)
+    latencies = []
+    failures = []
+    begin = time.perf_counter()
+
+    def one(i):
+        arrival = begin + arrivals[i]
+        time.sleep(max(0.0, arrival - time.perf_counter()))
+        try:
+            embed_query(f"Sentence number {i} about the weather")
+            latencies.append(time.perf_counter() - arrival)
+        except TimeoutError:
+            failures.append(i)
+
+    with ThreadPoolExecutor(CALLER_THREADS) as pool:
+        list(pool.map(one, range(len(arrivals))))
+    elapsed = time.perf_counter() - begin
+    latencies.sort()
+    return len(arrivals), latencies, failures, elapsed
+
+
+def report(name, calls, latencies, failures, elapsed, requests, extra=""):
+    line = (f"  {name:<26} {requests:5d} requests   {len(latencies) / elapsed:7.1f} calls/s   "
+            f"p50 {statistics.median(latencies) * 1e3:7.1f} ms   "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:7.1f} ms")
+    if failures:
+        line += f"   {len(failures)} of {calls} timed out"
+    print(line + extra)
+
+
+print(f"endpoint {LATENCY * 1e3:.0f} ms + {PER_TEXT_LATENCY * 1e3:.1f} ms/text per request, "
+      f"{ENDPOINT_CONCURRENCY} requests at once ({ENDPOINT_CONCURRENCY / LATENCY:.0f} single-text requests/s)")
+for rate in RATES:
+    print(f"{rate} calls/s for {DURATION:.0f} s")
+    endpoint = CappedEndpoint(latency=LATENCY, per_text_latency=PER_TEXT_LATENCY)
+    calls, latencies, failures, elapsed = run(endpoint.embed_query, rate)
+    report("embed_query per call", calls, latencies, failures, elapsed, endpoint.requests)
+
+    for max_wait in (0.002, 0.01):
+        endpoint = CappedEndpoint(latency=LATENCY, per_text_latency=PER_TEXT_LATENCY)
+        batcher = MicroBatchEmbeddings(endpoint, max_wait=max_wait, max_concurrency=ENDPOINT_CONCURRENCY)
+        calls, latencies, failures, elapsed = run(batcher.embed_query, rate)
+        stats = batcher.stats()
+        batcher.close()
+        report(f"micro-batch, wait {max_wait * 1e3:.0f} ms", calls, latencies, failures, elapsed, endpoint.requests,
+               f"   mean batch {stats['mean_batch_size']:5.1f}")
+        assert stats["texts"] == calls == endpoint.texts_embedded
+
+# Backpressure: batches of at most 8 texts cap the endpoint at about 1200
+# texts/s, below the 2000 calls/s arriving. With room for 128 texts and a
+# 250 ms timeout, callers the endpoint cannot keep up with give up within
+# the timeout instead of queueing without bound, and the others keep a
+# bounded latency.
+print("backpressure: 2000 calls/s, max_batch_size 8, max_pending 128, timeout 250 ms")
+endpoint = CappedEndpoint(latency=LATENCY, per_text_latency=PER_TEXT_LATENCY)
+batcher = MicroBatchEmbeddings(endpoint, max_batch_size=8, max_pending=128, max_concurrency=ENDPOINT_CONCURRENCY,
+                               timeout=0.25)
+calls, latencies, failures, elapsed = run(batcher.embed_query, 2000)
+stats = batcher.stats()
+batcher.close()
+report("micro-batch, bounded", calls, latencies, failures, elapsed, endpoint.requests)
+assert stats["timeouts"] == len(failures) and len(latencies) + len(failures) == calls
+
+# An endpoint that returns fewer vectors than texts fails every caller in
+# that batch instead of leaving the unmatched ones waiting forever
+batcher = MicroBatchEmbeddings(ShortEndpoint(), max_wait=0.05)
+with ThreadPoolExecutor(8) as pool:
+    futures = [pool.submit(batcher.embed_query, f"Sentence number {i}", 2.0) for i in range(8)]
+    errors = [future.exception() for future in futures]
+batcher.close()
+assert all(isinstance(error, ValueError) for error in errors), errors
+print(f"short reply: {len(errors)} callers got ValueError ({errors[0]}), none timed out")
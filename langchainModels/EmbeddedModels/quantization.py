@@ -0,0 +1,134 @@
+import numpy as np
+
+from similarity import SimilarityIndex, normalize
+
+# Compact storage for normalized embeddings, searched with the same tiled
+# top-k machinery as SimilarityIndex:
+#
+#   float32  4 bytes per dimension, exact
+#   float16  2 bytes per dimension
+#   int8     1 byte per dimension, each dimension scaled by its own max |value|
+#   binary   1 bit per dimension (the sign), compared by Hamming distance
+#
+# The smaller modes lose some ranking accuracy. search(..., rescore=n) takes
+# the n best candidates from the compact codes and re-ranks them with the
+# float32 vectors, which recovers most of it. Those vectors cost 4 bytes per
+# dimension again: keep_full=True holds them in memory, full_path writes them
+# to a memory-mapped file instead so only the rows being rescored are paged in.
+#
+# The point of the compact modes is memory, not speed: NumPy has no int8 or
+# float16 matrix multiply, so those codes are widened to float32 block by
+# block, and binary codes go through XOR + popcount. Search throughput is
+# about that of float32 or lower.
+
+MODES = ("float32", "float16", "int8", "binary")
+
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words):
+    """Number of set bits in each uint32 element"""
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return np.bitwise_count(words)
+    return POPCOUNT[words.view(np.uint8)].reshape(words.shape + (4,)).sum(axis=-1)
+
+
+def pack_signs(vectors):
+    """Pack the sign bit of each dimension into uint32 words"""
+    bits = np.packbits(vectors > 0, axis=1)
+    padding = -bits.shape[1] % 4
+    if padding:
+        bits = np.pad(bits, ((0, 0), (0, padding)))
+    return np.ascontiguousarray(bits).view(np.uint32)
+
+
+class QuantizedIndex(SimilarityIndex):
+    """Cosine similarity search over quantized embeddings.
+
+    mode:      one of "float32", "float16", "int8", "binary"
+    keep_full: also keep the normalized float32 vectors in memory, needed for
+               rescoring and for searching with the indexed rows
+    full_path: keep them in a memory-mapped file at this path instead
+    """
+
+    def __init__(self, matrix, mode="int8", keep_full=False, full_path=None, query_block=256, corpus_block=8192):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, not {mode!r}")
+        full = normalize(matrix)
+        self.mode = mode
+        self.dimensions = full.shape[1]
+        self.scale = None
+        if full_path is not None:
+            self.full = np.memmap(full_path, dtype=np.float32, mode="w+", shape=full.shape)
+            self.full[:] = full
+            self.full.flush()
+        elif keep_full or mode == "float32":
+            # In float32 mode the codes are these vectors: no extra memory
+            self.full = full
+        else:
+            self.full = None
+
+        if mode == "float32":
+            codes = full
+        elif mode == "float16":
+            codes = full.astype(np.float16)
+        elif mode == "int8":
+            self.scale = np.abs(full).max(axis=0) / 127
+            self.scale[self.scale == 0] = 1
+            codes = np.round(full / self.scale).astype(np.int8)
+        else:
+            codes = pack_signs(full)
+        super().__init__(codes, normalized=True, query_block=query_block, corpus_block=corpus_block)
+
+    @property
+    def code_bytes_per_vector(self):
+        """Bytes per vector of the codes that are searched"""
+        return self.vectors.nbytes / max(len(self.vectors), 1)
+
+    @property
+    def bytes_per_vector(self):
+        """Bytes per vector held in memory: the codes, plus the float32
+        vectors when keep_full holds them (a full_path file is not counted)"""
+        total = self.vectors.nbytes
+        if self.full is not None and self.full is not self.vectors and not isinstance(self.full, np.memmap):
+            total += self.full.nbytes
+        return total / max(len(self.vectors), 1)
+
+    def _queries(self, queries):
+        if queries is None:
+            if self.full is None:
+                raise ValueError("searching with the indexed rows needs keep_full=True or full_path")
+            queries = self.full
+        else:
+            queries = normalize(queries)
+        if self.mode == "int8":
+            # q . (scale * code) == (q * scale) . code
+            return queries * self.scale
+        if self.mode == "binary":
+            return pack_signs(queries)
+        return queries
+
+    def _scores(self, q_block, c_start, c_end):
+        codes = self.vectors[c_start:c_end]
+        if self.mode == "binary":
+            distance = popcount(q_block[:, None, :] ^ codes[None, :, :]).sum(axis=-1, dtype=np.int32)
+            # Map Hamming distance onto [-1, 1] so higher means more similar
+            return 1 - 2 * distance.astype(np.float32) / self.dimensions
+        return q_block @ codes.astype(np.float32).T
+
+    def pair_scores(self, pairs):
+        if self.full is None:
+            raise ValueError("pair_scores needs keep_full=True or full_path")
+        return SimilarityIndex(self.full, normalized=True).pair_scores(pairs)
+
+    def search(self, queries, k=10, rescore=None):
+        """Top-k (indices, scores); with rescore=n re-rank the n best candidates in float32"""
+        if not rescore:
+            return self.top_k(queries, k=k)
+        if self.full is None:
+            raise ValueError("rescoring needs keep_full=True or full_path")
+        candidates, _ = self.top_k(queries, k=max(rescore, k))
+        queries = self.full if queries is None else normalize(queries)
+        scores = np.einsum("qcd,qd->qc", self.full[candidates], queries)
+        order = np.argsort(-scores, axis=1)[:, :k]
+        return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(scores, order, axis=1)
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from quantization import MODES, QuantizedIndex
+from similarity import SimilarityIndex
+
+# Memory per vector, search throughput and recall@10 (against exact float32
+# search) for each QuantizedIndex storage mode, with and without rescoring
+# the top candidates at full precision. "codes" is what is searched;
+# "resident" adds the float32 rescoring vectors when they are held in memory
+# (keep_full=True). With full_path they live in a memory-mapped file and only
+# the rescored rows are paged in. The float64 row is what storing the vectors
+# the old np.array way costs.
+
+DIMENSIONS = 32
+N_VECTORS = 1_000_000
+N_QUERIES = 500
+K = 10
+RESCORE = (100, 1_000)
+
+rng = np.random.default_rng(0)
+centers = rng.standard_normal((5_000, DIMENSIONS))
+def sample(n):
+    return (centers[rng.integers(len(centers), size=n)]
+            + 0.8 * rng.standard_normal((n, DIMENSIONS))).astype(np.float32)
+
+vectors = sample(N_VECTORS)
+queries = sample(N_QUERIES)
+
+exact_ids, _ = SimilarityIndex(vectors).top_k(queries, k=K)
+
+def recall(ids):
+    return np.mean([len(np.intersect1d(a, b)) / K for a, b in zip(ids, exact_ids)])
+
+def run(index, label, rescore=None):
+    start = time.perf_counter()
+    ids, _ = index.search(queries, k=K, rescore=rescore)
+    qps = N_QUERIES / (time.perf_counter() - start)
+    print(f"{index.mode:<8} {label:<28} codes {index.code_bytes_per_vector:6.1f} B   "
+          f"resident {index.bytes_per_vector:6.1f} B/vector   {qps:6.0f} QPS  recall@{K}: {recall(ids):.3f}")
+
+print(f"{N_VECTORS:,} x {DIMENSIONS}-d vectors, {N_QUERIES} queries, top {K}\n")
+print(f"{'float64':<8} {'np.array':<28} codes {DIMENSIONS * 8:6.1f} B   resident {DIMENSIONS * 8:6.1f} B/vector")
+with tempfile.TemporaryDirectory() as directory:
+    for mode in MODES:
+        if mode == "float32":
+            run(QuantizedIndex(vectors, mode=mode), "exact")
+            continue
+        run(QuantizedIndex(vectors, mode=mode), "codes only")
+        in_memory = QuantizedIndex(vectors, mode=mode, keep_full=True)
+        mapped = QuantizedIndex(vectors, mode=mode, full_path=os.path.join(directory, f"{mode}.f32"))
+        for rescore in RESCORE:
+            run(in_memory, f"rescore top {rescore}, in memory", rescore)
+            run(mapped, f"rescore top {rescore}, mmap file", rescore)
+        del in_memory, mapped
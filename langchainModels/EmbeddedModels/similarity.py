@@ -0,0 +1,127 @@
+import numpy as np
+
+# Cosine similarity over a whole embedding matrix. The rows are normalized
+# once, after which cosine similarity is a plain dot product, so many queries
+# can be scored with a single matrix multiply. Work is split into tiles of
+# query_block x corpus_block scores so memory stays bounded no matter how
+# large the corpus is.
+
+QUERY_BLOCK = 1024
+CORPUS_BLOCK = 8192  # 1024 x 8192 float32 tile = 32 MB
+
+
+def normalize(matrix):
+    """Return a float32 copy of matrix with unit-length rows (zero rows stay zero)"""
+    matrix = np.array(matrix, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    matrix /= norms
+    return matrix
+
+
+class SimilarityIndex:
+    """Exact cosine similarity search over the rows of an embedding matrix.
+
+    matrix:     (n, dimensions) array-like of vectors
+    normalized: pass True when the rows already have unit length to use the
+                matrix as is (a memory-mapped matrix is then never copied)
+    """
+
+    def __init__(self, matrix, normalized=False, query_block=QUERY_BLOCK, corpus_block=CORPUS_BLOCK):
+        self.vectors = matrix if normalized else normalize(matrix)
+        self.query_block = query_block
+        self.corpus_block = corpus_block
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def _queries(self, queries):
+        return self.vectors if queries is None else normalize(queries)
+
+    def _tiles(self, queries):
+        # Yields (query_start, corpus_start, scores) for every tile
+        for q_start in range(0, len(queries), self.query_block):
+            q_block = queries[q_start:q_start + self.query_block]
+            for c_start in range(0, len(self.vectors), self.corpus_block):
+                c_end = min(c_start + self.corpus_block, len(self.vectors))
+                yield q_start, c_start, self._scores(q_block, c_start, c_end)
+
+    def _scores(self, q_block, c_start, c_end):
+        # Scores of a block of queries against rows c_start:c_end; subclasses
+        # storing the vectors in another form override this
+        return q_block @ self.vectors[c_start:c_end].T
+
+    def pair_scores(self, pairs):
+        """Similarity of each (i, j) pair of rows"""
+        pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+        return np.einsum("ij,ij->i", self.vectors[pairs[:, 0]], self.vectors[pairs[:, 1]])
+
+    def top_k(self, queries, k=10, exclude_self=False):
+        """Return (indices, scores) of the k most similar rows for each query.
+
+        Both arrays have shape (len(queries), k), best match first. queries=None
+        searches with the indexed rows themselves; exclude_self then skips
+        each row's match with itself. With explicit queries there is no
+        "self" to skip, so exclude_self raises ValueError.
+        """
+        if exclude_self and queries is not None:
+            raise ValueError("exclude_self only applies when queries is None (the index searching itself)")
+        queries = self._queries(queries)
+        k = min(k, len(self.vectors) - (1 if exclude_self else 0))
+        best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        best_indices = np.zeros((len(queries), k), dtype=np.int64)
+        if k <= 0:
+            return best_indices, best_scores
+
+        for q_start, c_start, scores in self._tiles(queries):
+            q_end = q_start + len(scores)
+            if exclude_self:
+                rows = np.arange(max(q_start, c_start), min(q_end, c_start + scores.shape[1]))
+                scores[rows - q_start, rows - c_start] = -np.inf
+            # Keep the block's own top k, then merge with the running best
+            if scores.shape[1] > k:
+                part = np.argpartition(scores, -k, axis=1)[:, -k:]
+                part_scores = np.take_along_axis(scores, part, axis=1)
+            else:
+                part = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+                part_scores = scores
+            merged_scores = np.concatenate([best_scores[q_start:q_end], part_scores], axis=1)
+            merged_indices = np.concatenate([best_indices[q_start:q_end], part + c_start], axis=1)
+            keep = np.argpartition(merged_scores, -k, axis=1)[:, -k:]
+            best_scores[q_start:q_end] = np.take_along_axis(merged_scores, keep, axis=1)
+            best_indices[q_start:q_end] = np.take_along_axis(merged_indices, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        return np.take_along_axis(best_indices, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def similarity_matrix(self, queries=None):
+        """Full (len(queries), len(index)) similarity matrix, filled tile by tile"""
+        queries = self._queries(queries)
+        result = np.empty((len(queries), len(self.vectors)), dtype=np.float32)
+        for q_start, c_start, scores in self._tiles(queries):
+            result[q_start:q_start + scores.shape[0], c_start:c_start + scores.shape[1]] = scores
+        return result
+
+    def pairs_above(self, threshold, queries=None):
+        """Return (query_rows, corpus_rows, scores) for every score >= threshold.
+
+        Only the matches are kept, so memory grows with the number of results
+        rather than with len(queries) x len(index). With queries=None each
+        unordered pair of distinct rows is reported once (i < j).
+        """
+        all_pairs = queries is None
+        queries = self._queries(queries)
+        found = ([], [], [])
+        for q_start, c_start, scores in self._tiles(queries):
+            rows, cols = np.nonzero(scores >= threshold)
+            rows += q_start
+            cols += c_start
+            if all_pairs:
+                upper = rows < cols
+                rows, cols = rows[upper], cols[upper]
+            found[0].append(rows)
+            found[1].append(cols)
+            found[2].append(scores[rows - q_start, cols - c_start])
+        if not found[0]:
+            return np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0, np.float32)
+        return tuple(np.concatenate(parts) for parts in found)
@@ -0,0 +1,67 @@
+import time
+
+import numpy as np
+
+from similarity import SimilarityIndex
+
+# Top-k search with the per-pair cosine_similarity loop that
+# embedding_openai.py used, versus SimilarityIndex (normalize once, blocked
+# matrix multiplies). The loop is too slow to run in full at 1M vectors, so
+# its time per query is measured on a slice of the corpus and scaled up.
+
+DIMENSIONS = 32
+K = 10
+
+def cosine_similarity(vec1, vec2):
+    vec1, vec2 = np.array(vec1), np.array(vec2)
+    return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
+
+def loop_top_k(query, vectors):
+    scores = [cosine_similarity(query, vector) for vector in vectors]
+    return np.argsort(scores)[::-1][:K]
+
+rng = np.random.default_rng(0)
+
+for size in (10_000, 1_000_000):
+    vectors = rng.standard_normal((size, DIMENSIONS)).astype(np.float32)
+    queries = rng.standard_normal((1_000, DIMENSIONS)).astype(np.float32)
+
+    sample = vectors[:10_000]
+    loop_queries = 3
+    start = time.perf_counter()
+    expected = [loop_top_k(query, sample) for query in queries[:loop_queries]]
+    loop_per_query = (time.perf_counter() - start) / loop_queries * (size / len(sample))
+
+    start = time.perf_counter()
+    index = SimilarityIndex(vectors)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indices, scores = index.top_k(queries, k=K)
+    index_per_query = (time.perf_counter() - start) / len(queries)
+
+    # Same neighbours as the loop on the slice it covered
+    sample_indices, _ = SimilarityIndex(sample).top_k(queries[:loop_queries], k=K)
+    assert all((got == want).all() for got, want in zip(sample_indices, expected))
+
+    print(f"{size:>9,} vectors  loop: {loop_per_query * 1000:10.1f} ms/query  "
+          f"index: {index_per_query * 1000:7.3f} ms/query  "
+          f"speedup: {loop_per_query / index_per_query:8.0f}x  (normalize {build_time * 1000:.0f} ms)")
+
+    start = time.perf_counter()
+    rows, cols, _ = index.pairs_above(0.6, queries)
+    print(f"{'':>18}thresholded 1,000 x {size:,} matrix: {len(rows):,} pairs >= 0.6 "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+# exclude_self skips each row's match with itself when the index searches
+# itself; with explicit queries row i is unrelated to query i, so it raises
+small = SimilarityIndex(vectors[:2_000])
+neighbours, _ = small.top_k(None, k=1, exclude_self=True)
+assert (neighbours[:, 0] != np.arange(2_000)).all()
+try:
+    small.top_k(queries, k=1, exclude_self=True)
+except ValueError:
+    pass
+else:
+    raise AssertionError("exclude_self with explicit queries should raise")
+print("exclude_self: no row is its own neighbour; with explicit queries it raises ValueError")
@@ -1,9 +1,9 @@
-from langchain_openai import OpenAI
-from dotenv import load_dotenv
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # repo root, for bootstrap.py
+from bootstrap import completion_model
 
-load_dotenv()
-
-llm = OpenAI(model = 'gpt-3.5-turbo-instruct')
+llm = completion_model(model='gpt-3.5-turbo-instruct')
 
 result = llm.invoke("What is the capital of India?") #this prompts the model the given text
 print(result)
\ No newline at end of file
@@ -0,0 +1,215 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # repo root, for token_count.py
+
+from langchain_core.messages import SystemMessage, messages_from_dict, messages_to_dict
+from langchain_core.prompts import ChatPromptTemplate
+
+from token_count import message_tokens
+
+# Conversation history for SimpleChatbot.
+#
+# ConversationHistory keeps every message, so each turn re-sends the whole
+# conversation. TokenBudgetHistory keeps the prompt under a hard token
+# budget: the most recent turns stay verbatim and older turns are folded into
+# a running summary message. The summary is refreshed on a background thread,
+# so a chat turn never waits for it; until a refresh lands, the prompt simply
+# uses the previous summary. A single turn larger than the recent window is
+# cut down to fit (the reply first, then the question); the summarizer still
+# gets it whole.
+
+summary_prompt = ChatPromptTemplate.from_messages([
+    ("system", "You maintain a running summary of a conversation. Keep names, facts, "
+               "preferences and open questions. Answer with the updated summary only, "
+               "in at most {max_words} words."),
+    ("human", "Current summary:\n{summary}\n\nNew lines of conversation:\n{lines}")
+])
+
+
+def _truncated(message, limit, count_tokens):
+    """message cut to its longest prefix within limit tokens; None if not even
+    an empty message fits"""
+    if count_tokens(message) <= limit:
+        return message
+    # Content blocks (images, ...) cannot be cut; they are dropped for text
+    content = message.content if isinstance(message.content, str) else ""
+    # Invariant: content[:low] fits (low = -1: nothing known to fit), content[:high] does not
+    low, high = -1, len(content) + 1
+    while high - low > 1:
+        middle = (low + high) // 2
+        if count_tokens(message.model_copy(update={"content": content[:middle]})) <= limit:
+            low = middle
+        else:
+            high = middle
+    return None if low < 0 else message.model_copy(update={"content": content[:low]})
+
+
+class ConversationHistory:
+    """Unbounded history: every message is sent on every turn"""
+
+    def __init__(self):
+        self.turns = []
+
+    def messages(self):
+        return [message for turn in self.turns for message in turn]
+
+    def add_turn(self, human_message, ai_message):
+        self.turns.append((human_message, ai_message))
+
+    def clear(self):
+        self.turns = []
+
+    def wait(self):
+        """Nothing runs in the background here"""
+
+    def dump(self):
+        """JSON-serializable state, restored with load()"""
+        return {"turns": [messages_to_dict(turn) for turn in self.turns]}
+
+    def load(self, data):
+        self.turns = [tuple(messages_from_dict(turn)) for turn in data["turns"]]
+
+
+class TokenBudgetHistory(ConversationHistory):
+    """History whose messages() never exceed max_tokens.
+
+    model:          chat model used to write the summary
+    max_tokens:     budget for the summary message plus the recent turns,
+                    as measured by count_tokens
+    summary_tokens: part of the budget reserved for the summary
+    count_tokens:   function returning a message's token count
+    """
+
+    def __init__(self, model, max_tokens=2000, summary_tokens=400, count_tokens=message_tokens):
+        super().__init__()
+        self.summary_chain = summary_prompt | model
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.count_tokens = count_tokens
+        self.summary = ""
+        self.summary_updates = 0
+        self._unsummarized = []  # turns pushed out of the window, not yet in the summary
+        self._summarizing = []  # turns the worker is folding in; kept until the summary is stored
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._refresh = None
+        self._worker_running = False  # only changed under _lock
+
+    def _summary_message(self):
+        if not self.summary:
+            return None
+        message = SystemMessage(content=f"Summary of the earlier conversation: {self.summary}")
+        # Hard cap, in case the summarizer ignored the requested length
+        return _truncated(message, self.summary_tokens, self.count_tokens)
+
+    def messages(self):
+        with self._lock:
+            summary = self._summary_message()
+            return ([summary] if summary else []) + super().messages()
+
+    def add_turn(self, human_message, ai_message):
+        with self._lock:
+            self.turns.append((human_message, ai_message))
+            # Push the oldest turns out until the recent window fits next to the summary
+            budget = self.max_tokens - self.summary_tokens
+            used = sum(self.count_tokens(message) for turn in self.turns for message in turn)
+            while len(self.turns) > 1 and used > budget:
+                turn = self.turns.pop(0)
+                used -= sum(self.count_tokens(message) for message in turn)
+                self._unsummarized.append(turn)
+            if used > budget:
+                # The newest turn alone is over: summarize it whole, keep it cut down
+                turn = self.turns.pop()
+                self._unsummarized.append(turn)
+                trimmed = self._trimmed_turn(turn, budget)
+                if trimmed is not None:
+                    self.turns.append(trimmed)
+            self._start_worker()
+
+    def _start_worker(self):
+        # Called with _lock held. The worker clears _worker_running under the
+        # lock when it finds nothing left, so a turn queued just before that
+        # is picked up by the running worker and one queued after starts a new one
+        if self._unsummarized and not self._worker_running:
+            self._worker_running = True
+            self._refresh = self._executor.submit(self._update_summary)
+
+    def _trimmed_turn(self, turn, budget):
+        # The question keeps what the reply does not need at its shortest; None
+        # if the window cannot hold even two empty messages
+        human_message, ai_message = turn
+        empty_reply = self.count_tokens(ai_message.model_copy(update={"content": ""}))
+        human_message = _truncated(human_message, budget - empty_reply, self.count_tokens)
+        if human_message is None:
+            return None
+        ai_message = _truncated(ai_message, budget - self.count_tokens(human_message), self.count_tokens)
+        return None if ai_message is None else (human_message, ai_message)
+
+    def _update_summary(self):
+        # Runs on the background thread; folds everything pushed out so far
+        while True:
+            with self._lock:
+                turns, self._unsummarized = self._unsummarized, []
+                if not turns:
+                    self._worker_running = False
+                    return
+                self._summarizing = turns
+                summary = self.summary
+            lines = "\n".join(
+                f"{type(message).__name__.replace('Message', '')}: {message.content}"
+                for turn in turns for message in turn
+            )
+            try:
+                updated = self.summary_chain.invoke({
+                    "summary": summary or "(none yet)",
+                    "lines": lines,
+                    "max_words": self.summary_tokens * 3 // 4,
+                }).content
+            except BaseException:
+                # Keep the turns for the next attempt rather than losing them
+                with self._lock:
+                    self._unsummarized = turns + self._unsummarized
+                    self._summarizing = []
+                    self._worker_running = False
+                raise
+            with self._lock:
+                self.summary = updated
+                self.summary_updates += 1
+                self._summarizing = []
+
+    def dump(self):
+        with self._lock:
+            return {
+                "turns": [messages_to_dict(turn) for turn in self.turns],
+                # Turns not in the summary yet, including those it is being
+                # updated with right now, are saved with it
+                "unsummarized": [messages_to_dict(turn) for turn in self._summarizing + self._unsummarized],
+                "summary": self.summary,
+            }
+
+    def load(self, data):
+        # A refresh still running would store its summary over the loaded one
+        self.wait()
+        with self._lock:
+            self.turns = [tuple(messages_from_dict(turn)) for turn in data["turns"]]
+            self._unsummarized = [tuple(messages_from_dict(turn)) for turn in data.get("unsummarized", [])]
+            self.summary = data.get("summary", "")
+            self._start_worker()
+
+    def wait(self):
+        """Block until the background summary is up to date"""
+        while True:
+            with self._lock:
+                refresh = self._refresh
+                if not self._worker_running:
+                    break
+            refresh.result()
+
+    def clear(self):
+        self.wait()
+        with self._lock:
+            self.turns = []
+            self._unsummarized = []
+            self.summary = ""
@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # repo root, for fake_models.py
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from chatbot import SimpleChatbot
+from chat_history import ConversationHistory, TokenBudgetHistory
+from fake_models import CountingFakeChatModel
+from token_count import message_tokens
+
+# Per-turn latency and prompt size of SimpleChatbot over a 500-turn scripted
+# conversation, with the unbounded history versus a 2000-token budget.
+# The fake model's latency grows with the prompt (5 ms + 4 us per prompt
+# token), like a real API's time to first token; the summarizer is a second
+# fake model that takes 50 ms per call and runs in the background.
+
+TURNS = 500
+BUDGET = 2000
+CHECKPOINTS = (1, 10, 50, 100, 250, 500)
+BASE_LATENCY = 0.005
+TOKEN_LATENCY = 0.000004
+
+
+def user_message(turn):
+    return (f"Turn {turn}: I am planning a trip to city number {turn % 37}. "
+            f"What should I see there, and how many days do I need if I also want to relax?")
+
+
+def run(history, label):
+    reply = " ".join(["Here is a suggestion for your itinerary."] * 8)
+    model = CountingFakeChatModel(respond=lambda _: reply, latency=BASE_LATENCY,
+                                  latency_per_input_token=TOKEN_LATENCY)
+    bot = SimpleChatbot(system_prompt="You are a friendly travel assistant.", model=model, history=history)
+    latencies = []
+    print(f"\n{label}")
+    print(f"{'turn':>6} {'prompt tokens':>14} {'turn ms':>8}")
+    start = time.perf_counter()
+    for turn in range(1, TURNS + 1):
+        prompt = bot.prompt_template.format_messages(history=bot.conversation_history,
+                                                     user_input=user_message(turn))
+        tokens = sum(message_tokens(message) for message in prompt)
+        turn_start = time.perf_counter()
+        bot.chat(user_message(turn))
+        latencies.append(time.perf_counter() - turn_start)
+        if isinstance(history, TokenBudgetHistory):
+            assert sum(message_tokens(message) for message in history.messages()) <= history.max_tokens
+        if turn in CHECKPOINTS:
+            print(f"{turn:>6} {tokens:>14} {latencies[-1] * 1000:>8.1f}")
+    total = time.perf_counter() - start
+    latencies.sort()
+    print(f"total {total:.2f}s, p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"max {latencies[-1] * 1000:.1f} ms")
+    return bot
+
+
+run(ConversationHistory(), "Unbounded history")
+
+summary = " ".join(["The user is planning trips to many cities."] * 20)
+summarizer = CountingFakeChatModel(respond=lambda _: summary, latency=0.05)
+budgeted = TokenBudgetHistory(summarizer, max_tokens=BUDGET)
+bot = run(budgeted, f"Token budget {BUDGET} with rolling summary")
+budgeted.wait()
+print(f"summary calls: {summarizer.calls}, summary updates: {budgeted.summary_updates}, "
+      f"turns kept verbatim: {len(budgeted.turns)}")
+
+# A single turn larger than the whole budget: the window keeps it cut down,
+# the summarizer gets it whole
+huge_reply = "A very long itinerary. " * 2000
+budgeted.add_turn(HumanMessage(content=user_message(TURNS + 1)), AIMessage(content=huge_reply))
+history_tokens = sum(message_tokens(message) for message in budgeted.messages())
+budgeted.wait()
+assert history_tokens <= BUDGET and budgeted.turns[-1][0].content == user_message(TURNS + 1)
+print(f"oversized turn ({message_tokens(AIMessage(content=huge_reply))} tokens): history {history_tokens} tokens, "
+      f"reply kept {len(budgeted.turns[-1][1].content)} of {len(huge_reply)} characters")
@@ -1,12 +1,14 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # repo root, for bootstrap.py
+from bootstrap import chat_model
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from dotenv import load_dotenv
-
-load_dotenv()
+from chatbot import SimpleChatbot
+from chat_history import TokenBudgetHistory
 
 # Initialize the chat model
-model = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.7)
+model = chat_model(model="gpt-3.5-turbo", temperature=0.7)
 
 # ============================================================================
 # Example 1: Basic ChatPromptTemplate with system and user messages
@@ -95,40 +97,13 @@ print("=" * 70)
 print("Example 4: Chatbot Simulation")
 print("=" * 70)
 
-class SimpleChatbot:
-    def __init__(self, system_prompt="You are a helpful assistant."):
-        self.model = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.7)
-        self.conversation_history = []
-        
-        # Create prompt template with system message and conversation history
-        self.prompt_template = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
-            MessagesPlaceholder(variable_name="history"),
-            ("human", "{user_input}")
-        ])
-    
-    def chat(self, user_input):
-        # Format the prompt with current history and user input
-        formatted_prompt = self.prompt_template.format_messages(
-            history=self.conversation_history,
-            user_input=user_input
-        )
-        
-        # Get response from model
-        response = self.model.invoke(formatted_prompt)
-        
-        # Update conversation history
-        self.conversation_history.append(HumanMessage(content=user_input))
-        self.conversation_history.append(AIMessage(content=response.content))
-        
-        return response.content
-    
-    def reset(self):
-        """Reset the conversation history"""
-        self.conversation_history = []
-
-# Create a chatbot instance
-bot = SimpleChatbot(system_prompt="You are a friendly travel assistant. Help users plan their trips.")
+# Create a chatbot instance. Its history keeps the prompt under ~2000 tokens:
+# recent turns verbatim, older turns folded into a background-updated summary.
+bot = SimpleChatbot(
+    system_prompt="You are a friendly travel assistant. Help users plan their trips.",
+    model=model,
+    history=TokenBudgetHistory(model, max_tokens=2000)
+)
 
 # Simulate a conversation
 print("Chatbot: Hello! I'm your travel assistant. How can I help you today?\n")
@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.messages import HumanMessage, AIMessage
+
+from chat_history import ConversationHistory
+from compiled_prompt import compile_prompt
+
+# Many SimpleChatbot conversations served from one asyncio process.
+#
+# A SimpleChatbot owns its model and history and blocks in chat(). Here one
+# shared model serves every session, and each session is just a history plus
+# an asyncio.Lock:
+#
+# - Turns of one session run one at a time, in arrival order (asyncio.Lock
+#   wakes waiters first-in first-out), so every turn sees the previous reply.
+# - At most max_sessions histories stay in memory. The least recently used
+#   idle session is written to store_dir as JSON and read back on its next
+#   turn.
+# - A caller that disconnects cancels its chat() task. The model call is
+#   cancelled with it and the turn is not recorded, so the history never holds
+#   a question without its answer.
+#
+#   service = ChatService(model, "You are a helpful assistant.", "sessions/")
+#   reply = await service.chat("user-42", "Hello!")
+
+
+class _Session:
+    def __init__(self):
+        self.history = None  # None until loaded from disk or created
+        self.lock = asyncio.Lock()
+        self.pending = 0     # turns running or waiting; busy sessions are not evicted
+
+
+class ChatService:
+    """Serve many chat sessions with one model.
+
+    model:           chat model shared by every session
+    system_prompt:   system message of every conversation
+    store_dir:       directory holding evicted sessions
+    max_sessions:    histories kept in memory
+    max_concurrency: model calls in flight at once
+    history_factory: creates the history of a new session, e.g.
+                     lambda: TokenBudgetHistory(summary_model, max_tokens=2000)
+    """
+
+    def __init__(self, model, system_prompt, store_dir, max_sessions=1000, max_concurrency=64,
+                 history_factory=ConversationHistory):
+        self.model = model
+        self.store_dir = store_dir
+        self.max_sessions = max_sessions
+        self.history_factory = history_factory
+        self.prompt_template = ChatPromptTemplate.from_messages([
+            ("system", system_prompt),
+            MessagesPlaceholder(variable_name="history"),
+            ("human", "{user_input}")
+        ])
+        self.render = compile_prompt(self.prompt_template)
+        self.evictions = 0
+        self.reloads = 0
+        self._sessions = OrderedDict()
+        self._writes = {}  # session_id -> task saving an evicted session
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        os.makedirs(store_dir, exist_ok=True)
+
+    def _path(self, session_id):
+        name = hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.store_dir, name + ".json")
+
+    @staticmethod
+    def _write(path, data):
+        # Write then rename, so a crash never leaves a half-written session
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def _save(cls, path, history):
+        # On a worker thread: a TokenBudgetHistory's summary may still be
+        # refreshing; waiting lets the file hold the finished summary
+        try:
+            history.wait()
+        except Exception:
+            pass  # the turns the summary failed on are dumped as unsummarized
+        cls._write(path, history.dump())
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    async def _load(self, session_id):
+        # An eviction of this session may still be writing it out. Shielded:
+        # a caller disconnecting here must not cancel the write.
+        write = self._writes.get(session_id)
+        if write is not None:
+            await asyncio.shield(write)
+        history = self.history_factory()
+        data = await asyncio.to_thread(self._read, self._path(session_id))
+        if data is not None:
+            history.load(data)
+            self.reloads += 1
+        return history
+
+    def _evict(self):
+        # Drop least recently used idle sessions beyond the cap
+        for session_id in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions:
+                return
+            session = self._sessions[session_id]
+            if session.pending:
+                continue
+            del self._sessions[session_id]
+            if session.history is None:
+                continue  # its load failed; nothing to save
+            self.evictions += 1
+            task = asyncio.ensure_future(
+                asyncio.to_thread(self._save, self._path(session_id), session.history)
+            )
+            self._writes[session_id] = task
+            task.add_done_callback(lambda _, session_id=session_id, task=task: (
+                self._writes.pop(session_id) if self._writes.get(session_id) is task else None
+            ))
+
+    async def chat(self, session_id, user_input):
+        """Run one turn of session_id and return the reply text"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _Session()
+        self._sessions.move_to_end(session_id)
+        session.pending += 1
+        try:
+            async with session.lock:
+                if session.history is None:
+                    session.history = await self._load(session_id)
+                formatted_prompt = self.render.format_messages(
+                    history=session.history.messages(),
+                    user_input=user_input
+                )
+                async with self._semaphore:
+                    response = await self.model.ainvoke(formatted_prompt)
+                # Only reached when the call completed: cancelled turns leave no trace
+                session.history.add_turn(HumanMessage(content=user_input), AIMessage(content=response.content))
+                return response.content
+        finally:
+            session.pending -= 1
+            self._evict()
+
+    async def history(self, session_id):
+        """Messages of session_id, loading it from disk if needed"""
+        session = self._sessions.get(session_id)
+        if session is not None and session.history is not None:
+            return session.history.messages()
+        return (await self._load(session_id)).messages()
+
+    async def flush(self):
+        """Write every in-memory session to disk and wait for pending writes"""
+        await asyncio.gather(*[
+            asyncio.to_thread(self._save, self._path(session_id), session.history)
+            for session_id, session in self._sessions.items() if session.history is not None
+        ])
+        await asyncio.gather(*list(self._writes.values()))
+
+    def stats(self):
+        return {"in_memory": len(self._sessions), "evictions": self.evictions, "reloads": self.reloads}
@@ -0,0 +1,123 @@
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # repo root, for fake_models.py
+
+from chat_history import TokenBudgetHistory
+from chat_service import ChatService
+from fake_models import CountingFakeChatModel
+
+# Load test for ChatService: SESSIONS concurrent users, each sending TURNS
+# messages one after another with a short think time, against an offline
+# model taking 20 ms + 4 us per prompt token. About 5% of turns are
+# abandoned by their client after 10 ms (the task is cancelled, like on a
+# disconnect). Reports turn latency, resident memory per session, and checks
+# that every history holds complete turns in the order they were sent.
+#
+# Each configuration runs in its own process so the memory numbers do not
+# include the previous run. Last, a TokenBudgetHistory session is evicted
+# while its summary is still being written; every turn must survive the
+# round trip through the disk, in the summary or in the turns.
+
+SESSIONS = 1000
+THINK_TIME = 2.0
+TURNS = 10
+DISCONNECT_RATE = 0.05
+
+
+def resident_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+async def user(service, session_id, latencies, rng):
+    sent = []
+    for turn in range(TURNS):
+        await asyncio.sleep(rng.uniform(0, 2 * THINK_TIME))
+        message = f"{session_id} turn {turn}: suggest something to do in city {turn}, please."
+        start = time.perf_counter()
+        task = asyncio.ensure_future(service.chat(session_id, message))
+        if rng.random() < DISCONNECT_RATE:
+            await asyncio.sleep(0.01)
+            task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            continue
+        latencies.append(time.perf_counter() - start)
+        sent.append(message)
+    return sent
+
+
+async def run(max_sessions):
+    reply = " ".join(["Here is a suggestion for your trip."] * 8)
+    model = CountingFakeChatModel(respond=lambda _: reply, latency=0.02, latency_per_input_token=0.000004)
+    rng = random.Random(0)
+    latencies = []
+    with tempfile.TemporaryDirectory() as store_dir:
+        service = ChatService(model, "You are a friendly travel assistant.", store_dir,
+                              max_sessions=max_sessions, max_concurrency=512)
+        before = resident_bytes()
+        start = time.perf_counter()
+        sent = await asyncio.gather(*[
+            user(service, f"session-{i}", latencies, rng) for i in range(SESSIONS)
+        ])
+        elapsed = time.perf_counter() - start
+        after = resident_bytes()
+
+        # Every session's history must hold exactly its completed turns, in order
+        for i, messages in enumerate(sent):
+            history = await service.history(f"session-{i}")
+            assert [m.content for m in history[::2]] == messages, f"session-{i} out of order"
+            assert len(history) == 2 * len(messages), f"session-{i} has a partial turn"
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f"max_sessions={max_sessions:>5}: {len(latencies)} turns in {elapsed:.1f}s, "
+          f"p50 {p50:.1f} ms, p99 {p99:.1f} ms, "
+          f"{(after - before) / SESSIONS / 1024:.1f} KiB resident per session, {service.stats()}")
+
+
+def echo_summary(prompt):
+    # The old summary plus the new lines, so every turn the summarizer was
+    # given can be found in it
+    summary, lines = prompt.split("\n\nNew lines of conversation:\n")
+    summary = summary.removeprefix("Current summary:\n")
+    return ("" if summary == "(none yet)" else summary + "\n") + lines
+
+
+async def evict_while_summarizing():
+    model = CountingFakeChatModel(respond=lambda _: "Sure, here is an idea for the evening in that city.")
+    summarizer = CountingFakeChatModel(respond=echo_summary, latency=0.2)
+    with tempfile.TemporaryDirectory() as store_dir:
+        service = ChatService(model, "You are a friendly travel assistant.", store_dir, max_sessions=1,
+                              history_factory=lambda: TokenBudgetHistory(summarizer, max_tokens=120,
+                                                                         summary_tokens=40))
+        sent = [f"a turn {turn}: what should I do tonight in city {turn}?" for turn in range(6)]
+        for message in sent:
+            await service.chat("a", message)
+        # "b" evicts "a" while its summary refresh is still running
+        await service.chat("b", "hello")
+        await service.flush()
+        await service.chat("a", "a turn 6: and tomorrow?")  # reloads "a", evicting "b"
+        history = service._sessions["a"].history
+        await asyncio.to_thread(history.wait)
+        kept = history.summary + "".join(message.content for turn in history.turns for message in turn)
+        lost = [message for message in sent if message not in kept]
+        assert not lost, f"lost on eviction: {lost}"
+        print(f"evicted during a summary refresh: all {len(sent)} earlier turns kept "
+              f"({len(history.turns)} verbatim, the rest in the summary), {service.stats()}")
+
+
+if len(sys.argv) > 1:
+    asyncio.run(run(int(sys.argv[1])))
+else:
+    print(f"{SESSIONS} sessions x {TURNS} turns, {DISCONNECT_RATE:.0%} of turns disconnected")
+    for max_sessions in (SESSIONS, 200):
+        subprocess.run([sys.executable, __file__, str(max_sessions)], check=True)
+    asyncio.run(evict_while_summarizing())
@@ -0,0 +1,60 @@
+import os
+import sys
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.messages import HumanMessage, AIMessage
+
+from chat_history import ConversationHistory
+from compiled_prompt import compile_prompt
+
+# SimpleChatbot from chat_prompt_template_demo.py, importable on its own so
+# the demo and chat_history_benchmark.py share it.
+#
+# By default the whole conversation is re-sent on every turn. Pass
+# history=TokenBudgetHistory(summary_model, max_tokens=...) to cap the prompt:
+#
+#   bot = SimpleChatbot(history=TokenBudgetHistory(model, max_tokens=2000))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class SimpleChatbot:
+    def __init__(self, system_prompt="You are a helpful assistant.", model=None, history=None):
+        if model is None:
+            # One shared client (and connection pool) for all chatbots, from bootstrap.py at the repo root
+            if ROOT not in sys.path:
+                sys.path.insert(0, ROOT)
+            from bootstrap import chat_model
+            model = chat_model(model="gpt-3.5-turbo", temperature=0.7)
+        self.model = model
+        self.history = history if history is not None else ConversationHistory()
+
+        # Create prompt template with system message and conversation history
+        self.prompt_template = ChatPromptTemplate.from_messages([
+            ("system", system_prompt),
+            MessagesPlaceholder(variable_name="history"),
+            ("human", "{user_input}")
+        ])
+        self.render = compile_prompt(self.prompt_template)
+
+    @property
+    def conversation_history(self):
+        return self.history.messages()
+
+    def chat(self, user_input):
+        # Format the prompt with current history and user input
+        formatted_prompt = self.render.format_messages(
+            history=self.history.messages(),
+            user_input=user_input
+        )
+
+        # Get response from model
+        response = self.model.invoke(formatted_prompt)
+
+        # Update conversation history (a budgeted history summarizes in the background)
+        self.history.add_turn(HumanMessage(content=user_input), AIMessage(content=response.content))
+
+        return response.content
+
+    def reset(self):
+        """Reset the conversation history"""
+        self.history.clear()
@@ -0,0 +1,143 @@
+from string import Formatter
+
+from langchain_core.messages import BaseMessage, convert_to_messages
+from langchain_core.prompts import MessagesPlaceholder, PromptTemplate
+from langchain_core.prompts.chat import _StringImageMessagePromptTemplate
+
+# Fast path for ChatPromptTemplate.format_messages.
+#
+# format_messages walks the template on every call: it merges partial
+# variables, dispatches on each message template's type and runs the generic
+# f-string formatter. compile_prompt() does that walk once:
+#
+# - messages with no variables are formatted once and the same message
+#   objects are returned on every call (treat them as read-only)
+# - "{name}" templates become a list of literal strings and variable names,
+#   joined directly at render time
+# - MessagesPlaceholder slots extend the result with the caller's messages
+#   instead of converting and copying the list
+#
+# Anything it cannot compile (jinja2/mustache templates, image or nested
+# templates) is rendered by its own format_messages,
+# so the output always equals template.format_messages(**kwargs).
+#
+#   render = compile_prompt(prompt_template)
+#   messages = render.format_messages(history=history, user_input=user_input)
+
+CONVERSIONS = {"r": repr, "s": str, "a": ascii}
+
+
+def parse_fstring(template):
+    """Literal strings and (name, conversion, format_spec) fields of an f-string.
+
+    Returns None when a field is more than a plain name (attribute or index
+    access, nested format specs), which the compiled path does not handle.
+    """
+    parts = []
+    for literal, name, format_spec, conversion in Formatter().parse(template):
+        if literal:
+            parts.append(literal)
+        if name is None:
+            continue
+        if not name.isidentifier() or "{" in format_spec:
+            return None
+        parts.append((name, conversion, format_spec))
+    return parts
+
+
+def _text_renderer(parts):
+    fields = [part for part in parts if not isinstance(part, str)]
+    if len(parts) == 1 and fields[0][1:] == (None, ""):
+        # The whole template is one "{name}", e.g. ("human", "{user_input}")
+        name = fields[0][0]
+        return lambda kwargs: format(kwargs[name])
+
+    if all(field[1:] == (None, "") for field in fields):
+        # Plain "{name}" fields only: (piece, is_literal) per part
+        pieces = [(part, True) if isinstance(part, str) else (part[0], False) for part in parts]
+        return lambda kwargs: "".join([
+            piece if is_literal else format(kwargs[piece]) for piece, is_literal in pieces
+        ])
+
+    def render(kwargs):
+        out = []
+        for part in parts:
+            if isinstance(part, str):
+                out.append(part)
+                continue
+            name, conversion, format_spec = part
+            value = kwargs[name]
+            if conversion:
+                value = CONVERSIONS[conversion](value)
+            out.append(format(value, format_spec))
+        return "".join(out)
+    return render
+
+
+def _placeholder_renderer(placeholder):
+    name = placeholder.variable_name
+    optional = placeholder.optional
+    n_messages = placeholder.n_messages
+
+    def render(kwargs):
+        value = kwargs.get(name, []) if optional else kwargs[name]
+        if not isinstance(value, list):
+            raise ValueError(
+                f"variable {name} should be a list of base messages, got {value} of type {type(value)}"
+            )
+        # Already messages (the usual history): splice the list as it is
+        if not all(isinstance(message, BaseMessage) for message in value):
+            value = convert_to_messages(value)
+        return value[-n_messages:] if n_messages else value
+    return render
+
+
+def _message_renderer(message_template):
+    """(splice, render) for one entry of ChatPromptTemplate.messages"""
+    if isinstance(message_template, BaseMessage):
+        return False, lambda kwargs: message_template
+    if isinstance(message_template, MessagesPlaceholder):
+        return True, _placeholder_renderer(message_template)
+    prompt = getattr(message_template, "prompt", None)
+    if (isinstance(message_template, _StringImageMessagePromptTemplate)
+            and isinstance(prompt, PromptTemplate)
+            and prompt.template_format == "f-string"
+            and not prompt.partial_variables):
+        parts = parse_fstring(prompt.template)
+        if parts is not None:
+            if all(isinstance(part, str) for part in parts):
+                message = message_template.format()
+                return False, lambda kwargs: message
+            render_text = _text_renderer(parts)
+            message_class = message_template._msg_class
+            additional_kwargs = message_template.additional_kwargs
+            return False, lambda kwargs: message_class(
+                content=render_text(kwargs), additional_kwargs=additional_kwargs
+            )
+    # Not compilable: defer to the template itself
+    return True, lambda kwargs: message_template.format_messages(**kwargs)
+
+
+class CompiledChatPrompt:
+    """ChatPromptTemplate with format_messages precomputed; see compile_prompt"""
+
+    def __init__(self, template):
+        self.template = template
+        self._merge_partials = bool(template.partial_variables)
+        self._steps = [_message_renderer(message) for message in template.messages]
+
+    def format_messages(self, **kwargs):
+        if self._merge_partials:
+            kwargs = self.template._merge_partial_and_user_variables(**kwargs)
+        result = []
+        for splice, render in self._steps:
+            if splice:
+                result.extend(render(kwargs))
+            else:
+                result.append(render(kwargs))
+        return result
+
+
+def compile_prompt(template):
+    """Compile a ChatPromptTemplate into a CompiledChatPrompt"""
+    return CompiledChatPrompt(template)
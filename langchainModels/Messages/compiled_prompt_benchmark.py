@@ -0,0 +1,76 @@
+import argparse
+import time
+
+from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, MessagesPlaceholder
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+
+from compiled_prompt import compile_prompt
+
+# Renders PROMPTS prompts with ChatPromptTemplate.format_messages and with
+# the compiled renderer, for the templates used in chat_prompt_template_demo.py,
+# after checking that both produce the same messages. Prints the time per
+# prompt and the total for PROMPTS prompts (--prompts for a quicker run).
+
+PROMPTS = 1_000_000
+
+parser = argparse.ArgumentParser(description="format_messages versus the compiled renderer")
+parser.add_argument("--prompts", type=int, default=PROMPTS, help="prompts rendered per template and renderer")
+PROMPTS = parser.parse_args().prompts
+
+history = []
+for i in range(10):
+    history.append(HumanMessage(content=f"Question {i} about my trip to Paris?"))
+    history.append(AIMessage(content=f"Answer {i}: the Louvre, the Eiffel Tower and a walk along the Seine."))
+
+templates = {
+    "system + human": (
+        ChatPromptTemplate.from_messages([
+            ("system", "You are a helpful assistant that explains concepts clearly."),
+            ("human", "Explain {topic} in simple terms.")
+        ]),
+        {"topic": "machine learning"},
+    ),
+    "chatbot with history": (
+        ChatPromptTemplate.from_messages([
+            ("system", "You are a friendly travel assistant. Help users plan their trips."),
+            MessagesPlaceholder(variable_name="history"),
+            ("human", "{user_input}")
+        ]),
+        {"history": history, "user_input": "Can you suggest a 3-day itinerary?"},
+    ),
+    "variables in every message": (
+        ChatPromptTemplate.from_messages([
+            ("system", "You are {assistant_type}"),
+            ("human", "{question}")
+        ]),
+        {"assistant_type": "a chef", "question": "How do I make pasta?"},
+    ),
+}
+
+# Same messages for these and for some templates the compiler handles specially
+checks = dict(templates)
+checks["format spec, partial, mustache"] = (
+    ChatPromptTemplate.from_messages([
+        SystemMessage(content="Static {not a variable}"),
+        ("system", "Today is {day}. Budget: {budget:>8.2f} {currency!r} {{literal}}"),
+        MessagesPlaceholder(variable_name="extra", optional=True, n_messages=2),
+        HumanMessagePromptTemplate.from_template("Hello {{name}}", template_format="mustache")
+    ]).partial(day=lambda: "Monday"),
+    {"budget": 1234.5, "currency": "EUR", "name": "Ana",
+     "extra": [("human", "tuple message"), HumanMessage(content="m1"), AIMessage(content="m2")]},
+)
+for name, (template, kwargs) in checks.items():
+    assert compile_prompt(template).format_messages(**kwargs) == template.format_messages(**kwargs), name
+
+for name, (template, kwargs) in templates.items():
+    compiled = compile_prompt(template)
+    start = time.perf_counter()
+    for _ in range(PROMPTS):
+        template.format_messages(**kwargs)
+    plain = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(PROMPTS):
+        compiled.format_messages(**kwargs)
+    fast = time.perf_counter() - start
+    print(f"{name:<28} format_messages {plain / PROMPTS * 1e6:5.1f} us/prompt ({plain:5.2f} s total)   "
+          f"compiled {fast / PROMPTS * 1e6:5.1f} us/prompt ({fast:5.2f} s total)   {plain / fast:4.1f}x faster")
@@ -1,8 +1,8 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # repo root, for bootstrap.py
+from bootstrap import chat_model
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
-
-load_dotenv()
 
 # Initialize the chat model
 # Temperature parameter (0.0 to 2.0):
@@ -11,7 +11,7 @@ load_dotenv()
 # - Medium values (0.5-0.7): Balanced between creativity and consistency
 # - Higher values (0.8-2.0): More creative, diverse, and unpredictable responses
 # - Default is usually around 0.7-1.0
-model = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.7)
+model = chat_model(model="gpt-3.5-turbo", temperature=0.7)
 
 # Different types of messages in LangChain
 
@@ -1,3 +1,4 @@
-import langchain
+from importlib.metadata import version
 
-print(langchain.__version__)
\ No newline at end of file
+# Read from the installed package metadata instead of importing langchain
+print(version("langchain"))
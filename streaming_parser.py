@@ -0,0 +1,207 @@
+import json
+import re
+from typing import Annotated, Any, get_type_hints
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import BaseMessage
+from langchain_core.output_parsers import BaseTransformOutputParser
+from pydantic import BaseModel, PrivateAttr, TypeAdapter, ValidationError
+
+# Streaming structured-output parser.
+#
+# PydanticOutputParser only parses once the whole reply has arrived, and
+# LangChain's partial JSON parsers re-parse the full buffer on every chunk.
+# StreamingStructuredOutputParser scans each chunk once, keeping its place in
+# the JSON object between chunks. As soon as a top-level field's value is
+# complete, only that value is decoded and validated against the field's type,
+# and a dict of the fields so far is emitted:
+#
+#   chain = prompt | model | StreamingStructuredOutputParser(schema_type=MovieInfo)
+#   for partial in chain.stream(...):
+#       ...  # {"title": ...}, then {"title": ..., "year": ...}, ...
+#
+# The last item of the stream is the fully validated object: a model instance
+# for a Pydantic schema, a dict for a TypedDict. invoke() returns just that.
+# Text before the opening brace (such as a ```json fence) is skipped, and
+# tool-call argument chunks are read when the message has no text content,
+# so model.bind_tools([schema], tool_choice=...) streams through it too.
+#
+# Lives at the repo root, next to bootstrap.py, because scripts in Chains/
+# and StructuredOutput/ both use it.
+
+STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class IncrementalJsonObject:
+    """Scans a JSON object chunk by chunk and reports each top-level field once it is complete"""
+
+    def __init__(self):
+        self.text = ""
+        self.values = {}
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._phase = "key"     # key -> colon -> value -> comma -> key ...
+        self._key_start = None
+        self._key = None
+        self._value_start = None
+
+    def _complete(self, end, fields):
+        value = json.loads(self.text[self._value_start:end])
+        fields.append((self._key, value))
+        self._value_start = None
+        self._phase = "comma"
+
+    def feed(self, chunk):
+        """Add chunk; returns the (key, value) pairs completed by it"""
+        self.text += chunk
+        text = self.text
+        fields = []
+        i = self._pos
+        while i < len(text) and not self.done:
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._phase == "key":
+                        self._key = json.loads(text[self._key_start:i + 1])
+                        self._phase = "colon"
+                    elif self._depth == 1 and self._phase == "value":
+                        self._complete(i + 1, fields)
+                else:
+                    # Jump to the next quote or backslash instead of stepping through the string
+                    match = STRING_SPECIAL.search(text, i)
+                    i = match.start() if match else len(text)
+                    continue
+                i += 1
+                continue
+            if self._depth == 0:
+                # Skip anything before the object, e.g. a ```json fence
+                if char == "{":
+                    self._depth = 1
+            elif char == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    if self._phase == "key":
+                        self._key_start = i
+                    elif self._phase == "value" and self._value_start is None:
+                        self._value_start = i
+            elif char == ":" and self._depth == 1 and self._phase == "colon":
+                self._phase = "value"
+            elif char in "{[":
+                if self._depth == 1 and self._value_start is None:
+                    self._value_start = i
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    self._complete(i + 1, fields)
+                elif self._depth == 0:
+                    if self._value_start is not None:
+                        self._complete(i, fields)  # a number or literal ends the object
+                    self.done = True
+            elif char == "," and self._depth == 1:
+                if self._value_start is not None:
+                    self._complete(i, fields)
+                self._phase = "key"
+            elif self._depth == 1 and self._phase == "value" and self._value_start is None and not char.isspace():
+                self._value_start = i  # start of a number, true, false or null
+            i += 1
+        self._pos = len(text)
+        return fields
+
+
+class StreamingStructuredOutputParser(BaseTransformOutputParser[Any]):
+    """Parse a streamed JSON reply into schema_type, emitting fields as they complete.
+
+    schema_type: Pydantic model or TypedDict describing the reply
+    """
+
+    schema_type: Any
+
+    _field_adapters: dict = PrivateAttr(default=None)
+
+    def _is_model(self):
+        return isinstance(self.schema_type, type) and issubclass(self.schema_type, BaseModel)
+
+    def _adapters(self):
+        # One validator per field, built once and reused by every stream. A
+        # TypedDict is validated field by field only: pydantic rejects
+        # typing.TypedDict (as used in structured_output_demo.py) before 3.12.
+        if self._field_adapters is None:
+            if self._is_model():
+                fields = {
+                    field.alias or name: Annotated[(field.annotation, *field.metadata)]
+                    if field.metadata else field.annotation
+                    for name, field in self.schema_type.model_fields.items()
+                }
+            else:
+                fields = get_type_hints(self.schema_type)
+            self._field_adapters = {name: TypeAdapter(hint) for name, hint in fields.items()}
+        return self._field_adapters
+
+    @staticmethod
+    def _text(chunk):
+        if not isinstance(chunk, BaseMessage):
+            return chunk
+        if isinstance(chunk.content, str) and chunk.content:
+            return chunk.content
+        # with bind_tools / function calling the JSON arrives as tool-call arguments
+        return "".join(call.get("args") or "" for call in getattr(chunk, "tool_call_chunks", []))
+
+    def _accept(self, state, fields, field_adapters):
+        for key, value in fields:
+            adapter = field_adapters.get(key)
+            try:
+                state.values[key] = adapter.validate_python(value) if adapter else value
+            except ValidationError as e:
+                raise OutputParserException(f"Invalid value for {key!r}: {e}", llm_output=state.text)
+
+    def _final(self, state):
+        if not state.done:
+            raise OutputParserException("Reply ended before the JSON object was complete", llm_output=state.text)
+        if not self._is_model():
+            missing = set(getattr(self.schema_type, "__required_keys__", ())) - state.values.keys()
+            if missing:
+                raise OutputParserException(f"Reply is missing {sorted(missing)}", llm_output=state.text)
+            return dict(state.values)
+        try:
+            return self.schema_type.model_validate(state.values)
+        except ValidationError as e:
+            raise OutputParserException(f"Reply does not match the schema: {e}", llm_output=state.text)
+
+    def _transform(self, input):
+        field_adapters = self._adapters()
+        state = IncrementalJsonObject()
+        for chunk in input:
+            fields = state.feed(self._text(chunk))
+            if fields:
+                self._accept(state, fields, field_adapters)
+                yield dict(state.values)
+        yield self._final(state)
+
+    async def _atransform(self, input):
+        field_adapters = self._adapters()
+        state = IncrementalJsonObject()
+        async for chunk in input:
+            fields = state.feed(self._text(chunk))
+            if fields:
+                self._accept(state, fields, field_adapters)
+                yield dict(state.values)
+        yield self._final(state)
+
+    def parse(self, text):
+        field_adapters = self._adapters()
+        state = IncrementalJsonObject()
+        self._accept(state, state.feed(text), field_adapters)
+        return self._final(state)
+
+    @property
+    def _type(self):
+        return "streaming_structured"
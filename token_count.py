@@ -0,0 +1,64 @@
+import threading
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Token counts shared by the scripts in this repo: request packing
+# (bulk_embedding.py, batch_extraction.py, map_reduce.py), rate limit
+# reservations (batch_driver.py), history budgets (chat_history.py) and
+# metrics (instrumentation.py) all use the same estimate.
+#
+# Reach it from a subfolder like bootstrap.py:
+#
+#   sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+#   from token_count import approximate_tokens
+
+# Tokens a chat API adds around each message (role, separators)
+MESSAGE_OVERHEAD = 4
+
+_encoding = None
+_default_count_tokens = None
+_encoding_lock = threading.Lock()
+
+
+def approximate_tokens(text):
+    # An estimate, not a bound. English averages ~4 characters per token;
+    # other scripts take more tokens per character (CJK often one or two per
+    # character, some characters one per UTF-8 byte), so each byte beyond the
+    # first of a character adds half a token. The worst case, one token per
+    # byte, is about 2.3x this for CJK; callers with a hard limit keep headroom.
+    return len(text) // 3 + (len(text.encode("utf-8")) - len(text)) // 2 + 1
+
+
+def message_tokens(message):
+    """approximate_tokens of a message's content plus the per-message overhead"""
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    return approximate_tokens(content) + MESSAGE_OVERHEAD
+
+
+def tiktoken_tokens(text):
+    """Exact token count with the encoding of OpenAI's embedding models"""
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+    return len(_encoding.encode(text, disallowed_special=()))
+
+
+def default_count_tokens():
+    """tiktoken_tokens when tiktoken and its encoding are available, else approximate_tokens"""
+    global _default_count_tokens
+    if _default_count_tokens is None:
+        count_tokens = approximate_tokens
+        if tiktoken is not None:
+            try:
+                tiktoken_tokens("")
+                count_tokens = tiktoken_tokens
+            except Exception:
+                # The encoding is downloaded on first use; offline there is none
+                pass
+        _default_count_tokens = count_tokens
+    return _default_count_tokens